@@ -1,5 +1,6 @@
 """Configuration for the LLM Council."""
 
+import json
 import os
 from dotenv import load_dotenv
 
@@ -27,17 +28,17 @@ def get_ollama_base_url() -> str:
     return get_settings().ollama_base_url
 
 
-def get_council_models() -> list:
-    """Get council models from settings."""
+def get_council_models(settings=None) -> list:
+    """Get council models from settings (or the given settings snapshot)."""
     from .settings import get_settings, DEFAULT_COUNCIL_MODELS
-    settings = get_settings()
+    settings = settings or get_settings()
     return settings.council_models or DEFAULT_COUNCIL_MODELS
 
 
-def get_chairman_model() -> str:
-    """Get chairman model from settings."""
+def get_chairman_model(settings=None) -> str:
+    """Get chairman model from settings (or the given settings snapshot)."""
     from .settings import get_settings, DEFAULT_CHAIRMAN_MODEL
-    settings = get_settings()
+    settings = settings or get_settings()
     return settings.chairman_model or DEFAULT_CHAIRMAN_MODEL
 
 
@@ -45,9 +46,66 @@ def get_chairman_model() -> str:
 def get_database_config() -> dict:
     """Get database configuration from environment."""
     db_type = os.getenv("DB_TYPE", "json").lower()
+    url = os.getenv("DATABASE_URL")
+    if db_type == "sqlite" and not url:
+        url = "sqlite:///data/council.db"
     return {
         "type": db_type,
-        "url": os.getenv("DATABASE_URL")
+        "url": url
+    }
+
+# Journal (DB_TYPE=jsonl) storage settings
+def get_journal_config() -> dict:
+    """Get append-only journal storage configuration."""
+    return {
+        # Compact a journal once it is this many times the size of its live lines
+        "compact_ratio": float(os.getenv("JOURNAL_COMPACT_RATIO", "2")),
+        # fsync after every append (durable but slower)
+        "fsync": os.getenv("JOURNAL_FSYNC", "false").lower() == "true"
+    }
+
+# File layout of the JSON storage backends (json, jsonl)
+def get_json_layout_config() -> dict:
+    """Get the conversation file layout."""
+    layout = os.getenv("JSON_LAYOUT", "sharded").lower()
+    return {
+        # "sharded": data/conversations/{2 hex digits}/{id}.json; "flat": all files in one directory
+        "layout": layout if layout in ("flat", "sharded") else "sharded"
+    }
+
+# Async storage I/O settings
+def get_storage_io_config() -> dict:
+    """Get configuration for the storage I/O thread pool."""
+    return {
+        # Threads running storage calls off the event loop
+        "workers": int(os.getenv("STORAGE_IO_WORKERS", "4"))
+    }
+
+# In-process cache of parsed conversations (storage facade)
+def get_conversation_cache_config() -> dict:
+    """Get configuration for the hot-conversation LRU."""
+    return {
+        # Budget in bytes (approximate JSON size); 0 disables the cache
+        "max_bytes": int(float(os.getenv("CONVERSATION_CACHE_MB", "64")) * 1024 * 1024)
+    }
+
+# Stage payload side records
+def get_payload_config() -> dict:
+    """Get configuration for compressed stage payloads."""
+    return {
+        # Store large stage payloads gzip-compressed outside the message
+        "enabled": os.getenv("PAYLOAD_COMPRESSION", "true").lower() == "true",
+        # Only payloads at least this large (serialized bytes) are split out
+        "min_bytes": int(os.getenv("PAYLOAD_MIN_BYTES", "4096"))
+    }
+
+# Conversation search index
+def get_search_index_config() -> dict:
+    """Get configuration for the full-text conversation search index."""
+    return {
+        "enabled": os.getenv("SEARCH_INDEX_ENABLED", "true").lower() == "true",
+        # SQLite FTS5 database holding the index
+        "path": os.getenv("SEARCH_INDEX_PATH", "data/search_index.db")
     }
 
 # Tool settings
@@ -64,6 +122,7 @@ def get_document_config() -> dict:
     """Get document configuration."""
     return {
         "max_upload_size": int(os.getenv("MAX_UPLOAD_SIZE", 10 * 1024 * 1024)),  # 10MB default
+        "ingest_workers": int(os.getenv("DOCUMENT_INGEST_WORKERS", "2")),  # Background text extraction threads
         "upload_dir": os.path.join(os.getcwd(), "data", "documents")
     }
 
@@ -83,6 +142,111 @@ def get_strategy_config() -> dict:
         "multi_round_rounds": int(os.getenv("MULTI_ROUND_ROUNDS", "2"))
     }
 
+# HTTP connection pool settings
+def get_http_pool_config() -> dict:
+    """Get connection pool configuration for provider HTTP clients."""
+    return {
+        "max_connections": int(os.getenv("HTTP_MAX_CONNECTIONS", "100")),
+        "max_keepalive_connections": int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20")),
+        "keepalive_expiry": float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30")),
+        "http2": os.getenv("HTTP2_ENABLED", "false").lower() == "true",  # Requires the 'h2' package
+    }
+
+# Provider admission control (rate limiting)
+def get_rate_limit_config() -> dict:
+    """
+    Get per-provider concurrency and rate limits.
+
+    PROVIDER_RATE_LIMITS is a JSON object keyed by provider name (e.g. "groq")
+    or full model ID (e.g. "groq:llama-3.3-70b-versatile") with optional
+    "max_in_flight", "rpm" and "tpm" values.
+    """
+    try:
+        limits = json.loads(os.getenv("PROVIDER_RATE_LIMITS", "") or "{}")
+    except json.JSONDecodeError:
+        print("Warning: PROVIDER_RATE_LIMITS is not valid JSON, ignoring it")
+        limits = {}
+    return {
+        "enabled": os.getenv("RATE_LIMIT_ENABLED", "false").lower() == "true",  # Default OFF
+        "default_max_in_flight": int(os.getenv("PROVIDER_MAX_IN_FLIGHT", "0")),  # 0 = unlimited
+        "limits": limits if isinstance(limits, dict) else {}
+    }
+
+# Stage 1 hedging settings
+def get_hedge_config() -> dict:
+    """
+    Get hedged-request configuration for Stage 1.
+
+    HEDGE_THRESHOLD is a number of seconds or "p95" (the model's tracked p95
+    latency, once HEDGE_MIN_SAMPLES are recorded). HEDGE_BACKUP_MODELS is a
+    JSON object mapping a council model to the model used for its hedge
+    request; unmapped models are hedged against themselves.
+    """
+    try:
+        backups = json.loads(os.getenv("HEDGE_BACKUP_MODELS", "") or "{}")
+    except json.JSONDecodeError:
+        print("Warning: HEDGE_BACKUP_MODELS is not valid JSON, ignoring it")
+        backups = {}
+    threshold = os.getenv("HEDGE_THRESHOLD", "p95").lower()
+    if threshold != "p95":
+        try:
+            threshold = float(threshold)
+        except ValueError:
+            print(f"Warning: HEDGE_THRESHOLD must be seconds or 'p95', got {threshold!r}; using p95")
+            threshold = "p95"
+    return {
+        "enabled": os.getenv("HEDGE_ENABLED", "false").lower() == "true",  # Default OFF
+        "threshold": threshold,
+        "min_samples": int(os.getenv("HEDGE_MIN_SAMPLES", "5")),
+        "fallback_seconds": float(os.getenv("HEDGE_FALLBACK_SECONDS", "30")),  # Used until enough samples
+        "min_delay": float(os.getenv("HEDGE_MIN_DELAY", "2")),  # Floor for the p95 threshold
+        "backup_models": backups if isinstance(backups, dict) else {}
+    }
+
+# Stage 1 quorum settings
+def get_quorum_config() -> dict:
+    """Get Stage 1 quorum (early completion) configuration."""
+    late_policy = os.getenv("STAGE1_LATE_POLICY", "cancel").lower()
+    return {
+        "quorum": int(os.getenv("STAGE1_QUORUM", "0")),  # 0 = wait for all members
+        "deadline": float(os.getenv("STAGE1_DEADLINE", "0")),  # Seconds, 0 = no deadline
+        "late_policy": late_policy if late_policy in ("cancel", "keep") else "cancel"
+    }
+
+# Stage 2 early stopping settings
+def get_stage2_early_stop_config() -> dict:
+    """Get Stage 2 early stopping configuration."""
+    return {
+        "enabled": os.getenv("STAGE2_EARLY_STOP", "false").lower() == "true",  # Default OFF
+        "top_k": int(os.getenv("STAGE2_TOP_K", "1"))  # How many leading places must be decided
+    }
+
+# Response cache settings
+def get_response_cache_config() -> dict:
+    """Get LLM response cache configuration."""
+    return {
+        "enabled": os.getenv("RESPONSE_CACHE_ENABLED", "false").lower() == "true",  # Default OFF
+        "max_entries": int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "512")),
+        "ttl": float(os.getenv("RESPONSE_CACHE_TTL", str(24 * 3600))),  # Seconds
+        # Calls above this temperature are not cached unless explicitly allowed
+        "max_temperature": float(os.getenv("RESPONSE_CACHE_MAX_TEMPERATURE", "0.5")),
+        "allow_high_temperature": os.getenv("RESPONSE_CACHE_ALLOW_HIGH_TEMPERATURE", "false").lower() == "true",
+        "disk_enabled": os.getenv("RESPONSE_CACHE_DISK", "false").lower() == "true",
+        "disk_dir": os.path.join(os.getcwd(), "data", "response_cache"),
+        "disk_max_bytes": int(float(os.getenv("RESPONSE_CACHE_DISK_MAX_MB", "200")) * 1024 * 1024)
+    }
+
+# Council run memoization settings
+def get_council_cache_config() -> dict:
+    """Get whole-council result cache configuration."""
+    return {
+        "enabled": os.getenv("COUNCIL_CACHE_ENABLED", "false").lower() == "true",  # Default OFF
+        "similarity": float(os.getenv("COUNCIL_CACHE_SIMILARITY", "0.9")),  # MinHash Jaccard for near-duplicates
+        "ttl": float(os.getenv("COUNCIL_CACHE_TTL", str(7 * 24 * 3600))),  # Seconds
+        "max_entries": int(os.getenv("COUNCIL_CACHE_MAX_ENTRIES", "1000")),
+        "cache_dir": os.path.join(os.getcwd(), "data", "council_cache")
+    }
+
 COUNCIL_MODELS = [
     "openai/gpt-4.1",
     "google/gemini-2.5-pro",
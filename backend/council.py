@@ -1,13 +1,17 @@
 """3-stage LLM Council orchestration."""
 
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Tuple, AsyncIterator
 import asyncio
+import time
 import logging
 from . import openrouter
 from . import ollama_client
-from .config import get_council_models, get_chairman_model
+from .config import get_council_models, get_chairman_model, get_quorum_config, get_stage2_early_stop_config
 from .search import perform_web_search, SearchProvider
-from .settings import get_settings
+from .settings import get_settings, Settings
+from .rate_limit import admission
+from .hedging import run_hedged
+from .response_cache import response_cache, make_cache_key
 
 logger = logging.getLogger(__name__)
 
@@ -35,21 +39,76 @@ PROVIDERS = {
     "custom": CustomOpenAIProvider(),
 }
 
-def get_provider_for_model(model_id: str) -> Any:
-    """Determine the provider for a given model ID."""
+def get_provider_name(model_id: str) -> str:
+    """Determine the provider name (key in PROVIDERS) for a given model ID."""
     if ":" in model_id:
         provider_name = model_id.split(":")[0]
         if provider_name in PROVIDERS:
-            return PROVIDERS[provider_name]
+            return provider_name
 
     # Default to OpenRouter for unprefixed models (legacy support)
-    return PROVIDERS["openrouter"]
+    return "openrouter"
+
+
+def get_provider_for_model(model_id: str) -> Any:
+    """Determine the provider for a given model ID."""
+    return PROVIDERS[get_provider_name(model_id)]
 
 
 async def query_model(model: str, messages: List[Dict[str, str]], timeout: float = 120.0, temperature: float = 0.7) -> Dict[str, Any]:
-    """Dispatch query to appropriate provider."""
+    """Dispatch query to appropriate provider (cached, and queued behind its rate limits)."""
+    provider = get_provider_for_model(model)
+    provider_name = get_provider_name(model)
+
+    cache_key = None
+    if response_cache.is_cacheable(temperature):
+        cache_key = make_cache_key(provider_name, model, messages, temperature)
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            cached["cached"] = True
+            return cached
+
+    async with admission.admit(provider_name, model, messages):
+        result = await provider.query(model, messages, timeout, temperature)
+
+    if cache_key:
+        await response_cache.set(cache_key, result)
+    return result
+
+
+async def query_model_stream(model: str, messages: List[Dict[str, str]], timeout: float = 120.0, temperature: float = 0.7) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Dispatch a streaming query to the appropriate provider.
+
+    Yields delta dicts followed by a final result dict (see providers.streaming).
+    """
     provider = get_provider_for_model(model)
-    return await provider.query(model, messages, timeout, temperature)
+    provider_name = get_provider_name(model)
+
+    cache_key = None
+    if response_cache.is_cacheable(temperature):
+        cache_key = make_cache_key(provider_name, model, messages, temperature)
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            # Replay the cached answer as a single chunk
+            if cached.get("reasoning"):
+                yield {"reasoning_delta": cached["reasoning"]}
+            if cached.get("content"):
+                yield {"delta": cached["content"]}
+            cached["cached"] = True
+            yield cached
+            return
+
+    # The admission slot is held until the stream finishes
+    result = None
+    async with admission.admit(provider_name, model, messages):
+        async for chunk in provider.query_stream(model, messages, timeout, temperature):
+            if "delta" not in chunk and "reasoning_delta" not in chunk:
+                result = chunk
+            yield chunk
+
+    if cache_key:
+        await response_cache.set(cache_key, result)
 
 
 async def query_models_parallel(models: List[str], messages: List[Dict[str, str]]) -> Dict[str, Any]:
@@ -239,7 +298,47 @@ def _extract_ticker_candidates(text: str) -> List[str]:
     return candidates
 
 
-async def stage1_collect_responses(user_query: str, search_context: str = "", request: Any = None) -> Any:
+class LateArrivals:
+    """
+    Stage 1 members still running when the quorum was reached.
+
+    Used with STAGE1_LATE_POLICY=keep: their answers are collected when the
+    message is saved and stored flagged 'late', but they are not ranked.
+    """
+
+    def __init__(self):
+        self.tasks: List[asyncio.Task] = []
+        self.updates: asyncio.Queue = None
+
+    def adopt(self, tasks: List[asyncio.Task], updates: asyncio.Queue):
+        self.tasks = [t for t in tasks if not t.done()]
+        self.updates = updates
+
+    def collect(self) -> List[Dict[str, Any]]:
+        """Return the late results received so far and cancel the rest."""
+        results = []
+        while self.updates is not None and not self.updates.empty():
+            update = self.updates.get_nowait()
+            if "final" not in update:
+                continue
+            result = format_stage1_result(update["model"], update["final"])
+            if result:
+                result["late"] = True
+                results.append(result)
+        for t in self.tasks:
+            if not t.done():
+                t.cancel()
+        self.tasks = []
+        return results
+
+
+async def stage1_collect_responses(
+    user_query: str,
+    search_context: str = "",
+    request: Any = None,
+    late_arrivals: LateArrivals = None,
+    settings: Settings = None
+) -> Any:
     """
     Stage 1: Collect individual responses from all council models.
 
@@ -247,18 +346,24 @@ async def stage1_collect_responses(user_query: str, search_context: str = "", re
         user_query: The user's question
         search_context: Optional web search results to provide context
         request: FastAPI request object for checking disconnects
+        late_arrivals: Receives members still running after an early quorum
+                       when STAGE1_LATE_POLICY is 'keep'
+        settings: Settings snapshot for this request (defaults to current settings)
 
     Yields:
         - First yield: total_models (int)
-        - Subsequent yields: Individual model results (dict)
+        - Subsequent yields: token deltas ({"model", "delta"}) interleaved with
+          individual model results (dict, with "hedge" info if a hedge request was sent)
+        - If the quorum ends the stage early: {"quorum": {...}} listing dropped members
     """
-    settings = get_settings()
+    settings = settings or get_settings()
 
     # Build document context if available
     document_context_block = ""
     try:
         from .documents import get_active_documents_context
-        doc_context = get_active_documents_context()
+        # Reads the index and chunk files of every active document
+        doc_context = await asyncio.to_thread(get_active_documents_context, user_query, settings)
         if doc_context:
             document_context_block = f"\n\n{doc_context}\n"
     except Exception as e:
@@ -310,82 +415,147 @@ async def stage1_collect_responses(user_query: str, search_context: str = "", re
     messages = [{"role": "user", "content": prompt}]
 
     # Prepare tasks for all models
-    models = get_council_models()
+    models = get_council_models(settings)
     
     # Yield total count first
     yield len(models)
 
     council_temp = settings.council_temperature
 
-    async def _query_safe(m: str):
+    # Deltas and final results from all members are funnelled through one queue
+    # so we can forward tokens as soon as any model produces them.
+    updates: asyncio.Queue = asyncio.Queue()
+
+    async def _stream_one(m: str, target: str, forward: bool) -> Dict[str, Any]:
+        # Only the primary request streams tokens; a hedge request runs silently
+        response = None
+        async for chunk in query_model_stream(target, messages, temperature=council_temp):
+            if "delta" in chunk:
+                if forward:
+                    updates.put_nowait({"model": m, "delta": chunk["delta"]})
+            elif "reasoning_delta" not in chunk:
+                response = chunk
+        return response
+
+    async def _stream_safe(m: str):
+        response, hedge = None, None
         try:
-            return m, await query_model(m, messages, temperature=council_temp)
+            response, hedge = await run_hedged(
+                m, lambda target, is_primary: _stream_one(m, target, is_primary)
+            )
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            return m, {"error": True, "error_message": str(e)}
+            response = {"error": True, "error_message": str(e)}
+        updates.put_nowait({"model": m, "final": response, "hedge": hedge})
 
     # Create tasks
-    tasks = [asyncio.create_task(_query_safe(m)) for m in models]
-    
-    # Process as they complete
-    pending = set(tasks)
+    tasks = [asyncio.create_task(_stream_safe(m)) for m in models]
+
+    # Quorum: stop after K successful answers, or at the deadline once any member answered
+    quorum_config = get_quorum_config()
+    quorum = quorum_config["quorum"] if 0 < quorum_config["quorum"] < len(models) else 0
+    deadline = time.monotonic() + quorum_config["deadline"] if quorum_config["deadline"] > 0 else None
+    answered: List[str] = []
+    finished: List[str] = []
+    keep_late = False
+
+    # Process updates as they arrive
+    remaining = len(tasks)
     try:
-        while pending:
+        while remaining:
             # Check for client disconnect
             if request and await request.is_disconnected():
                 logger.info("Client disconnected during Stage 1. Cancelling tasks...")
-                for t in pending:
+                for t in tasks:
                     t.cancel()
                 raise asyncio.CancelledError("Client disconnected")
 
-            # Wait for the next task to complete (with timeout to check for disconnects)
-            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED, timeout=1.0)
+            reached_by = None
+            if quorum and len(answered) >= quorum:
+                reached_by = "quorum"
+            elif deadline is not None and answered and time.monotonic() >= deadline:
+                reached_by = "deadline"
+            if reached_by:
+                keep_late = quorum_config["late_policy"] == "keep" and late_arrivals is not None
+                if keep_late:
+                    late_arrivals.adopt(tasks, updates)
+                dropped = [m for m in models if m not in finished]
+                logger.info(f"Stage 1 {reached_by} reached with {len(answered)}/{len(models)} answers; dropped: {dropped}")
+                yield {"quorum": {
+                    "reached_by": reached_by,
+                    "answered": answered,
+                    "dropped": dropped,
+                    "late_policy": "keep" if keep_late else "cancel"
+                }}
+                return
+
+            # Wait for the next update (with timeout to check for disconnects and the deadline)
+            wait = 1.0
+            if deadline is not None and answered:
+                wait = max(0.0, min(wait, deadline - time.monotonic()))
+            try:
+                update = await asyncio.wait_for(updates.get(), timeout=wait)
+            except asyncio.TimeoutError:
+                continue
 
-            for task in done:
-                try:
-                    model, response = await task
-                    
-                    result = None
-                    if response is not None:
-                        if response.get('error'):
-                            # Include failed models with error info
-                            result = {
-                                "model": model,
-                                "response": None,
-                                "error": response.get('error'),
-                                "error_message": response.get('error_message', 'Unknown error')
-                            }
-                        else:
-                            # Successful response - ensure content is always a string
-                            content = response.get('content', '')
-                            if not isinstance(content, str):
-                                # Handle case where API returns non-string content (array, object, etc.)
-                                content = str(content) if content is not None else ''
-                            result = {
-                                "model": model,
-                                "response": content,
-                                "error": None
-                            }
-                    
-                    if result:
-                        yield result
-                except asyncio.CancelledError:
-                    raise
-                except Exception as e:
-                    logger.error(f"Error processing Stage 1 task result: {e}")
+            if "delta" in update:
+                yield update
+                continue
 
-    except asyncio.CancelledError:
-        # Ensure all tasks are cancelled if we get cancelled
-        for t in tasks:
-            if not t.done():
-                t.cancel()
-        raise
+            remaining -= 1
+            finished.append(update["model"])
+            try:
+                result = format_stage1_result(update["model"], update["final"])
+                if result:
+                    if update.get("hedge"):
+                        result["hedge"] = update["hedge"]
+                    if not result.get("error"):
+                        answered.append(update["model"])
+                    yield result
+            except Exception as e:
+                logger.error(f"Error processing Stage 1 task result: {e}")
+
+    finally:
+        # Ensure no member keeps streaming if we are cancelled or closed early
+        if not keep_late:
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+
+
+def format_stage1_result(model: str, response: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a provider response into a Stage 1 result dict (None if no response)."""
+    if response is None:
+        return None
+
+    if response.get('error'):
+        # Include failed models with error info
+        return {
+            "model": model,
+            "response": None,
+            "error": response.get('error'),
+            "error_message": response.get('error_message', 'Unknown error')
+        }
+
+    # Successful response - ensure content is always a string
+    content = response.get('content', '')
+    if not isinstance(content, str):
+        # Handle case where API returns non-string content (array, object, etc.)
+        content = str(content) if content is not None else ''
+    return {
+        "model": model,
+        "response": content,
+        "error": None
+    }
 
 
 async def stage2_collect_rankings(
     user_query: str,
     stage1_results: List[Dict[str, Any]],
     search_context: str = "",
-    request: Any = None
+    request: Any = None,
+    settings: Settings = None
 ) -> Any: # Returns an async generator
     """
     Stage 2: Collect peer rankings from all council models.
@@ -393,11 +563,15 @@ async def stage2_collect_rankings(
     Yields:
         - First yield: label_to_model mapping (dict)
         - Subsequent yields: Individual model results (dict)
+        - With STAGE2_EARLY_STOP: {"early_stop": {...}} once the remaining
+          rankers can no longer change the top-k order, after which the
+          outstanding ranking requests are cancelled
     """
-    settings = get_settings()
+    settings = settings or get_settings()
+    early_stop_config = get_stage2_early_stop_config()
 
     # Filter to only successful responses for ranking
-    successful_results = [r for r in stage1_results if not r.get('error')]
+    successful_results = [r for r in stage1_results if not r.get('error') and not r.get('late')]
 
     # Create anonymized labels for responses (Response A, Response B, etc.)
     labels = [chr(65 + i) for i in range(len(successful_results))]  # A, B, C, ...
@@ -457,6 +631,8 @@ async def stage2_collect_rankings(
 
     # Process as they complete
     pending = set(tasks)
+    collected = []
+    top_k = min(early_stop_config["top_k"], len(label_to_model))
     try:
         while pending:
             # Check for client disconnect
@@ -503,12 +679,28 @@ async def stage2_collect_rankings(
                             }
                     
                     if result:
+                        collected.append(result)
                         yield result
                 except asyncio.CancelledError:
                     raise
                 except Exception as e:
                     logger.error(f"Error processing task result: {e}")
 
+            # Stop early once the outcome can no longer change
+            if (early_stop_config["enabled"] and pending and top_k > 0
+                    and is_top_k_decided(collected, label_to_model, len(pending), top_k)):
+                skipped = []
+                for t in pending:
+                    t.cancel()
+                    skipped.append(successful_models[tasks.index(t)])
+                logger.info(f"Stage 2 top-{top_k} decided after {len(collected)} rankings; skipping {skipped}")
+                yield {"early_stop": {
+                    "top_k": top_k,
+                    "rankings_used": len(collected),
+                    "skipped": skipped
+                }}
+                return
+
     except asyncio.CancelledError:
         # Ensure all tasks are cancelled if we get cancelled
         for t in tasks:
@@ -521,7 +713,8 @@ async def stage3_synthesize_final(
     user_query: str,
     stage1_results: List[Dict[str, Any]],
     stage2_results: List[Dict[str, Any]],
-    search_context: str = ""
+    search_context: str = "",
+    settings: Settings = None
 ) -> Dict[str, Any]:
     """
     Stage 3: Chairman synthesizes final response.
@@ -534,7 +727,28 @@ async def stage3_synthesize_final(
     Returns:
         Dict with 'model' and 'response' keys
     """
-    settings = get_settings()
+    result = None
+    async for item in stage3_synthesize_final_stream(user_query, stage1_results, stage2_results, search_context, settings):
+        if "delta" not in item:
+            result = item
+    return result
+
+
+async def stage3_synthesize_final_stream(
+    user_query: str,
+    stage1_results: List[Dict[str, Any]],
+    stage2_results: List[Dict[str, Any]],
+    search_context: str = "",
+    settings: Settings = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stage 3, streamed: Chairman synthesizes final response token by token.
+
+    Yields:
+        - {"model", "delta"} chunks of display text (reasoning wrapped in <think>)
+        - Last yield: Dict with 'model' and 'response' keys, as stage3_synthesize_final
+    """
+    settings = settings or get_settings()
 
     # Build comprehensive context for chairman (only include successful responses)
     stage1_text = "\n\n".join([
@@ -587,39 +801,40 @@ async def stage3_synthesize_final(
         messages = [{"role": "user", "content": chairman_prompt}]
 
     # Query the chairman model with error handling
-    chairman_model = get_chairman_model()
+    chairman_model = get_chairman_model(settings)
     chairman_temp = settings.chairman_temperature
 
+    formatter = ThinkStreamFormatter()
     try:
-        response = await query_model(chairman_model, messages, temperature=chairman_temp)
+        response = None
+        async for chunk in query_model_stream(chairman_model, messages, temperature=chairman_temp):
+            if "delta" in chunk or "reasoning_delta" in chunk:
+                text = formatter.feed(chunk)
+                if text:
+                    yield {"model": chairman_model, "delta": text}
+            else:
+                response = chunk
+
+        closing = formatter.close()
+        if closing:
+            yield {"model": chairman_model, "delta": closing}
 
         # Check for error in response
         if response is None or response.get('error'):
             error_msg = response.get('error_message', 'Unknown error') if response else 'No response received'
-            return {
+            yield {
                 "model": chairman_model,
                 "response": f"Error synthesizing final answer: {error_msg}",
                 "error": True,
                 "error_message": error_msg
             }
+            return
 
-        # Combine reasoning and content if available
-        content = response.get('content') or ''
-        reasoning = response.get('reasoning') or response.get('reasoning_details') or ''
-        
-        final_response = content
-        if reasoning and not content:
-            # If only reasoning is provided (some reasoning models do this)
-            final_response = f"**Reasoning:**\n{reasoning}"
-        elif reasoning and content:
-            # If both are provided, prepend reasoning in a collapsible block or just prepend
-            # For now, we'll just prepend it clearly
-            final_response = f"<think>\n{reasoning}\n</think>\n\n{content}"
-
+        final_response = format_chairman_response(response)
         if not final_response:
              final_response = "No response generated by the Chairman."
 
-        return {
+        yield {
             "model": chairman_model,
             "response": final_response,
             "error": False
@@ -627,7 +842,7 @@ async def stage3_synthesize_final(
 
     except Exception as e:
         logger.error(f"Unexpected error in Stage 3 synthesis: {e}")
-        return {
+        yield {
             "model": chairman_model,
             "response": f"Error: Unable to generate final synthesis due to unexpected error.",
             "error": True,
@@ -635,6 +850,62 @@ async def stage3_synthesize_final(
         }
 
 
+def format_chairman_response(response: Dict[str, Any]) -> str:
+    """Combine a chairman response's reasoning and content into display text."""
+    content = response.get('content') or ''
+    reasoning = response.get('reasoning') or response.get('reasoning_details') or ''
+
+    # Same text ThinkStreamFormatter streams, so a reloaded message renders as it was streamed
+    final_response = content
+    if reasoning and not content:
+        # If only reasoning is provided (some reasoning models do this)
+        final_response = f"<think>\n{reasoning}\n</think>"
+    elif reasoning and content:
+        final_response = f"<think>\n{reasoning}\n</think>\n\n{content}"
+    return final_response
+
+
+class ThinkStreamFormatter:
+    """
+    Turns streamed reasoning/content chunks into display text incrementally.
+
+    Reasoning is wrapped in a <think> block that opens on the first reasoning
+    chunk and closes as soon as answer text starts, so the client can render
+    the collapsible block while it is still being generated. Models that emit
+    inline <think> tags in their content pass through unchanged.
+    """
+
+    def __init__(self):
+        self.in_think = False
+        self.content_started = False
+
+    def feed(self, chunk: Dict[str, Any]) -> str:
+        """Return the display text for one chunk (may be empty)."""
+        if "reasoning_delta" in chunk:
+            if self.content_started:
+                # Reasoning after the answer began cannot be shown in order; skip it
+                return ""
+            prefix = ""
+            if not self.in_think:
+                self.in_think = True
+                prefix = "<think>\n"
+            return prefix + chunk["reasoning_delta"]
+
+        self.content_started = True
+        prefix = ""
+        if self.in_think:
+            self.in_think = False
+            prefix = "\n</think>\n\n"
+        return prefix + chunk.get("delta", "")
+
+    def close(self) -> str:
+        """Return any text needed to close an unterminated <think> block."""
+        if self.in_think:
+            self.in_think = False
+            return "\n</think>"
+        return ""
+
+
 def parse_ranking_from_text(ranking_text: str, expected_count: int = None) -> List[str]:
     """
     Parse the FINAL RANKING section from the model's response.
@@ -681,20 +952,11 @@ def parse_ranking_from_text(ranking_text: str, expected_count: int = None) -> Li
     return matches
 
 
-def calculate_aggregate_rankings(
+def collect_ranking_positions(
     stage2_results: List[Dict[str, Any]],
     label_to_model: Dict[str, str]
-) -> List[Dict[str, Any]]:
-    """
-    Calculate aggregate rankings across all models.
-
-    Args:
-        stage2_results: Rankings from each model
-        label_to_model: Mapping from anonymous labels to model names
-
-    Returns:
-        List of dicts with model name and average rank, sorted best to worst
-    """
+) -> Dict[str, List[int]]:
+    """Map each model to the positions it was given across all rankings."""
     from collections import defaultdict
 
     # Track positions for each model
@@ -712,6 +974,68 @@ def calculate_aggregate_rankings(
                 model_name = label_to_model[label]
                 model_positions[model_name].append(position)
 
+    return model_positions
+
+
+def is_top_k_decided(
+    stage2_results: List[Dict[str, Any]],
+    label_to_model: Dict[str, str],
+    remaining: int,
+    top_k: int
+) -> bool:
+    """
+    Check whether the remaining rankers can still change the top-k order.
+
+    Each remaining ranker may place a model anywhere from 1 to N, or not rank
+    it at all, so a model's final average rank stays within bounds derived
+    from its current sum and count. The top-k order is decided when every
+    top-k model's worst case still beats the best case of every model ranked
+    after it (with a 0.01 margin for the rounding in calculate_aggregate_rankings).
+    """
+    n = len(label_to_model)
+    if remaining == 0:
+        return True
+    if n == 0:
+        return False
+
+    model_positions = collect_ranking_positions(stage2_results, label_to_model)
+    bounds = {}
+    for model in set(label_to_model.values()):
+        positions = model_positions.get(model, [])
+        if not positions:
+            # Unranked so far: could end anywhere
+            bounds[model] = (1.0, float(n), float(n))
+            continue
+        total, count = sum(positions), len(positions)
+        current = total / count
+        lower = min(current, (total + remaining) / (count + remaining))
+        upper = max(current, (total + remaining * n) / (count + remaining))
+        bounds[model] = (lower, upper, current)
+
+    order = sorted(bounds, key=lambda m: bounds[m][2])
+    for i, model in enumerate(order[:top_k]):
+        for other in order[i + 1:]:
+            if not bounds[model][1] < bounds[other][0] - 0.01:
+                return False
+    return True
+
+
+def calculate_aggregate_rankings(
+    stage2_results: List[Dict[str, Any]],
+    label_to_model: Dict[str, str]
+) -> List[Dict[str, Any]]:
+    """
+    Calculate aggregate rankings across all models.
+
+    Args:
+        stage2_results: Rankings from each model
+        label_to_model: Mapping from anonymous labels to model names
+
+    Returns:
+        List of dicts with model name and average rank, sorted best to worst
+    """
+    model_positions = collect_ranking_positions(stage2_results, label_to_model)
+
     # Calculate average position for each model
     aggregate = []
     for model, positions in model_positions.items():
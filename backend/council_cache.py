@@ -0,0 +1,302 @@
+"""
+Whole-council run memoization.
+
+A completed council run (stage 1-3 results plus ranking metadata) is stored
+under a fingerprint of everything that shapes the answer: council models,
+chairman, prompts, temperatures, search on/off, execution mode, strategy and
+active documents. A later question under the same fingerprint reuses the run
+if it is identical after normalization or a near-duplicate by MinHash
+similarity. Near-duplicate lookup uses a local LSH index over character
+shingles, so no external service is needed.
+
+Entries live in data/council_cache/: one JSON file per run plus
+index.jsonl holding the fingerprints and MinHash signatures. The index is
+a log: each store appends the new record (and a drop line for anything it
+evicts), and the file is rewritten only when dropped lines outnumber live
+records. The methods do file I/O; call them off the event loop.
+"""
+
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+import time
+import uuid
+from typing import Any, Dict, List, Optional, Set
+import logging
+
+from .config import get_council_cache_config
+
+logger = logging.getLogger(__name__)
+
+NUM_PERM = 64
+BANDS = 16
+ROWS = NUM_PERM // BANDS
+SHINGLE_SIZE = 4
+_PRIME = (1 << 61) - 1
+_rng = random.Random(1337)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(0, _PRIME)) for _ in range(NUM_PERM)]
+
+
+def normalize_question(text: str) -> str:
+    """Lowercase, drop punctuation and collapse whitespace."""
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
+
+
+def shingles(text: str) -> Set[str]:
+    """Character shingles of the normalized question."""
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def minhash(text: str) -> List[int]:
+    """MinHash signature of a normalized question."""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+        for s in shingles(text)
+    ]
+    return [min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS]
+
+
+def estimate_similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures."""
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def _band_keys(fingerprint: str, signature: List[int]) -> List[str]:
+    return [
+        f"{fingerprint}:{band}:" + ",".join(str(v) for v in signature[band * ROWS:(band + 1) * ROWS])
+        for band in range(BANDS)
+    ]
+
+
+def settings_fingerprint(settings: Any, web_search: bool, execution_mode: str, strategy: str) -> str:
+    """Hash of every setting that changes what the council would answer."""
+    try:
+        from .documents.manager import active_document_ids
+        active_docs = sorted(active_document_ids())
+    except Exception:
+        active_docs = []
+
+    from .config import get_council_models, get_chairman_model
+    payload = {
+        "council_models": get_council_models(settings),
+        "chairman_model": get_chairman_model(settings),
+        "stage1_prompt": settings.stage1_prompt,
+        "stage2_prompt": settings.stage2_prompt,
+        "stage3_prompt": settings.stage3_prompt,
+        "council_temperature": settings.council_temperature,
+        "chairman_temperature": settings.chairman_temperature,
+        "stage2_temperature": settings.stage2_temperature,
+        "web_search": web_search,
+        "search_provider": str(settings.search_provider) if web_search else None,
+        "execution_mode": execution_mode,
+        "strategy": strategy,
+        "active_documents": active_docs,
+        "document_context": [settings.document_context_mode, settings.document_top_k, settings.document_token_budget],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class CouncilCache:
+    """Persistent store of completed council runs with near-duplicate lookup."""
+
+    def __init__(self):
+        self.config = get_council_cache_config()
+        self.directory = self.config["cache_dir"]
+        self.index_path = os.path.join(self.directory, "index.jsonl")
+        self.legacy_index_path = os.path.join(self.directory, "index.json")
+        self._lock = threading.Lock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None  # id -> index record
+        self._log_lines = 0  # Lines in index.jsonl, live or not
+        self._bands: Dict[str, Set[str]] = {}
+        self._exact: Dict[str, str] = {}
+        self.counters = {"exact_hits": 0, "near_hits": 0, "misses": 0, "stores": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.config["enabled"]
+
+    def _load(self):
+        if self._entries is not None:
+            return
+        self._entries = {}
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue  # Torn last line of an interrupted append
+                    self._log_lines += 1
+                    if "drop" in record:
+                        self._entries.pop(record["drop"], None)
+                    else:
+                        self._entries[record["id"]] = record
+        elif os.path.exists(self.legacy_index_path):
+            # index.json from before the log format
+            try:
+                with open(self.legacy_index_path, "r", encoding="utf-8") as f:
+                    for record in json.load(f):
+                        self._entries[record["id"]] = record
+            except Exception as e:
+                logger.warning(f"Council cache index unreadable, starting empty: {e}")
+                self._entries = {}
+            self._compact()
+            os.remove(self.legacy_index_path)
+        for record in self._entries.values():
+            self._add_to_index(record)
+
+    def _add_to_index(self, record: Dict[str, Any]):
+        self._exact[f"{record['fingerprint']}:{record['question_hash']}"] = record["id"]
+        for key in _band_keys(record["fingerprint"], record["signature"]):
+            self._bands.setdefault(key, set()).add(record["id"])
+
+    def _remove_from_index(self, record: Dict[str, Any]):
+        self._exact.pop(f"{record['fingerprint']}:{record['question_hash']}", None)
+        for key in _band_keys(record["fingerprint"], record["signature"]):
+            ids = self._bands.get(key)
+            if ids:
+                ids.discard(record["id"])
+                if not ids:
+                    del self._bands[key]
+
+    def _append(self, *lines: Dict[str, Any]):
+        """Append index lines, compacting the log once most of it is dead."""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(self.index_path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(line) + "\n" for line in lines))
+        self._log_lines += len(lines)
+        if self._log_lines > 2 * len(self._entries) + 64:
+            self._compact()
+
+    def _compact(self):
+        """Rewrite the index with only the live records."""
+        os.makedirs(self.directory, exist_ok=True)
+        tmp_path = f"{self.index_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record) + "\n" for record in self._entries.values()))
+        os.replace(tmp_path, self.index_path)
+        self._log_lines = len(self._entries)
+
+    def _drop(self, entry_id: str) -> Dict[str, str]:
+        """Remove a run; returns the index line recording the drop."""
+        record = self._entries.pop(entry_id, None)
+        if record:
+            self._remove_from_index(record)
+        try:
+            os.remove(os.path.join(self.directory, f"{entry_id}.json"))
+        except OSError:
+            pass
+        return {"drop": entry_id}
+
+    def lookup(self, question: str, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """
+        Find a stored run for this question under the same settings.
+
+        Returns:
+            The stored run dict plus 'match' ('exact' or 'near') and
+            'similarity', or None.
+        """
+        if not self.enabled:
+            return None
+        normalized = normalize_question(question)
+        question_hash = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        now = time.time()
+
+        with self._lock:
+            self._load()
+            match, similarity = None, 0.0
+            entry_id = self._exact.get(f"{fingerprint}:{question_hash}")
+            if entry_id:
+                match, similarity = "exact", 1.0
+            else:
+                signature = minhash(normalized)
+                candidates = set()
+                for key in _band_keys(fingerprint, signature):
+                    candidates |= self._bands.get(key, set())
+                for candidate in candidates:
+                    score = estimate_similarity(signature, self._entries[candidate]["signature"])
+                    if score >= self.config["similarity"] and score > similarity:
+                        entry_id, match, similarity = candidate, "near", score
+
+            if entry_id and self._entries[entry_id]["created_at"] + self.config["ttl"] < now:
+                self._append(self._drop(entry_id))
+                entry_id = None
+
+            if not entry_id:
+                self.counters["misses"] += 1
+                return None
+
+            try:
+                with open(os.path.join(self.directory, f"{entry_id}.json"), "r", encoding="utf-8") as f:
+                    run = json.load(f)
+            except Exception as e:
+                logger.warning(f"Council cache entry {entry_id} unreadable: {e}")
+                self._append(self._drop(entry_id))
+                self.counters["misses"] += 1
+                return None
+
+        self.counters["exact_hits" if match == "exact" else "near_hits"] += 1
+        run["match"] = match
+        run["similarity"] = round(similarity, 3)
+        return run
+
+    def store(self, question: str, fingerprint: str, run: Dict[str, Any]):
+        """
+        Store a completed run.
+
+        Args:
+            question: The user's question
+            fingerprint: settings_fingerprint() for the run
+            run: Dict with stage1, stage2, stage3 and metadata
+        """
+        if not self.enabled:
+            return
+        normalized = normalize_question(question)
+        record = {
+            "id": str(uuid.uuid4()),
+            "fingerprint": fingerprint,
+            "question_hash": hashlib.sha256(normalized.encode("utf-8")).hexdigest(),
+            "signature": minhash(normalized),
+            "created_at": time.time(),
+        }
+
+        with self._lock:
+            self._load()
+            os.makedirs(self.directory, exist_ok=True)
+            lines = []
+            # An identical question replaces its older run
+            previous = self._exact.get(f"{fingerprint}:{record['question_hash']}")
+            if previous:
+                lines.append(self._drop(previous))
+
+            with open(os.path.join(self.directory, f"{record['id']}.json"), "w", encoding="utf-8") as f:
+                json.dump({"question": question, "created_at": record["created_at"], **run}, f)
+            self._entries[record["id"]] = record
+            self._add_to_index(record)
+            lines.append(record)
+
+            # Evict oldest runs past the size limit
+            overflow = len(self._entries) - self.config["max_entries"]
+            if overflow > 0:
+                oldest = sorted(self._entries.values(), key=lambda r: r["created_at"])[:overflow]
+                for old in oldest:
+                    lines.append(self._drop(old["id"]))
+            self._append(*lines)
+            self.counters["stores"] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            if self.enabled:
+                self._load()
+            entries = len(self._entries or {})
+        return {"enabled": self.enabled, "entries": entries, **self.counters}
+
+
+# Global singleton instance
+council_cache = CouncilCache()
@@ -10,3 +10,4 @@ from .manager import (
     get_active_documents_context,
     get_document_text
 )
+from .ingest import ingestor
@@ -0,0 +1,96 @@
+"""
+Background document ingestion.
+
+An upload only stores the original file and registers the document as
+"queued". A worker pool then extracts its text (PDF/DOCX/PPTX parsing can
+take seconds), chunks and indexes it (manager.ingest_document), so the
+event loop and the SSE streams it serves never wait on a parser.
+
+The job table has two parts. The status (queued, extracting, ready,
+failed) is kept in the registry, so it survives restarts and jobs
+interrupted by one are queued again at startup. Per-page progress is kept
+in memory while a job runs.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from ..config import get_document_config
+from .manager import PENDING_STATUSES, document_status, ingest_document, load_registry
+
+logger = logging.getLogger(__name__)
+
+
+class DocumentIngestor:
+    """Worker pool running document ingestion jobs, with their progress."""
+
+    def __init__(self):
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._progress: Dict[str, Dict[str, Any]] = {}  # doc_id -> {"done", "total"} of running jobs
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=get_document_config()["ingest_workers"],
+                    thread_name_prefix="document-ingest"
+                )
+            return self._executor
+
+    def submit(self, doc_id: str):
+        """Queue a registered document for extraction."""
+        self._get_executor().submit(self._run, doc_id)
+
+    def _report(self, doc_id: str, done: int, total: int):
+        with self._lock:
+            self._progress[doc_id] = {"done": done, "total": total}
+
+    def _run(self, doc_id: str):
+        try:
+            ingest_document(doc_id, lambda done, total: self._report(doc_id, done, total))
+        except Exception as e:
+            logger.error(f"Document ingestion failed for {doc_id}: {e}")
+        finally:
+            with self._lock:
+                self._progress.pop(doc_id, None)
+
+    def requeue_pending(self) -> int:
+        """Queue documents left queued or extracting by a previous run. Returns how many."""
+        pending = [doc_id for doc_id, meta in load_registry().items() if document_status(meta) in PENDING_STATUSES]
+        for doc_id in pending:
+            self.submit(doc_id)
+        if pending:
+            logger.info(f"Requeued {len(pending)} document(s) for ingestion")
+        return len(pending)
+
+    def status(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Ingestion status of a document.
+
+        Returns:
+            {"id", "status", "error", "progress": {"done", "total"} or None},
+            or None if there is no such document
+        """
+        meta = load_registry().get(doc_id)
+        if meta is None:
+            return None
+        status = document_status(meta)
+        progress = None
+        if status in PENDING_STATUSES:
+            with self._lock:
+                progress = self._progress.get(doc_id)
+        return {"id": doc_id, "status": status, "error": meta.get("error"), "progress": progress}
+
+    def shutdown(self):
+        """Stop the pool; queued and running jobs are picked up again at the next startup."""
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Global singleton instance
+ingestor = DocumentIngestor()
@@ -1,16 +1,31 @@
 """
 Document management module.
 Handles file storage, registry, and retrieval.
+
+The registry, extracted texts and chunk indexes are cached in memory. The
+registry is re-read only when registry.json's mtime changes; a document's
+text and index are read once and dropped when it is deleted or leaves the
+registry. Previews are stored in the registry, so listing documents reads
+no text files. With an unchanged document set, building a turn's document
+context costs one stat() of the registry file.
+
+Uploads are registered as "queued" and their text is extracted in the
+background (see ingest.py); a document is used as context only once its
+status is "ready".
 """
 
+import asyncio
 import os
 import json
+import threading
 import uuid
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Callable, Dict, List, Optional
 from pathlib import Path
 from ..config import get_document_config
+from ..settings import Settings, get_settings
 from .parser import extract_text
+from . import retrieval
 
 # Constants
 SUPPORTED_EXTENSIONS = {
@@ -27,6 +42,20 @@ SUPPORTED_EXTENSIONS = {
 }
 
 MAX_TEXT_LENGTH = 500 * 1024  # 500KB limit for extracted text
+PREVIEW_LENGTH = 200
+
+# Ingestion status of a document: queued -> extracting -> ready | failed
+DOCUMENT_STATUSES = ("queued", "extracting", "ready", "failed")
+PENDING_STATUSES = ("queued", "extracting")
+
+# Process-wide caches, keyed on (documents dir, doc id); the registry on its file's mtime
+_registry_cache: Optional[Dict[str, Dict]] = None
+_registry_cache_key: Optional[tuple] = None
+_text_cache: Dict[tuple, str] = {}
+_index_cache: Dict[tuple, Dict] = {}
+_documents_lock = threading.Lock()
+# Serializes read-modify-write updates of the registry (request handlers and ingestion workers)
+_registry_update_lock = threading.Lock()
 
 def _get_paths():
     config = get_document_config()
@@ -34,26 +63,83 @@ def _get_paths():
     registry_file = os.path.join(doc_dir, "registry.json")
     return doc_dir, registry_file
 
+def _index_path(doc_id: str) -> str:
+    doc_dir, _ = _get_paths()
+    return os.path.join(doc_dir, f"{doc_id}.bm25.json")
+
 def ensure_documents_dir() -> None:
     doc_dir, _ = _get_paths()
     os.makedirs(doc_dir, exist_ok=True)
 
-def load_registry() -> Dict[str, Dict]:
-    _, registry_file = _get_paths()
-    if not os.path.exists(registry_file):
-        return {}
+def _registry_key(registry_file: str) -> Optional[tuple]:
     try:
-        with open(registry_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Error loading registry: {e}")
-        return {}
+        return (registry_file, os.stat(registry_file).st_mtime_ns)
+    except OSError:
+        return None
+
+def _copy_registry(registry: Dict[str, Dict]) -> Dict[str, Dict]:
+    return {doc_id: dict(meta) for doc_id, meta in registry.items()}
+
+def _set_registry_cache(doc_dir: str, registry: Dict[str, Dict], key: Optional[tuple]):
+    """Cache a registry and drop cached texts/indexes of documents no longer in it. Call with the lock held."""
+    global _registry_cache, _registry_cache_key
+    _registry_cache = _copy_registry(registry)
+    _registry_cache_key = key
+    for cache in (_text_cache, _index_cache):
+        for cached in [k for k in cache if k[0] != doc_dir or k[1] not in registry]:
+            del cache[cached]
+
+def load_registry() -> Dict[str, Dict]:
+    """The document registry (a copy; change it and pass it to save_registry())."""
+    doc_dir, registry_file = _get_paths()
+    key = _registry_key(registry_file)
+    with _documents_lock:
+        if _registry_cache is not None and key is not None and key == _registry_cache_key:
+            return _copy_registry(_registry_cache)
+    if key is None:
+        registry = {}
+    else:
+        try:
+            with open(registry_file, 'r', encoding='utf-8') as f:
+                registry = json.load(f)
+        except Exception as e:
+            print(f"Error loading registry: {e}")
+            return {}
+    with _documents_lock:
+        _set_registry_cache(doc_dir, registry, key)
+    return _copy_registry(registry)
 
 def save_registry(registry: Dict[str, Dict]) -> None:
-    _, registry_file = _get_paths()
+    doc_dir, registry_file = _get_paths()
     ensure_documents_dir()
-    with open(registry_file, 'w', encoding='utf-8') as f:
-        json.dump(registry, f, indent=2, ensure_ascii=False)
+    with _documents_lock:
+        tmp_file = f"{registry_file}.tmp"
+        with open(tmp_file, 'w', encoding='utf-8') as f:
+            json.dump(registry, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_file, registry_file)
+        # Refresh the cache directly; coarse mtime resolution could hide the change
+        _set_registry_cache(doc_dir, registry, _registry_key(registry_file))
+
+def update_document(doc_id: str, **changes) -> Optional[Dict]:
+    """Change fields of a document's registry entry. Returns the entry, or None if there is no such document."""
+    with _registry_update_lock:
+        registry = load_registry()
+        if doc_id not in registry:
+            return None
+        registry[doc_id].update(changes)
+        save_registry(registry)
+        return registry[doc_id]
+
+def document_status(meta: Dict) -> str:
+    # Documents registered before background ingestion were extracted at upload
+    return meta.get("status", "ready")
+
+def _make_preview(text: Optional[str]) -> str:
+    if not text:
+        return "[No preview]"
+    preview = text[:PREVIEW_LENGTH].strip()
+    if len(text) > PREVIEW_LENGTH: preview += "..."
+    return preview
 
 async def save_document(file_content: bytes, filename: str) -> Dict:
     config = get_document_config()
@@ -64,112 +150,239 @@ async def save_document(file_content: bytes, filename: str) -> Dict:
     if extension not in SUPPORTED_EXTENSIONS:
         raise ValueError(f"Unsupported file type: {extension}")
 
-    ensure_documents_dir()
-    doc_dir, _ = _get_paths()
-    
     doc_id = str(uuid.uuid4())
-    original_file_path = os.path.join(doc_dir, f"{doc_id}{extension}")
-    text_file_path = os.path.join(doc_dir, f"{doc_id}.txt")
-
-    # Save original
-    with open(original_file_path, 'wb') as f:
-        f.write(file_content)
-
-    # Extract text
-    extracted_text = extract_text(original_file_path, extension)
-    
-    text_truncated = False
-    if len(extracted_text) > MAX_TEXT_LENGTH:
-        extracted_text = extracted_text[:MAX_TEXT_LENGTH] + "\n\n[... Text truncated ...]"
-        text_truncated = True
-
-    # Save text
-    with open(text_file_path, 'w', encoding='utf-8') as f:
-        f.write(extracted_text)
-
     metadata = {
         "id": doc_id,
         "filename": filename,
         "extension": extension,
         "size": len(file_content),
         "uploaded_at": datetime.utcnow().isoformat(),
-        "text_length": len(extracted_text),
-        "text_truncated": text_truncated,
+        "status": "queued",
         "is_active": True
     }
 
-    registry = load_registry()
-    registry[doc_id] = metadata
-    save_registry(registry)
-
+    # Save original off the event loop; the text is extracted in the
+    # background (ingest_document)
+    await asyncio.to_thread(_store_upload, file_content, metadata)
     return metadata
 
+def _store_upload(file_content: bytes, metadata: Dict):
+    ensure_documents_dir()
+    doc_dir, _ = _get_paths()
+    original_file_path = os.path.join(doc_dir, f"{metadata['id']}{metadata['extension']}")
+    with open(original_file_path, 'wb') as f:
+        f.write(file_content)
+
+    with _registry_update_lock:
+        registry = load_registry()
+        registry[metadata["id"]] = metadata
+        save_registry(registry)
+
+def ingest_document(doc_id: str, progress: Optional[Callable[[int, int], None]] = None) -> bool:
+    """
+    Extract, chunk and index an uploaded document, taking its status from
+    "queued" through "extracting" to "ready" (or "failed", with an error).
+    Runs on the ingestion worker pool.
+
+    Args:
+        doc_id: Document to ingest
+        progress: Called with (pages done, total pages) during extraction
+
+    Returns:
+        True if the document is ready
+    """
+    meta = update_document(doc_id, status="extracting", error=None)
+    if meta is None:
+        return False
+
+    doc_dir, _ = _get_paths()
+    original_file_path = os.path.join(doc_dir, f"{doc_id}{meta['extension']}")
+    text_file_path = os.path.join(doc_dir, f"{doc_id}.txt")
+    index_path = _index_path(doc_id)
+    try:
+        # Extract text
+        extracted_text = extract_text(original_file_path, meta["extension"], progress)
+
+        text_truncated = False
+        if len(extracted_text) > MAX_TEXT_LENGTH:
+            extracted_text = extracted_text[:MAX_TEXT_LENGTH] + "\n\n[... Text truncated ...]"
+            text_truncated = True
+
+        # Save text
+        with open(text_file_path, 'w', encoding='utf-8') as f:
+            f.write(extracted_text)
+
+        # Chunk and index it for retrieval
+        index = retrieval.build_index(extracted_text)
+        retrieval.write_index(index_path, index)
+    except Exception as e:
+        print(f"Error ingesting document {doc_id}: {e}")
+        update_document(doc_id, status="failed", error=str(e))
+        return False
+
+    meta = update_document(
+        doc_id,
+        status="ready",
+        text_length=len(extracted_text),
+        text_truncated=text_truncated,
+        chunks=len(index["chunks"]),
+        preview=_make_preview(extracted_text)
+    )
+    if meta is None:
+        # Deleted while it was being extracted
+        for path in (text_file_path, index_path):
+            if os.path.exists(path): os.remove(path)
+        return False
+
+    with _documents_lock:
+        _text_cache[(doc_dir, doc_id)] = extracted_text
+        _index_cache[(doc_dir, doc_id)] = index
+    return True
+
 def get_document_text(doc_id: str) -> Optional[str]:
     doc_dir, _ = _get_paths()
+    with _documents_lock:
+        text = _text_cache.get((doc_dir, doc_id))
+    if text is not None:
+        return text
     text_file_path = os.path.join(doc_dir, f"{doc_id}.txt")
     if not os.path.exists(text_file_path):
         return None
     try:
         with open(text_file_path, 'r', encoding='utf-8') as f:
-            return f.read()
+            text = f.read()
     except Exception:
         return None
+    with _documents_lock:
+        _text_cache[(doc_dir, doc_id)] = text
+    return text
+
+def get_document_index(doc_id: str, text: str) -> Dict:
+    """The document's BM25 chunk index, built (and saved) if missing or stale."""
+    doc_dir, _ = _get_paths()
+    with _documents_lock:
+        index = _index_cache.get((doc_dir, doc_id))
+    if index is not None and index["text_length"] == len(text):
+        return index
+    path = _index_path(doc_id)
+    index = retrieval.load_index(path, len(text))
+    if index is None:
+        index = retrieval.build_index(text)
+        try:
+            retrieval.write_index(path, index)
+        except OSError as e:
+            print(f"Error saving document index: {e}")
+    with _documents_lock:
+        _index_cache[(doc_dir, doc_id)] = index
+    return index
 
 def list_documents() -> List[Dict]:
     registry = load_registry()
-    docs = []
-    for doc_id, meta in registry.items():
-        doc = meta.copy()
-        text = get_document_text(doc_id)
-        if text:
-            preview = text[:200].strip()
-            if len(text) > 200: preview += "..."
-            doc["preview"] = preview
-        else:
-            doc["preview"] = "[No preview]"
-        docs.append(doc)
+    # Documents uploaded before previews were stored get theirs once
+    missing = [
+        doc_id for doc_id, meta in registry.items() if "preview" not in meta and document_status(meta) == "ready"
+    ]
+    if missing:
+        with _registry_update_lock:
+            registry = load_registry()
+            for doc_id in missing:
+                if doc_id in registry:
+                    registry[doc_id]["preview"] = _make_preview(get_document_text(doc_id))
+            save_registry(registry)
+    docs = list(registry.values())
     docs.sort(key=lambda x: x["uploaded_at"], reverse=True)
     return docs
 
 def delete_document(doc_id: str) -> bool:
-    registry = load_registry()
-    if doc_id not in registry:
-        return False
-    
-    meta = registry[doc_id]
+    with _registry_update_lock:
+        registry = load_registry()
+        if doc_id not in registry:
+            return False
+        meta = registry.pop(doc_id)
+        save_registry(registry)
+
     doc_dir, _ = _get_paths()
     
     orig_path = os.path.join(doc_dir, f"{doc_id}{meta['extension']}")
     text_path = os.path.join(doc_dir, f"{doc_id}.txt")
+    index_path = _index_path(doc_id)
     
     if os.path.exists(orig_path): os.remove(orig_path)
     if os.path.exists(text_path): os.remove(text_path)
-    
-    del registry[doc_id]
-    save_registry(registry)
+    if os.path.exists(index_path): os.remove(index_path)
     return True
 
 def toggle_document_active(doc_id: str, is_active: bool) -> bool:
-    registry = load_registry()
-    if doc_id not in registry:
-        return False
-    registry[doc_id]["is_active"] = is_active
-    save_registry(registry)
-    return True
+    return update_document(doc_id, is_active=is_active) is not None
+
+def active_document_ids() -> List[str]:
+    """Documents used as context: active and ready."""
+    return [
+        doc_id for doc_id, meta in load_registry().items()
+        if meta.get("is_active", True) and document_status(meta) == "ready"
+    ]
 
-def get_active_documents_context() -> str:
+def get_active_documents_context(query: Optional[str] = None, settings: Optional[Settings] = None) -> str:
+    """
+    Build the document context block for a prompt.
+
+    In "retrieval" mode (settings.document_context_mode) with a query, only
+    the chunks most relevant to the query are included, up to
+    document_top_k chunks and document_token_budget estimated tokens. In
+    "full" mode, without a query, or when all active documents fit in the
+    budget anyway, every document is included whole.
+    """
     registry = load_registry()
-    active_docs = [(doc_id, meta) for doc_id, meta in registry.items() if meta.get("is_active", True)]
+    active_docs = [
+        (doc_id, meta) for doc_id, meta in registry.items()
+        if meta.get("is_active", True) and document_status(meta) == "ready"
+    ]
     
     if not active_docs:
         return ""
-        
-    parts = ["=== UPLOADED DOCUMENTS ===\n"]
+
+    docs = []
     for doc_id, meta in active_docs:
         text = get_document_text(doc_id)
         if text:
-            parts.append(f"--- Document: {meta['filename']} ---")
-            parts.append(text)
-            parts.append("")
+            docs.append((doc_id, meta, text))
+
+    settings = settings or get_settings()
+    if (
+        query is None
+        or settings.document_context_mode == "full"
+        or sum(retrieval.estimate_tokens(text) for _, _, text in docs) <= settings.document_token_budget
+    ):
+        return _full_documents_context(docs)
+
+    selected = retrieval.select_chunks(
+        [(doc_id, get_document_index(doc_id, text)) for doc_id, _, text in docs],
+        query,
+        settings.document_top_k,
+        settings.document_token_budget
+    )
+    texts = {doc_id: (meta, text) for doc_id, meta, text in docs}
+    parts = ["=== UPLOADED DOCUMENTS (excerpts relevant to the question) ===\n"]
+    current = None
+    for doc_id, start, end in selected:
+        meta, text = texts[doc_id]
+        if doc_id != current:
+            if current is not None:
+                parts.append("")
+            parts.append(f"--- Document: {meta['filename']} (excerpts) ---")
+            current = doc_id
+        else:
+            parts.append("[...]")
+        parts.append(text[start:end].strip())
+    parts.append("")
+    parts.append("=== END DOCUMENTS ===")
+    return "\n".join(parts)
+
+def _full_documents_context(docs: List[tuple]) -> str:
+    parts = ["=== UPLOADED DOCUMENTS ===\n"]
+    for doc_id, meta, text in docs:
+        parts.append(f"--- Document: {meta['filename']} ---")
+        parts.append(text)
+        parts.append("")
     parts.append("=== END DOCUMENTS ===")
     return "\n".join(parts)
@@ -1,18 +1,28 @@
 """
 Document parsing module.
 Handles text extraction from various file formats.
+
+Extraction failures raise ExtractionError; whatever extract_text() returns
+is document content.
 """
 
 import os
-from typing import Optional
+from typing import Callable, Optional
+
+# Called with (pages done, total pages) as extraction proceeds
+ProgressCallback = Callable[[int, int], None]
+
+class ExtractionError(Exception):
+    """A file's text could not be extracted."""
 
-def extract_text_from_pdf(file_path: str) -> str:
+def extract_text_from_pdf(file_path: str, progress: Optional[ProgressCallback] = None) -> str:
     """Extract text from PDF file."""
     try:
         import PyPDF2
         text_parts = []
         with open(file_path, 'rb') as f:
             pdf_reader = PyPDF2.PdfReader(f)
+            total = len(pdf_reader.pages)
             for page_num, page in enumerate(pdf_reader.pages):
                 try:
                     page_text = page.extract_text()
@@ -20,11 +30,13 @@ def extract_text_from_pdf(file_path: str) -> str:
                         text_parts.append(f"--- Page {page_num + 1} ---\n{page_text}")
                 except Exception as e:
                     text_parts.append(f"--- Page {page_num + 1} ---\n[Error extracting page: {e}]")
+                if progress:
+                    progress(page_num + 1, total)
         return "\n\n".join(text_parts) if text_parts else "[No text content extracted from PDF]"
     except ImportError:
-        return "[Error: PyPDF2 not installed]"
+        raise ExtractionError("PyPDF2 not installed")
     except Exception as e:
-        return f"[Error extracting PDF: {str(e)}]"
+        raise ExtractionError(f"Error extracting PDF: {str(e)}")
 
 def extract_text_from_docx(file_path: str) -> str:
     """Extract text from DOCX file."""
@@ -34,16 +46,17 @@ def extract_text_from_docx(file_path: str) -> str:
         paragraphs = [para.text for para in doc.paragraphs if para.text.strip()]
         return "\n\n".join(paragraphs) if paragraphs else "[No text content extracted from DOCX]"
     except ImportError:
-        return "[Error: python-docx not installed]"
+        raise ExtractionError("python-docx not installed")
     except Exception as e:
-        return f"[Error extracting DOCX: {str(e)}]"
+        raise ExtractionError(f"Error extracting DOCX: {str(e)}")
 
-def extract_text_from_pptx(file_path: str) -> str:
+def extract_text_from_pptx(file_path: str, progress: Optional[ProgressCallback] = None) -> str:
     """Extract text from PPTX file."""
     try:
         from pptx import Presentation
         prs = Presentation(file_path)
         text_parts = []
+        total = len(prs.slides)
         for slide_num, slide in enumerate(prs.slides, start=1):
             slide_text = []
             for shape in slide.shapes:
@@ -51,11 +64,13 @@ def extract_text_from_pptx(file_path: str) -> str:
                     slide_text.append(shape.text)
             if slide_text:
                 text_parts.append(f"--- Slide {slide_num} ---\n" + "\n".join(slide_text))
+            if progress:
+                progress(slide_num, total)
         return "\n\n".join(text_parts) if text_parts else "[No text content extracted from PPTX]"
     except ImportError:
-        return "[Error: python-pptx not installed]"
+        raise ExtractionError("python-pptx not installed")
     except Exception as e:
-        return f"[Error extracting PPTX: {str(e)}]"
+        raise ExtractionError(f"Error extracting PPTX: {str(e)}")
 
 def extract_text_from_txt(file_path: str) -> str:
     """Extract text from plain text or markdown file."""
@@ -67,12 +82,22 @@ def extract_text_from_txt(file_path: str) -> str:
             with open(file_path, 'r', encoding='latin-1') as f:
                 return f.read()
         except Exception as e:
-            return f"[Error reading text file: {str(e)}]"
+            raise ExtractionError(f"Error reading text file: {str(e)}")
     except Exception as e:
-        return f"[Error reading text file: {str(e)}]"
+        raise ExtractionError(f"Error reading text file: {str(e)}")
+
+def extract_text(file_path: str, extension: str, progress: Optional[ProgressCallback] = None) -> str:
+    """
+    Route text extraction to appropriate handler.
+
+    Args:
+        file_path: The uploaded file
+        extension: Its extension (e.g. ".pdf")
+        progress: Called per page (PDF) or slide (PPTX) with (done, total)
 
-def extract_text(file_path: str, extension: str) -> str:
-    """Route text extraction to appropriate handler."""
+    Raises:
+        ExtractionError: If the file cannot be read or its type is unsupported
+    """
     extension = extension.lower()
     
     if extension in ['.png', '.jpg', '.jpeg', '.gif', '.webp']:
@@ -80,12 +105,12 @@ def extract_text(file_path: str, extension: str) -> str:
         return f"[Image file: {os.path.basename(file_path)} - {file_size} bytes. No OCR performed.]"
         
     if extension == '.pdf':
-        return extract_text_from_pdf(file_path)
+        return extract_text_from_pdf(file_path, progress)
     elif extension == '.docx':
         return extract_text_from_docx(file_path)
     elif extension == '.pptx':
-        return extract_text_from_pptx(file_path)
+        return extract_text_from_pptx(file_path, progress)
     elif extension in ['.txt', '.md']:
         return extract_text_from_txt(file_path)
     else:
-        return f"[Unsupported file type: {extension}]"
+        raise ExtractionError(f"Unsupported file type: {extension}")
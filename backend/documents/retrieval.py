@@ -0,0 +1,181 @@
+"""
+Chunked BM25 retrieval over uploaded documents.
+
+At upload the extracted text is split into chunks of about CHUNK_TOKENS
+tokens (on paragraph boundaries where possible) and a BM25 index of the
+chunks is written next to the text as {doc_id}.bm25.json. The index
+stores chunk offsets into the .txt file, not the chunk texts.
+
+At question time the best-scoring chunks across all active documents are
+selected up to top-k and a token budget, so each council member gets the
+passages relevant to the question instead of every document in full.
+"""
+
+import heapq
+import json
+import math
+import os
+import re
+from collections import Counter, defaultdict
+from typing import Any, Dict, List, Optional, Tuple
+
+INDEX_VERSION = 1
+CHARS_PER_TOKEN = 4  # Same rough estimate as rate_limit.estimate_tokens
+CHUNK_TOKENS = 300
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have how i in is it its of on or
+that the this to was were what when where which who why will with you your
+""".split())
+
+PARAGRAPH_BREAK = re.compile(r"\n\s*\n")
+
+
+def estimate_tokens(text: str) -> int:
+    return max(1, len(text) // CHARS_PER_TOKEN)
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word terms, without stopwords and single characters."""
+    return [w for w in re.findall(r"\w+", text.lower()) if len(w) > 1 and w not in STOPWORDS]
+
+
+def _paragraph_spans(text: str, max_chars: int) -> List[Tuple[int, int]]:
+    """(start, end) of each paragraph, with paragraphs longer than max_chars split at whitespace."""
+    spans = []
+    start = 0
+    for end, next_start in [(m.start(), m.end()) for m in PARAGRAPH_BREAK.finditer(text)] + [(len(text), len(text))]:
+        while end - start > max_chars:
+            cut = text.rfind(" ", start + max_chars // 2, start + max_chars)
+            if cut == -1:
+                cut = start + max_chars
+            spans.append((start, cut))
+            start = cut
+        if text[start:end].strip():
+            spans.append((start, end))
+        start = next_start
+    return spans
+
+
+def chunk_spans(text: str, chunk_tokens: int = CHUNK_TOKENS) -> List[Tuple[int, int]]:
+    """Split text into (start, end) chunks of about chunk_tokens, packing whole paragraphs."""
+    max_chars = chunk_tokens * CHARS_PER_TOKEN
+    chunks: List[Tuple[int, int]] = []
+    for start, end in _paragraph_spans(text, max_chars):
+        if chunks and end - chunks[-1][0] <= max_chars:
+            chunks[-1] = (chunks[-1][0], end)
+        else:
+            chunks.append((start, end))
+    return chunks
+
+
+def build_index(text: str) -> Dict[str, Any]:
+    """BM25 index of a document's chunks."""
+    chunks = chunk_spans(text)
+    lengths = []
+    postings: Dict[str, List[List[int]]] = defaultdict(list)
+    for i, (start, end) in enumerate(chunks):
+        terms = Counter(tokenize(text[start:end]))
+        lengths.append(sum(terms.values()))
+        for term, tf in terms.items():
+            postings[term].append([i, tf])
+    return {
+        "version": INDEX_VERSION,
+        "text_length": len(text),
+        "chunks": [list(span) for span in chunks],
+        "lengths": lengths,
+        "avgdl": (sum(lengths) / len(lengths)) if lengths else 0.0,
+        "postings": postings,
+    }
+
+
+def write_index(path: str, index: Dict[str, Any]):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, ensure_ascii=False, separators=(",", ":"))
+    os.replace(tmp_path, path)
+
+
+def load_index(path: str, text_length: int) -> Optional[Dict[str, Any]]:
+    """A stored index, or None if it is missing, unreadable or built from other text."""
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if index.get("version") != INDEX_VERSION or index.get("text_length") != text_length:
+        return None
+    return index
+
+
+def score_chunks(index: Dict[str, Any], terms: List[str]) -> Dict[int, float]:
+    """BM25 score of every chunk matching at least one query term."""
+    n = len(index["chunks"])
+    lengths = index["lengths"]
+    avgdl = index["avgdl"] or 1.0
+    scores: Dict[int, float] = defaultdict(float)
+    for term in set(terms):
+        postings = index["postings"].get(term)
+        if not postings:
+            continue
+        df = len(postings)
+        idf = math.log(1 + (n - df + 0.5) / (df + 0.5))
+        for i, tf in postings:
+            scores[i] += idf * tf * (K1 + 1) / (tf + K1 * (1 - B + B * lengths[i] / avgdl))
+    return scores
+
+
+def select_chunks(
+    documents: List[Tuple[str, Dict[str, Any]]],
+    query: str,
+    top_k: int,
+    token_budget: int
+) -> List[Tuple[str, int, int]]:
+    """
+    Pick the chunks to put in the prompt.
+
+    Args:
+        documents: (doc_id, index) of each active document
+        query: The user's question
+        top_k: Maximum number of chunks
+        token_budget: Maximum estimated tokens of all chunks together
+
+    Returns:
+        (doc_id, start, end) of the chosen chunks, in document order. If
+        nothing matches the query (e.g. "summarize this"), the opening
+        chunks of each document are used instead.
+    """
+    terms = tokenize(query)
+    candidates = []
+    for doc_id, index in documents:
+        for i, score in score_chunks(index, terms).items():
+            candidates.append((score, doc_id, i))
+    ranked = [(doc_id, i) for _, doc_id, i in heapq.nlargest(top_k * 4, candidates)]
+
+    if not ranked:
+        # Round-robin over the documents' first chunks
+        longest = max((len(index["chunks"]) for _, index in documents), default=0)
+        ranked = [
+            (doc_id, i) for i in range(longest) for doc_id, index in documents if i < len(index["chunks"])
+        ]
+
+    spans = {doc_id: index["chunks"] for doc_id, index in documents}
+    chosen = []
+    budget = token_budget
+    for doc_id, i in ranked:
+        start, end = spans[doc_id][i]
+        tokens = max(1, (end - start) // CHARS_PER_TOKEN)
+        if tokens > budget:
+            continue
+        chosen.append((doc_id, i))
+        budget -= tokens
+        if len(chosen) >= top_k:
+            break
+
+    order = {doc_id: n for n, (doc_id, _) in enumerate(documents)}
+    chosen.sort(key=lambda c: (order[c[0]], c[1]))
+    return [(doc_id, *spans[doc_id][i]) for doc_id, i in chosen]
@@ -0,0 +1,134 @@
+"""
+Hedged requests for slow council members.
+
+If a member has not answered within its latency threshold (a fixed number of
+seconds, or the p95 of its recent latencies), a duplicate request is sent to
+the same model or to a configured backup model. The first successful answer
+wins and the other request is cancelled.
+"""
+
+import asyncio
+import math
+import time
+from collections import defaultdict, deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, Tuple
+import logging
+
+from .config import get_hedge_config
+
+logger = logging.getLogger(__name__)
+
+
+class LatencyTracker:
+    """Keeps the most recent successful response latencies per model."""
+
+    def __init__(self, window: int = 100):
+        self.samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=window))
+
+    def record(self, model: str, seconds: float):
+        self.samples[model].append(seconds)
+
+    def percentile(self, model: str, pct: float) -> Optional[float]:
+        """Nearest-rank percentile, or None if the model has no samples."""
+        values = sorted(self.samples.get(model, ()))
+        if not values:
+            return None
+        rank = max(1, math.ceil(pct / 100.0 * len(values)))
+        return values[rank - 1]
+
+    def count(self, model: str) -> int:
+        return len(self.samples.get(model, ()))
+
+
+# Global singleton instance
+latency_tracker = LatencyTracker()
+
+
+def get_hedge_threshold(model: str, config: Dict[str, Any]) -> float:
+    """Seconds to wait for `model` before sending the hedge request."""
+    threshold = config["threshold"]
+    if threshold == "p95":
+        if latency_tracker.count(model) >= config["min_samples"]:
+            return max(config["min_delay"], latency_tracker.percentile(model, 95))
+        return config["fallback_seconds"]
+    return float(threshold)
+
+
+def _succeeded(task: asyncio.Task) -> bool:
+    if task.cancelled() or task.exception() is not None:
+        return False
+    result = task.result()
+    return bool(result) and not result.get("error")
+
+
+async def run_hedged(
+    model: str,
+    call: Callable[[str, bool], Awaitable[Dict[str, Any]]],
+    config: Optional[Dict[str, Any]] = None
+) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+    """
+    Run `call(model, is_primary)` with an optional hedge request.
+
+    Args:
+        model: The council member's model ID
+        call: Coroutine function performing one request and returning a
+              query()-style result dict; `is_primary` is False for the hedge
+        config: Hedge config (defaults to get_hedge_config())
+
+    Returns:
+        (result, hedge_info). hedge_info is None if no hedge was sent,
+        otherwise it records the threshold, backup model and which path won.
+    """
+    config = config or get_hedge_config()
+    start = time.monotonic()
+
+    async def _timed(model_id: str, is_primary: bool) -> Dict[str, Any]:
+        t0 = time.monotonic()
+        result = await call(model_id, is_primary)
+        # Cache hits (~0s) would drag the p95 down and trigger needless hedges
+        if result and not result.get("error") and not result.get("cached"):
+            latency_tracker.record(model_id, time.monotonic() - t0)
+        return result
+
+    if not config["enabled"]:
+        return await _timed(model, True), None
+
+    primary = asyncio.create_task(_timed(model, True))
+
+    threshold = get_hedge_threshold(model, config)
+    backup = None
+    try:
+        done, _ = await asyncio.wait({primary}, timeout=threshold)
+        if done:
+            return primary.result(), None
+
+        backup_model = config["backup_models"].get(model, model)
+        logger.info(f"Hedging {model} after {threshold:.1f}s with {backup_model}")
+        backup = asyncio.create_task(_timed(backup_model, False))
+
+        pending = {primary, backup}
+        winner = None
+        while pending and winner is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if _succeeded(task):
+                    winner = task
+                    break
+
+        # Neither succeeded: report the primary's outcome
+        if winner is None:
+            winner = primary
+        result = winner.result() if not winner.exception() else {"error": True, "error_message": str(winner.exception())}
+
+        return result, {
+            "hedged": True,
+            "threshold_seconds": round(threshold, 3),
+            "backup_model": backup_model,
+            "winner": "primary" if winner is primary else "backup",
+            "served_by": model if winner is primary else backup_model,
+            "latency_seconds": round(time.monotonic() - start, 3),
+        }
+    finally:
+        for task in (primary, backup):
+            if task is not None and not task.done():
+                task.cancel()
@@ -1,6 +1,6 @@
 """FastAPI backend for LLM Council."""
 
-from fastapi import FastAPI, HTTPException, Request
+from fastapi import FastAPI, HTTPException, Request, Response, Query
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
@@ -9,12 +9,16 @@ import os
 import uuid
 import json
 import asyncio
+import threading
+from datetime import datetime
 
 from . import storage
-from .council import generate_conversation_title, generate_search_query, stage1_collect_responses, stage2_collect_rankings, stage3_synthesize_final, calculate_aggregate_rankings, PROVIDERS
+from .council import generate_conversation_title, generate_search_query, stage1_collect_responses, stage2_collect_rankings, stage3_synthesize_final_stream, calculate_aggregate_rankings, LateArrivals, PROVIDERS
 from .search import perform_web_search, SearchProvider
+from .council_cache import council_cache, settings_fingerprint
 from .settings import get_settings, update_settings, Settings, DEFAULT_COUNCIL_MODELS, DEFAULT_CHAIRMAN_MODEL, AVAILABLE_MODELS
 from . import documents
+from . import transfer
 
 app = FastAPI(title="LLM Council Enhanced API")
 
@@ -25,6 +29,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
 @app.on_event("startup")
@@ -34,6 +39,17 @@ async def startup_event():
     from . import personalities
     
     init_database()
+
+    # Build the conversation search index in the background on first run
+    if storage.search_index.needs_rebuild():
+        threading.Thread(target=storage.rebuild_search_index, daemon=True).start()
+
+    # Resume document ingestion interrupted by a restart
+    documents.ingestor.requeue_pending()
+
+    # Open pooled HTTP clients for all LLM providers
+    for provider in PROVIDERS.values():
+        await provider.startup()
     
     # Initialize seed personalities if none exist
     if personalities.initialize_seed_personalities():
@@ -42,6 +58,18 @@ async def startup_event():
     print("LLM Council Enhanced API started successfully!")
 
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Release pooled resources on shutdown."""
+    for provider in PROVIDERS.values():
+        await provider.shutdown()
+
+    # Commit buffered turns, then let in-flight storage writes finish
+    storage.flush_all()
+    storage.aio.shutdown()
+    documents.ingestor.shutdown()
+
+
 class CreateConversationRequest(BaseModel):
     """Request to create a new conversation."""
     pass
@@ -77,38 +105,185 @@ async def health_check():
     return {"status": "ok", "service": "LLM Council API"}
 
 
+@app.get("/api/rate-limits")
+async def get_rate_limits():
+    """Per-provider admission stats: in-flight requests, queue depth and wait times."""
+    from .rate_limit import admission
+    return admission.stats()
+
+
+@app.get("/api/search/conversations")
+async def search_conversations(
+    q: str = Query(..., min_length=1),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0)
+):
+    """
+    Full-text search over conversation titles, questions, chairman answers
+    and Stage 1 responses. One result per conversation, best match first.
+    """
+    return await storage.aio.run(storage.search_index.search, q, limit, offset)
+
+
+@app.get("/api/cache/stats")
+async def get_cache_stats():
+    """Response cache hit/miss counters."""
+    from .response_cache import response_cache
+    return response_cache.stats()
+
+
+@app.get("/api/cache/council/stats")
+async def get_council_cache_stats():
+    """Whole-council result cache hit/miss counters."""
+    return await storage.aio.run(council_cache.stats)
+
+
+@app.get("/api/cache/conversations/stats")
+async def get_conversation_cache_stats():
+    """Hot-conversation cache size and hit/miss counters."""
+    return storage.conversation_cache.stats()
+
+
+@app.delete("/api/cache")
+async def clear_cache():
+    """Drop all cached LLM responses (memory and disk)."""
+    from .response_cache import response_cache
+    await response_cache.clear()
+    return {"status": "cleared"}
+
+
 @app.get("/api/conversations", response_model=List[ConversationMetadata])
-async def list_conversations():
-    """List all conversations (metadata only)."""
-    return storage.list_conversations()
+async def list_conversations(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    cursor: Optional[str] = None,
+    q: Optional[str] = None
+):
+    """
+    List conversations (metadata only), newest first.
+
+    Without parameters all conversations are returned. With `limit`, one page
+    is returned and the cursor for the next page is sent in the X-Next-Cursor
+    header (absent on the last page). `q` filters by title prefix.
+    """
+    if limit is None and cursor is None and not q:
+        return await storage.aio.list_conversations()
+    try:
+        items, next_cursor = await storage.aio.list_conversations_page(limit, cursor, q)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return items
 
 
 @app.post("/api/conversations", response_model=Conversation)
 async def create_conversation(request: CreateConversationRequest):
     """Create a new conversation."""
     conversation_id = str(uuid.uuid4())
-    conversation = storage.create_conversation(conversation_id)
+    conversation = await storage.aio.create_conversation(conversation_id)
     return conversation
 
 
+@app.get("/api/conversations/export")
+async def export_conversations(batch_size: int = Query(transfer.DEFAULT_BATCH_SIZE, ge=1, le=1000)):
+    """
+    Stream every conversation as an NDJSON archive (format in transfer.py).
+    Conversations are loaded one page at a time while the response streams.
+    """
+    filename = f"conversations-{datetime.utcnow():%Y%m%d-%H%M%S}.ndjson"
+    return StreamingResponse(
+        transfer.iter_export(batch_size),
+        media_type="application/x-ndjson",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+@app.post("/api/conversations/import")
+async def import_conversations(
+    request: Request,
+    on_conflict: str = Query("replace", pattern="^(replace|skip)$"),
+    batch_size: int = Query(transfer.DEFAULT_BATCH_SIZE, ge=1, le=1000)
+):
+    """
+    Import an NDJSON archive sent as the request body (gzip'd if sent with
+    Content-Encoding: gzip). The body is read and committed in batches;
+    existing conversations with the same IDs are replaced or skipped.
+    """
+    gzipped = request.headers.get("content-encoding", "").lower() == "gzip"
+    try:
+        return await transfer.import_stream(request.stream(), on_conflict, batch_size, gzipped)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
 @app.get("/api/conversations/{conversation_id}", response_model=Conversation)
-async def get_conversation(conversation_id: str):
-    """Get a specific conversation with all its messages."""
-    conversation = storage.get_conversation(conversation_id)
+async def get_conversation(conversation_id: str, view: str = Query("full", pattern="^(full|summary)$")):
+    """
+    Get a specific conversation with all its messages.
+
+    `view=summary` returns assistant messages without their stage details
+    (Stage 1 responses, Stage 2 rankings, metadata), each with a `summary`
+    instead; fetch a message's details from /messages/{index}.
+    """
+    conversation = await storage.aio.get_conversation(conversation_id, view)
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
     return conversation
 
 
+@app.get("/api/conversations/{conversation_id}/messages/{index}")
+async def get_conversation_message(conversation_id: str, index: int):
+    """Get one message of a conversation with all its stage details."""
+    if index < 0:
+        raise HTTPException(status_code=404, detail="Message not found")
+    messages = await storage.aio.get_messages(conversation_id, index, 1)
+    if messages is None:
+        raise HTTPException(status_code=404, detail="Conversation not found")
+    if not messages:
+        raise HTTPException(status_code=404, detail="Message not found")
+    return messages[0]
+
+
 @app.delete("/api/conversations/{conversation_id}")
 async def delete_conversation(conversation_id: str):
     """Delete a conversation."""
-    deleted = storage.delete_conversation(conversation_id)
+    deleted = await storage.aio.delete_conversation(conversation_id)
     if not deleted:
         raise HTTPException(status_code=404, detail="Conversation not found")
     return {"status": "deleted"}
 
 
+def cached_run_events(run: Dict[str, Any]) -> List[str]:
+    """SSE events replaying a stored council run, each flagged cached: true."""
+    def sse(payload: Dict[str, Any]) -> str:
+        return f"data: {json.dumps({**payload, 'cached': True})}\n\n"
+
+    stage1 = run.get("stage1") or []
+    stage2 = run.get("stage2")
+    stage3 = run.get("stage3")
+    metadata = run.get("metadata", {})
+
+    events = [sse({'type': 'council_cache_hit', 'data': {'match': run["match"], 'similarity': run["similarity"], 'question': run.get("question")}})]
+    events.append(sse({'type': 'stage1_start'}))
+    events.append(sse({'type': 'stage1_init', 'total': len(stage1)}))
+    for i, result in enumerate(stage1, start=1):
+        events.append(sse({'type': 'stage1_progress', 'data': result, 'count': i, 'total': len(stage1)}))
+    events.append(sse({'type': 'stage1_complete', 'data': stage1}))
+    if stage2 is not None:
+        events.append(sse({'type': 'stage2_start'}))
+        events.append(sse({'type': 'stage2_complete', 'data': stage2, 'metadata': {
+            'label_to_model': metadata.get('label_to_model', {}),
+            'aggregate_rankings': metadata.get('aggregate_rankings', []),
+            'search_query': metadata.get('search_query', ''),
+            'search_context': metadata.get('search_context', '')
+        }}))
+    if stage3 is not None:
+        events.append(sse({'type': 'stage3_start'}))
+        events.append(sse({'type': 'stage3_complete', 'data': stage3}))
+    return events
+
+
 @app.post("/api/conversations/{conversation_id}/message/stream")
 async def send_message_stream(conversation_id: str, body: SendMessageRequest, request: Request):
     """Send a message and stream the 3-stage council process."""
@@ -121,7 +296,7 @@ async def send_message_stream(conversation_id: str, body: SendMessageRequest, re
         )
     
     # Check if conversation exists
-    conversation = storage.get_conversation(conversation_id)
+    conversation = await storage.aio.get_conversation(conversation_id, "summary")
     if conversation is None:
         raise HTTPException(status_code=404, detail="Conversation not found")
 
@@ -136,15 +311,54 @@ async def send_message_stream(conversation_id: str, body: SendMessageRequest, re
             stage3_result = None
             label_to_model = {}
             aggregate_rankings = {}
+            late_arrivals = LateArrivals()
+            stage2_early_stop = None
+
+            # One immutable settings snapshot for the whole turn
+            request_settings = get_settings()
             
+            # Buffer this turn's writes and commit them together when it ends
+            storage.begin_turn(conversation_id)
+
             # Add user message
-            storage.add_user_message(conversation_id, body.content)
+            await storage.aio.add_user_message(conversation_id, body.content)
 
             # Start title generation in parallel (don't await yet)
             title_task = None
             if is_first_message:
                 title_task = asyncio.create_task(generate_conversation_title(body.content))
 
+            # Reuse a stored council run for a repeated question under the same settings
+            # (file I/O, so on the storage pool rather than the event loop)
+            run_fingerprint = None
+            if council_cache.enabled:
+                run_fingerprint = await storage.aio.run(
+                    settings_fingerprint, request_settings, body.web_search, body.execution_mode, body.strategy
+                )
+                cached_run = await storage.aio.run(council_cache.lookup, body.content, run_fingerprint)
+                if cached_run:
+                    for event in cached_run_events(cached_run):
+                        yield event
+                    metadata = {
+                        **cached_run.get("metadata", {}),
+                        "cached": True,
+                        "cache_match": cached_run["match"],
+                        "cache_similarity": cached_run["similarity"]
+                    }
+                    await storage.aio.add_assistant_message(
+                        conversation_id,
+                        cached_run.get("stage1") or [],
+                        cached_run.get("stage2"),
+                        cached_run.get("stage3"),
+                        metadata
+                    )
+                    if title_task:
+                        title = await title_task
+                        await storage.aio.update_conversation_title(conversation_id, title)
+                        yield f"data: {json.dumps({'type': 'title_complete', 'data': {'title': title}})}\n\n"
+                    yield f"data: {json.dumps({'type': 'complete'})}\n\n"
+                    return
+
             # Perform web search if requested
             search_context = ""
             search_query = ""
@@ -154,7 +368,7 @@ async def send_message_stream(conversation_id: str, body: SendMessageRequest, re
                     print("Client disconnected before web search")
                     raise asyncio.CancelledError("Client disconnected")
 
-                settings = get_settings()
+                settings = request_settings
                 provider = SearchProvider(settings.search_provider)
 
                 # Set API keys if configured
@@ -208,18 +422,29 @@ async def send_message_stream(conversation_id: str, body: SendMessageRequest, re
                     classification_result["confidence"] >= classification_config["confidence_threshold"]):
                     # Direct answer from chairman
                     from .config import get_chairman_model
-                    from .council import query_model
-                    chairman_model = get_chairman_model()
+                    from .council import query_model_stream, ThinkStreamFormatter, format_chairman_response
+                    chairman_model = get_chairman_model(request_settings)
                     
                     yield f"data: {json.dumps({'type': 'direct_answer_start'})}\n\n"
-                    direct_response = await query_model(
+                    direct_response = None
+                    formatter = ThinkStreamFormatter()
+                    async for chunk in query_model_stream(
                         chairman_model,
                         [{"role": "user", "content": body.content}],
                         temperature=0.7
-                    )
+                    ):
+                        if "delta" in chunk or "reasoning_delta" in chunk:
+                            text = formatter.feed(chunk)
+                            if text:
+                                yield f"data: {json.dumps({'type': 'direct_answer_delta', 'data': {'model': chairman_model, 'delta': text}})}\n\n"
+                        else:
+                            direct_response = chunk
+                    closing = formatter.close()
+                    if closing:
+                        yield f"data: {json.dumps({'type': 'direct_answer_delta', 'data': {'model': chairman_model, 'delta': closing}})}\n\n"
                     
                     if direct_response and not direct_response.get('error'):
-                        direct_answer = direct_response.get('content', '')
+                        direct_answer = format_chairman_response(direct_response)
                         stage3_result = {
                             "model": chairman_model,
                             "response": direct_answer,
@@ -232,7 +457,7 @@ async def send_message_stream(conversation_id: str, body: SendMessageRequest, re
                             "classification": classification_result,
                             "direct_answer": True
                         }
-                        storage.add_assistant_message(
+                        await storage.aio.add_assistant_message(
                             conversation_id,
                             [],
                             None,
@@ -242,7 +467,7 @@ async def send_message_stream(conversation_id: str, body: SendMessageRequest, re
                         
                         if title_task:
                             title = await title_task
-                            storage.update_conversation_title(conversation_id, title)
+                            await storage.aio.update_conversation_title(conversation_id, title)
                             yield f"data: {json.dumps({'type': 'title_complete', 'data': {'title': title}})}\n\n"
                         
                         yield f"data: {json.dumps({'type': 'complete'})}\n\n"
@@ -250,7 +475,6 @@ async def send_message_stream(conversation_id: str, body: SendMessageRequest, re
             
             # Check for multi-round strategy
             from .config import get_strategy_config, get_council_models
-            from .settings import get_settings as get_settings_obj
             strategy_config = get_strategy_config()
             strategy_type = body.__dict__.get('strategy', strategy_config['default_strategy'])
             multi_round = strategy_type == "multi_round"
@@ -261,14 +485,15 @@ async def send_message_stream(conversation_id: str, body: SendMessageRequest, re
             
             total_models = 0
             all_rounds = []  # Track all rounds for multi-round
+            stage1_quorum = None
             
             if multi_round and body.execution_mode == "full":
                 # Multi-round deliberation
                 from .multi_round import run_multi_round
                 from .council import query_model
                 
-                settings_obj = get_settings_obj()
-                council_models = get_council_models()
+                settings_obj = request_settings
+                council_models = get_council_models(settings_obj)
                 rounds = strategy_config.get('multi_round_rounds', 2)
                 
                 yield f"data: {json.dumps({'type': 'multi_round_start', 'total_rounds': rounds})}\n\n"
@@ -290,12 +515,23 @@ async def send_message_stream(conversation_id: str, body: SendMessageRequest, re
                 yield f"data: {json.dumps({'type': 'multi_round_complete', 'data': all_rounds})}\n\n"
             else:
                 # Standard single-round
-                async for item in stage1_collect_responses(body.content, search_context, request):
+                async for item in stage1_collect_responses(body.content, search_context, request, late_arrivals, request_settings):
                     if isinstance(item, int):
                         total_models = item
                         print(f"DEBUG: Sending stage1_init with total={total_models}")
                         yield f"data: {json.dumps({'type': 'stage1_init', 'total': total_models})}\n\n"
                         continue
+
+                    if "delta" in item:
+                        # Incremental tokens from a council member
+                        yield f"data: {json.dumps({'type': 'stage1_delta', 'data': item})}\n\n"
+                        continue
+
+                    if "quorum" in item:
+                        # Stage 1 ended early; tell the client which members were dropped
+                        stage1_quorum = item["quorum"]
+                        yield f"data: {json.dumps({'type': 'stage1_quorum', 'data': stage1_quorum})}\n\n"
+                        continue
                     
                     stage1_results.append(item)
                     yield f"data: {json.dumps({'type': 'stage1_progress', 'data': item, 'count': len(stage1_results), 'total': total_models})}\n\n"
@@ -307,7 +543,7 @@ async def send_message_stream(conversation_id: str, body: SendMessageRequest, re
             # Check if any models responded successfully in Stage 1
             if not any(r for r in stage1_results if not r.get('error')):
                 error_msg = 'All models failed to respond in Stage 1, likely due to rate limits or API errors. Please try again or adjust your model selection.'
-                storage.add_error_message(conversation_id, error_msg)
+                await storage.aio.add_error_message(conversation_id, error_msg)
                 yield f"data: {json.dumps({'type': 'error', 'message': error_msg})}\n\n"
                 return # Stop further processing
 
@@ -317,7 +553,13 @@ async def send_message_stream(conversation_id: str, body: SendMessageRequest, re
                 await asyncio.sleep(0.05)
                 
                 # Iterate over the async generator
-                async for item in stage2_collect_rankings(body.content, stage1_results, search_context, request):
+                async for item in stage2_collect_rankings(body.content, stage1_results, search_context, request, request_settings):
+                    if "early_stop" in item:
+                        # Remaining rankers could not change the outcome
+                        stage2_early_stop = item["early_stop"]
+                        yield f"data: {json.dumps({'type': 'stage2_early_stop', 'data': stage2_early_stop})}\n\n"
+                        continue
+
                     # First item is the label mapping
                     if isinstance(item, dict) and not item.get('model'):
                         label_to_model = item
@@ -331,6 +573,10 @@ async def send_message_stream(conversation_id: str, body: SendMessageRequest, re
                     # Send progress update
                     print(f"Stage 2 Progress: {len(stage2_results)}/{len(label_to_model)} - {item['model']}")
                     yield f"data: {json.dumps({'type': 'stage2_progress', 'data': item, 'count': len(stage2_results), 'total': len(label_to_model)})}\n\n"
+
+                    # Provisional aggregate from the rankings received so far
+                    provisional = calculate_aggregate_rankings(stage2_results, label_to_model)
+                    yield f"data: {json.dumps({'type': 'stage2_provisional', 'data': provisional, 'count': len(stage2_results), 'total': len(label_to_model)})}\n\n"
                     await asyncio.sleep(0.01)
 
                 aggregate_rankings = calculate_aggregate_rankings(stage2_results, label_to_model)
@@ -347,14 +593,18 @@ async def send_message_stream(conversation_id: str, body: SendMessageRequest, re
                     print("Client disconnected before Stage 3")
                     raise asyncio.CancelledError("Client disconnected")
 
-                stage3_result = await stage3_synthesize_final(body.content, stage1_results, stage2_results, search_context)
+                async for item in stage3_synthesize_final_stream(body.content, stage1_results, stage2_results, search_context, request_settings):
+                    if "delta" in item:
+                        yield f"data: {json.dumps({'type': 'stage3_delta', 'data': item})}\n\n"
+                    else:
+                        stage3_result = item
                 yield f"data: {json.dumps({'type': 'stage3_complete', 'data': stage3_result})}\n\n"
 
             # Wait for title generation if it was started
             if title_task:
                 try:
                     title = await title_task
-                    storage.update_conversation_title(conversation_id, title)
+                    await storage.aio.update_conversation_title(conversation_id, title)
                     yield f"data: {json.dumps({'type': 'title_complete', 'data': {'title': title}})}\n\n"
                 except Exception as e:
                     print(f"Error waiting for title task: {e}")
@@ -368,13 +618,25 @@ async def send_message_stream(conversation_id: str, body: SendMessageRequest, re
             if body.execution_mode in ["chat_ranking", "full"]:
                 metadata["label_to_model"] = label_to_model
                 metadata["aggregate_rankings"] = aggregate_rankings
+                if stage2_early_stop:
+                    metadata["stage2_early_stop"] = stage2_early_stop
             
+            if stage1_quorum:
+                metadata["stage1_quorum"] = stage1_quorum
+            # Late arrivals are stored with the message but were not ranked
+            stage1_results.extend(late_arrivals.collect())
+
+            # Record which path served each hedged Stage 1 member
+            hedging = {r["model"]: r["hedge"] for r in stage1_results if r.get("hedge")}
+            if hedging:
+                metadata["hedging"] = hedging
+
             if search_context:
                 metadata["search_context"] = search_context
             if search_query:
                 metadata["search_query"] = search_query
 
-            storage.add_assistant_message(
+            await storage.aio.add_assistant_message(
                 conversation_id,
                 stage1_results,
                 stage2_results if body.execution_mode in ["chat_ranking", "full"] else None,
@@ -382,27 +644,47 @@ async def send_message_stream(conversation_id: str, body: SendMessageRequest, re
                 metadata
             )
 
+            # Remember the completed run so repeats can be answered from the cache
+            if run_fingerprint and not (stage3_result and stage3_result.get("error")):
+                try:
+                    await storage.aio.run(council_cache.store, body.content, run_fingerprint, {
+                        "stage1": [r for r in stage1_results if not r.get("late")],
+                        "stage2": stage2_results if body.execution_mode in ["chat_ranking", "full"] else None,
+                        "stage3": stage3_result if body.execution_mode == "full" else None,
+                        "metadata": metadata
+                    })
+                except Exception as e:
+                    print(f"Could not store council run in cache: {e}")
+
             # Send completion event
             yield f"data: {json.dumps({'type': 'complete'})}\n\n"
 
         except asyncio.CancelledError:
             print(f"Stream cancelled for conversation {conversation_id}")
+            late_arrivals.collect()  # Stop any members still running after a quorum
             # Even if cancelled, try to save the title if it's ready or nearly ready
             if title_task:
                 try:
                     # Give it a small grace period to finish if it's close
                     title = await asyncio.wait_for(title_task, timeout=2.0)
-                    storage.update_conversation_title(conversation_id, title)
+                    await storage.aio.update_conversation_title(conversation_id, title)
                     print(f"Saved title despite cancellation: {title}")
                 except Exception as e:
                     print(f"Could not save title during cancellation: {e}")
             raise
         except Exception as e:
             print(f"Stream error: {e}")
+            late_arrivals.collect()
             # Save error to conversation history
-            storage.add_error_message(conversation_id, f"Error: {str(e)}")
+            await storage.aio.add_error_message(conversation_id, f"Error: {str(e)}")
             # Send error event
             yield f"data: {json.dumps({'type': 'error', 'message': str(e)})}\n\n"
+        finally:
+            # Shielded so a client disconnect cannot drop the turn's writes
+            try:
+                await asyncio.shield(storage.aio.end_turn(conversation_id))
+            except Exception as e:
+                print(f"Could not save turn for conversation {conversation_id}: {e}")
 
     return StreamingResponse(
         event_generator(),
@@ -458,6 +740,11 @@ class UpdateSettingsRequest(BaseModel):
     # Execution Mode
     execution_mode: Optional[str] = None
 
+    # Uploaded documents in Stage 1 prompts
+    document_context_mode: Optional[str] = None
+    document_top_k: Optional[int] = None
+    document_token_budget: Optional[int] = None
+
     # System Prompts
     stage1_prompt: Optional[str] = None
     stage2_prompt: Optional[str] = None
@@ -479,6 +766,9 @@ async def get_app_settings():
         "search_keyword_extraction": settings.search_keyword_extraction,
         "ollama_base_url": settings.ollama_base_url,
         "full_content_results": settings.full_content_results,
+        "document_context_mode": settings.document_context_mode,
+        "document_top_k": settings.document_top_k,
+        "document_token_budget": settings.document_token_budget,
 
         # Custom Endpoint
         "custom_endpoint_name": settings.custom_endpoint_name,
@@ -588,6 +878,29 @@ async def update_app_settings(request: UpdateSettingsRequest):
             )
         updates["full_content_results"] = request.full_content_results
 
+    # Document context
+    if request.document_context_mode is not None:
+        if request.document_context_mode not in ["retrieval", "full"]:
+            raise HTTPException(
+                status_code=400,
+                detail="Invalid document_context_mode. Must be 'retrieval' or 'full'"
+            )
+        updates["document_context_mode"] = request.document_context_mode
+    if request.document_top_k is not None:
+        if request.document_top_k < 1 or request.document_top_k > 50:
+            raise HTTPException(
+                status_code=400,
+                detail="document_top_k must be between 1 and 50"
+            )
+        updates["document_top_k"] = request.document_top_k
+    if request.document_token_budget is not None:
+        if request.document_token_budget < 500 or request.document_token_budget > 100000:
+            raise HTTPException(
+                status_code=400,
+                detail="document_token_budget must be between 500 and 100000"
+            )
+        updates["document_token_budget"] = request.document_token_budget
+
     # Prompt updates
     if request.stage1_prompt is not None:
         updates["stage1_prompt"] = request.stage1_prompt
@@ -686,6 +999,9 @@ async def update_app_settings(request: UpdateSettingsRequest):
         "search_keyword_extraction": settings.search_keyword_extraction,
         "ollama_base_url": settings.ollama_base_url,
         "full_content_results": settings.full_content_results,
+        "document_context_mode": settings.document_context_mode,
+        "document_top_k": settings.document_top_k,
+        "document_token_budget": settings.document_token_budget,
 
         # Custom Endpoint
         "custom_endpoint_name": settings.custom_endpoint_name,
@@ -910,12 +1226,19 @@ async def get_ollama_tags(base_url: Optional[str] = None):
 
 @app.post("/api/documents/upload")
 async def upload_document(file: bytes = None, filename: str = None):
-    """Upload a document for context."""
+    """
+    Upload a document for context.
+
+    Returns as soon as the file is stored, with status "queued"; its text is
+    extracted in the background. Follow it with /api/documents/{doc_id}/status
+    (or /status/stream); the document is used as context once "ready".
+    """
     if not file or not filename:
         raise HTTPException(status_code=400, detail="File and filename required")
     
     try:
         metadata = await documents.save_document(file, filename)
+        documents.ingestor.submit(metadata["id"])
         return metadata
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e))
@@ -927,6 +1250,43 @@ async def list_uploaded_documents():
     """List all uploaded documents."""
     return documents.list_documents()
 
+@app.get("/api/documents/{doc_id}/status")
+async def get_document_status(doc_id: str):
+    """Ingestion status of a document (queued, extracting, ready, failed) with page progress."""
+    status = documents.ingestor.status(doc_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    return status
+
+@app.get("/api/documents/{doc_id}/status/stream")
+async def stream_document_status(doc_id: str, request: Request):
+    """Server-sent events with a document's ingestion status on every change, until ready or failed."""
+    if documents.ingestor.status(doc_id) is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+
+    async def event_generator():
+        last = None
+        while not await request.is_disconnected():
+            status = documents.ingestor.status(doc_id)
+            if status is None:
+                yield f"data: {json.dumps({'id': doc_id, 'status': 'deleted'})}\n\n"
+                return
+            if status != last:
+                yield f"data: {json.dumps(status)}\n\n"
+                last = status
+            if status["status"] in ("ready", "failed"):
+                return
+            await asyncio.sleep(0.25)
+
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "Connection": "keep-alive",
+        }
+    )
+
 @app.delete("/api/documents/{doc_id}")
 async def delete_uploaded_document(doc_id: str):
     """Delete a document."""
@@ -1073,23 +1433,20 @@ class TestCustomEndpointRequest(BaseModel):
 @app.post("/api/settings/test-custom-endpoint")
 async def test_custom_endpoint(request: TestCustomEndpointRequest):
     """Test connection to a custom OpenAI-compatible endpoint."""
-    from .providers.custom_openai import CustomOpenAIProvider
-
-    provider = CustomOpenAIProvider()
+    provider = PROVIDERS["custom"]
     return await provider.validate_connection(request.url, request.api_key or "")
 
 
 @app.get("/api/custom-endpoint/models")
 async def get_custom_endpoint_models():
     """Fetch available models from the custom endpoint."""
-    from .providers.custom_openai import CustomOpenAIProvider
     from .settings import get_settings
 
     settings = get_settings()
     if not settings.custom_endpoint_url:
         return {"models": [], "error": "No custom endpoint configured"}
 
-    provider = CustomOpenAIProvider()
+    provider = PROVIDERS["custom"]
     models = await provider.get_models()
     return {"models": models}
 
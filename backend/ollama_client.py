@@ -1,9 +1,12 @@
 """Ollama API client for making LLM requests."""
 
 import asyncio
+import json
 import httpx
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 from .config import get_ollama_base_url
+from .providers.base import client_scope
+from .providers.streaming import read_error_body
 
 # Retry configuration
 MAX_RETRIES = 2
@@ -14,7 +17,8 @@ async def query_model(
     model: str,
     messages: List[Dict[str, str]],
     timeout: float = 120.0,
-    temperature: float = 0.7
+    temperature: float = 0.7,
+    client: Optional[httpx.AsyncClient] = None
 ) -> Optional[Dict[str, Any]]:
     """
     Query a single model via Ollama API.
@@ -24,6 +28,7 @@ async def query_model(
         messages: List of message dicts with 'role' and 'content'
         timeout: Request timeout in seconds
         temperature: Model temperature
+        client: Pooled HTTP client to reuse (a short-lived one is created if omitted)
 
     Returns:
         Response dict with 'content' and 'error' if failed
@@ -48,9 +53,10 @@ async def query_model(
 
     for attempt in range(MAX_RETRIES):
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.post(
+            async with client_scope(client, timeout) as http_client:
+                response = await http_client.post(
                     api_url,
+                    timeout=timeout,
                     json=payload
                 )
 
@@ -92,6 +98,87 @@ async def query_model(
     }
 
 
+async def query_model_stream(
+    model: str,
+    messages: List[Dict[str, str]],
+    timeout: float = 120.0,
+    temperature: float = 0.7,
+    client: Optional[httpx.AsyncClient] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a single model's answer via the Ollama chat API (NDJSON).
+
+    Args:
+        model: Ollama model identifier (e.g., "llama3")
+        messages: List of message dicts with 'role' and 'content'
+        timeout: Request timeout in seconds
+        temperature: Model temperature
+        client: Pooled HTTP client to reuse (a short-lived one is created if omitted)
+
+    Yields:
+        Delta dicts, then a final result dict (see providers.streaming)
+    """
+    base_url = get_ollama_base_url()
+    if base_url.endswith('/'):
+        base_url = base_url[:-1]
+
+    payload = {
+        "model": model,
+        "messages": messages,
+        "stream": True,
+        "options": {
+            "temperature": temperature
+        }
+    }
+
+    content_parts = []
+    try:
+        async with client_scope(client, timeout) as http_client:
+            async with http_client.stream("POST", f"{base_url}/api/chat", timeout=timeout, json=payload) as response:
+                if response.status_code != 200:
+                    body = await read_error_body(response)
+                    yield {
+                        'content': None,
+                        'error': f"http_{response.status_code}",
+                        'error_message': f"Ollama API error: {response.status_code} - {body}"
+                    }
+                    return
+
+                async for line in response.aiter_lines():
+                    if not line.strip():
+                        continue
+                    try:
+                        chunk = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+
+                    if chunk.get("error"):
+                        yield {'content': None, 'error': chunk["error"], 'error_message': f"Error: {chunk['error']}"}
+                        return
+
+                    text = chunk.get("message", {}).get("content", "")
+                    if text:
+                        content_parts.append(text)
+                        yield {"delta": text}
+                    if chunk.get("done"):
+                        break
+
+    except httpx.ConnectError:
+        print(f"Connection error querying Ollama at {base_url}")
+        yield {'content': None, 'error': "connection_error", 'error_message': "Could not connect to Ollama. Is it running?"}
+        return
+    except httpx.TimeoutException:
+        print(f"Timeout querying Ollama model {model}")
+        yield {'content': None, 'error': "timeout", 'error_message': "Request timed out"}
+        return
+    except Exception as e:
+        print(f"Error querying Ollama model {model}: {e}")
+        yield {'content': None, 'error': str(e), 'error_message': f"Error: {e}"}
+        return
+
+    yield {'content': "".join(content_parts), 'error': None}
+
+
 async def query_models_parallel(
     models: List[str],
     messages: List[Dict[str, str]]
@@ -2,8 +2,10 @@
 
 import asyncio
 import httpx
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, AsyncIterator
 from .config import get_openrouter_api_key, OPENROUTER_API_URL
+from .providers.base import client_scope
+from .providers.streaming import stream_chat_completions
 
 # Retry configuration
 MAX_RETRIES = 2
@@ -14,7 +16,8 @@ async def query_model(
     model: str,
     messages: List[Dict[str, str]],
     timeout: float = 120.0,
-    temperature: float = 0.7
+    temperature: float = 0.7,
+    client: Optional[httpx.AsyncClient] = None
 ) -> Optional[Dict[str, Any]]:
     """
     Query a single model via OpenRouter API with retry logic for rate limits.
@@ -24,6 +27,7 @@ async def query_model(
         messages: List of message dicts with 'role' and 'content'
         timeout: Request timeout in seconds
         temperature: Model temperature
+        client: Pooled HTTP client to reuse (a short-lived one is created if omitted)
 
     Returns:
         Response dict with 'content', optional 'reasoning_details', and 'error' if failed
@@ -44,9 +48,10 @@ async def query_model(
 
     for attempt in range(MAX_RETRIES):
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.post(
+            async with client_scope(client, timeout) as http_client:
+                response = await http_client.post(
                     OPENROUTER_API_URL,
+                    timeout=timeout,
                     headers=headers,
                     json=payload
                 )
@@ -116,6 +121,64 @@ async def query_model(
     }
 
 
+async def query_model_stream(
+    model: str,
+    messages: List[Dict[str, str]],
+    timeout: float = 120.0,
+    temperature: float = 0.7,
+    client: Optional[httpx.AsyncClient] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream a single model's answer via OpenRouter.
+
+    Rate-limited (429) requests are retried like query_model; this is safe
+    because a 429 arrives before any tokens have been streamed.
+
+    Args:
+        model: OpenRouter model identifier (e.g., "openai/gpt-4o")
+        messages: List of message dicts with 'role' and 'content'
+        timeout: Request timeout in seconds
+        temperature: Model temperature
+        client: Pooled HTTP client to reuse (a short-lived one is created if omitted)
+
+    Yields:
+        Delta dicts, then a final result dict (see providers.streaming)
+    """
+    api_key = get_openrouter_api_key()
+    headers = {
+        "Authorization": f"Bearer {api_key}",
+        "Content-Type": "application/json",
+    }
+
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature
+    }
+
+    for attempt in range(MAX_RETRIES):
+        rate_limited = False
+        async with client_scope(client, timeout) as http_client:
+            async for chunk in stream_chat_completions(http_client, OPENROUTER_API_URL, headers, payload, timeout, "OpenRouter"):
+                if chunk.get("status_code") == 429:
+                    rate_limited = True
+                    continue
+                yield chunk
+
+        if not rate_limited:
+            return
+
+        retry_delay = INITIAL_RETRY_DELAY * (2 ** attempt)
+        print(f"Rate limited on {model}, retrying in {retry_delay}s (attempt {attempt + 1}/{MAX_RETRIES})")
+        await asyncio.sleep(retry_delay)
+
+    yield {
+        'content': None,
+        'error': 'rate_limited',
+        'error_message': "Rate limited - too many requests"
+    }
+
+
 async def query_models_parallel(
     models: List[str],
     messages: List[Dict[str, str]],
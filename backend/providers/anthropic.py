@@ -1,8 +1,9 @@
 """Anthropic provider implementation."""
 
-import httpx
-from typing import List, Dict, Any
+import json
+from typing import List, Dict, Any, AsyncIterator
 from .base import LLMProvider
+from .streaming import iter_sse_data, read_error_body, build_final
 from ..settings import get_settings
 
 class AnthropicProvider(LLMProvider):
@@ -31,76 +32,156 @@ class AnthropicProvider(LLMProvider):
                 filtered_messages.append(msg)
         
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                payload = {
-                    "model": model,
-                    "messages": filtered_messages,
-                    "max_tokens": 4096,
-                    "temperature": temperature
+            payload = {
+                "model": model,
+                "messages": filtered_messages,
+                "max_tokens": 4096,
+                "temperature": temperature
+            }
+            if system_message:
+                payload["system"] = system_message
+                
+            response = await self.client.post(
+                f"{self.BASE_URL}/messages",
+                timeout=timeout,
+                headers={
+                    "x-api-key": api_key,
+                    "anthropic-version": "2023-06-01",
+                    "content-type": "application/json"
+                },
+                json=payload
+            )
+            
+            if response.status_code != 200:
+                return {
+                    "error": True, 
+                    "error_message": f"Anthropic API error: {response.status_code} - {response.text}"
                 }
-                if system_message:
-                    payload["system"] = system_message
-                    
-                response = await client.post(
-                    f"{self.BASE_URL}/messages",
-                    headers={
-                        "x-api-key": api_key,
-                        "anthropic-version": "2023-06-01",
-                        "content-type": "application/json"
-                    },
-                    json=payload
-                )
                 
-                if response.status_code != 200:
-                    return {
-                        "error": True, 
-                        "error_message": f"Anthropic API error: {response.status_code} - {response.text}"
-                    }
-                    
-                data = response.json()
-                content = data["content"][0]["text"]
-                return {"content": content, "error": False}
+            data = response.json()
+            content = data["content"][0]["text"]
+            return {"content": content, "error": False}
                 
         except Exception as e:
             return {"error": True, "error_message": str(e)}
 
+    async def query_stream(self, model_id: str, messages: List[Dict[str, str]], timeout: float = 120.0, temperature: float = 0.7) -> AsyncIterator[Dict[str, Any]]:
+        api_key = self._get_api_key()
+        if not api_key:
+            yield {"error": True, "error_message": "Anthropic API key not configured"}
+            return
+
+        model = model_id.removeprefix("anthropic:")
+
+        # Convert messages to Anthropic format (system message is separate)
+        system_message = ""
+        filtered_messages = []
+        for msg in messages:
+            if msg["role"] == "system":
+                system_message = msg["content"]
+            else:
+                filtered_messages.append(msg)
+
+        payload = {
+            "model": model,
+            "messages": filtered_messages,
+            "max_tokens": 4096,
+            "temperature": temperature,
+            "stream": True
+        }
+        if system_message:
+            payload["system"] = system_message
+
+        content_parts = []
+        reasoning_parts = []
+        try:
+            async with self.client.stream(
+                "POST",
+                f"{self.BASE_URL}/messages",
+                timeout=timeout,
+                headers={
+                    "x-api-key": api_key,
+                    "anthropic-version": "2023-06-01",
+                    "content-type": "application/json"
+                },
+                json=payload
+            ) as response:
+                if response.status_code != 200:
+                    body = await read_error_body(response)
+                    yield {
+                        "error": True,
+                        "status_code": response.status_code,
+                        "error_message": f"Anthropic API error: {response.status_code} - {body}"
+                    }
+                    return
+
+                async for data in iter_sse_data(response):
+                    try:
+                        event = json.loads(data)
+                    except json.JSONDecodeError:
+                        continue
+
+                    event_type = event.get("type")
+                    if event_type == "error":
+                        message = event.get("error", {}).get("message", "Unknown error")
+                        yield {"error": True, "error_message": f"Anthropic API error: {message}"}
+                        return
+                    if event_type == "message_stop":
+                        break
+                    if event_type != "content_block_delta":
+                        continue
+
+                    delta = event.get("delta", {})
+                    if delta.get("type") == "text_delta" and delta.get("text"):
+                        content_parts.append(delta["text"])
+                        yield {"delta": delta["text"]}
+                    elif delta.get("type") == "thinking_delta" and delta.get("thinking"):
+                        reasoning_parts.append(delta["thinking"])
+                        yield {"reasoning_delta": delta["thinking"]}
+
+        except Exception as e:
+            yield {"error": True, "error_message": str(e)}
+            return
+
+        yield build_final(content_parts, reasoning_parts)
+
     async def get_models(self) -> List[Dict[str, Any]]:
         api_key = self._get_api_key()
         if not api_key:
             return []
             
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.BASE_URL}/models",
-                    headers={
-                        "x-api-key": api_key,
-                        "anthropic-version": "2023-06-01",
-                        "content-type": "application/json"
-                    }
-                )
-                
-                if response.status_code != 200:
-                    # Fallback to hardcoded list if API fails (e.g. older keys or API not enabled)
-                    return [
-                        {"id": "anthropic:claude-3-5-sonnet-20241022", "name": "Claude 3.5 Sonnet", "provider": "Anthropic"},
-                        {"id": "anthropic:claude-3-opus-20240229", "name": "Claude 3 Opus", "provider": "Anthropic"},
-                        {"id": "anthropic:claude-3-sonnet-20240229", "name": "Claude 3 Sonnet", "provider": "Anthropic"},
-                        {"id": "anthropic:claude-3-haiku-20240307", "name": "Claude 3 Haiku", "provider": "Anthropic"},
-                    ]
-                    
-                data = response.json()
-                models = []
-                
-                for model in data.get("data", []):
-                    if model.get("type") == "model":
-                        models.append({
-                            "id": f"anthropic:{model['id']}",
-                            "name": f"{model.get('display_name', model['id'])} [Anthropic]",
-                            "provider": "Anthropic"
-                        })
+            response = await self.client.get(
+                f"{self.BASE_URL}/models",
+                timeout=10.0,
+                headers={
+                    "x-api-key": api_key,
+                    "anthropic-version": "2023-06-01",
+                    "content-type": "application/json"
+                }
+            )
+            
+            if response.status_code != 200:
+                # Fallback to hardcoded list if API fails (e.g. older keys or API not enabled)
+                return [
+                    {"id": "anthropic:claude-3-5-sonnet-20241022", "name": "Claude 3.5 Sonnet", "provider": "Anthropic"},
+                    {"id": "anthropic:claude-3-opus-20240229", "name": "Claude 3 Opus", "provider": "Anthropic"},
+                    {"id": "anthropic:claude-3-sonnet-20240229", "name": "Claude 3 Sonnet", "provider": "Anthropic"},
+                    {"id": "anthropic:claude-3-haiku-20240307", "name": "Claude 3 Haiku", "provider": "Anthropic"},
+                ]
                 
-                return sorted(models, key=lambda x: x["name"])
+            data = response.json()
+            models = []
+            
+            for model in data.get("data", []):
+                if model.get("type") == "model":
+                    models.append({
+                        "id": f"anthropic:{model['id']}",
+                        "name": f"{model.get('display_name', model['id'])} [Anthropic]",
+                        "provider": "Anthropic"
+                    })
+            
+            return sorted(models, key=lambda x: x["name"])
                 
         except Exception:
             return []
@@ -108,24 +189,24 @@ class AnthropicProvider(LLMProvider):
     async def validate_key(self, api_key: str) -> Dict[str, Any]:
         try:
             # Test with a cheap call
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.post(
-                    f"{self.BASE_URL}/messages",
-                    headers={
-                        "x-api-key": api_key,
-                        "anthropic-version": "2023-06-01",
-                        "content-type": "application/json"
-                    },
-                    json={
-                        "model": "claude-3-haiku-20240307",
-                        "messages": [{"role": "user", "content": "Hi"}],
-                        "max_tokens": 1
-                    }
-                )
-                
-                if response.status_code == 200:
-                    return {"success": True, "message": "API key is valid"}
-                else:
-                    return {"success": False, "message": "Invalid API key"}
+            response = await self.client.post(
+                f"{self.BASE_URL}/messages",
+                timeout=10.0,
+                headers={
+                    "x-api-key": api_key,
+                    "anthropic-version": "2023-06-01",
+                    "content-type": "application/json"
+                },
+                json={
+                    "model": "claude-3-haiku-20240307",
+                    "messages": [{"role": "user", "content": "Hi"}],
+                    "max_tokens": 1
+                }
+            )
+            
+            if response.status_code == 200:
+                return {"success": True, "message": "API key is valid"}
+            else:
+                return {"success": False, "message": "Invalid API key"}
         except Exception as e:
             return {"success": False, "message": str(e)}
@@ -1,32 +1,119 @@
 """Base class for LLM providers."""
 
+import logging
 from abc import ABC, abstractmethod
-from typing import List, Dict, Any, Optional
+from contextlib import asynccontextmanager
+from typing import List, Dict, Any, Optional, AsyncIterator
+
+import httpx
+
+from ..config import get_http_pool_config
+
+logger = logging.getLogger(__name__)
+
+
+def create_pooled_client() -> httpx.AsyncClient:
+    """
+    Create a long-lived HTTP client with keep-alive connection pooling.
+
+    Pool limits and HTTP/2 come from the environment (see get_http_pool_config).
+    HTTP/2 needs the optional 'h2' package; without it we fall back to HTTP/1.1.
+    """
+    config = get_http_pool_config()
+
+    http2 = config["http2"]
+    if http2:
+        try:
+            import h2  # noqa: F401
+        except ImportError:
+            logger.warning("HTTP2_ENABLED is set but the 'h2' package is not installed. Falling back to HTTP/1.1.")
+            http2 = False
+
+    return httpx.AsyncClient(
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=config["max_connections"],
+            max_keepalive_connections=config["max_keepalive_connections"],
+            keepalive_expiry=config["keepalive_expiry"],
+        ),
+        timeout=httpx.Timeout(120.0),
+    )
+
+
+@asynccontextmanager
+async def client_scope(client: Optional[httpx.AsyncClient], timeout: float) -> AsyncIterator[httpx.AsyncClient]:
+    """Use the given pooled client, or a short-lived one if none was passed."""
+    if client is not None:
+        yield client
+        return
+    async with httpx.AsyncClient(timeout=timeout) as temp_client:
+        yield temp_client
+
 
 class LLMProvider(ABC):
     """Abstract base class for LLM providers."""
 
-    @abstractmethod
+    def __init__(self):
+        self._client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Pooled HTTP client shared by every request to this provider.
+
+        Created lazily so providers work even if startup() was never called.
+        Pass the per-request timeout on each call rather than on the client.
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = create_pooled_client()
+        return self._client
+
+    async def startup(self) -> None:
+        """Open the provider's connection pool (called on app startup)."""
+        _ = self.client
+
+    async def shutdown(self) -> None:
+        """Close the provider's connection pool (called on app shutdown)."""
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+
     @abstractmethod
     async def query(self, model_id: str, messages: List[Dict[str, str]], timeout: float = 120.0, temperature: float = 0.7) -> Dict[str, Any]:
         """
         Send a query to the LLM.
-        
+
         Args:
             model_id: The ID of the model to query.
             messages: List of message dicts (role, content).
             timeout: Request timeout in seconds.
-            
+
         Returns:
             Dict containing 'content' (str) or 'error' (bool) and 'error_message' (str).
         """
         pass
 
+    async def query_stream(self, model_id: str, messages: List[Dict[str, str]], timeout: float = 120.0, temperature: float = 0.7) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Send a query to the LLM and stream the answer as it is generated.
+
+        Providers without native streaming fall back to query() and emit the
+        whole answer as a single delta.
+
+        Yields:
+            Dicts with 'delta' (or 'reasoning_delta') for each chunk, followed by
+            a final dict in the same shape query() returns.
+        """
+        result = await self.query(model_id, messages, timeout, temperature)
+        if result and not result.get("error") and result.get("content"):
+            yield {"delta": result["content"]}
+        yield result
+
     @abstractmethod
     async def get_models(self) -> List[Dict[str, Any]]:
         """
         Fetch available models from the provider.
-        
+
         Returns:
             List of model dicts (id, name, context_length, etc.).
         """
@@ -36,10 +123,10 @@ class LLMProvider(ABC):
     async def validate_key(self, api_key: str) -> Dict[str, Any]:
         """
         Validate the provided API key.
-        
+
         Args:
             api_key: The API key to test.
-            
+
         Returns:
             Dict with 'success' (bool) and 'message' (str).
         """
@@ -1,8 +1,8 @@
 """DeepSeek provider implementation."""
 
-import httpx
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator
 from .base import LLMProvider
+from .streaming import stream_chat_completions
 from ..settings import get_settings
 
 class DeepSeekProvider(LLMProvider):
@@ -22,33 +22,58 @@ class DeepSeekProvider(LLMProvider):
         model = model_id.removeprefix("deepseek:")
         
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.post(
-                    f"{self.BASE_URL}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": model,
-                        "messages": messages,
-                        "temperature": temperature
-                    }
-                )
+            response = await self.client.post(
+                f"{self.BASE_URL}/chat/completions",
+                timeout=timeout,
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": model,
+                    "messages": messages,
+                    "temperature": temperature
+                }
+            )
+            
+            if response.status_code != 200:
+                return {
+                    "error": True, 
+                    "error_message": f"DeepSeek API error: {response.status_code} - {response.text}"
+                }
                 
-                if response.status_code != 200:
-                    return {
-                        "error": True, 
-                        "error_message": f"DeepSeek API error: {response.status_code} - {response.text}"
-                    }
-                    
-                data = response.json()
-                content = data["choices"][0]["message"]["content"]
-                return {"content": content, "error": False}
+            data = response.json()
+            content = data["choices"][0]["message"]["content"]
+            return {"content": content, "error": False}
                 
         except Exception as e:
             return {"error": True, "error_message": str(e)}
 
+    async def query_stream(self, model_id: str, messages: List[Dict[str, str]], timeout: float = 120.0, temperature: float = 0.7) -> AsyncIterator[Dict[str, Any]]:
+        api_key = self._get_api_key()
+        if not api_key:
+            yield {"error": True, "error_message": "DeepSeek API key not configured"}
+            return
+
+        model = model_id.removeprefix("deepseek:")
+
+        async for chunk in stream_chat_completions(
+            self.client,
+            f"{self.BASE_URL}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            payload={
+                "model": model,
+                "messages": messages,
+                "temperature": temperature
+            },
+            timeout=timeout,
+            label="DeepSeek"
+        ):
+            yield chunk
+
     async def get_models(self) -> List[Dict[str, Any]]:
         """Fetch available models from DeepSeek API with hardcoded fallback."""
         api_key = self._get_api_key()
@@ -62,32 +87,32 @@ class DeepSeekProvider(LLMProvider):
         # Try dynamic fetch if API key is available
         if api_key:
             try:
-                async with httpx.AsyncClient(timeout=10.0) as client:
-                    response = await client.get(
-                        f"{self.BASE_URL}/models",
-                        headers={"Authorization": f"Bearer {api_key}"}
-                    )
-
-                    if response.status_code == 200:
-                        data = response.json()
-                        models = []
-
-                        for model in data.get("data", []):
-                            model_id = model.get("id", "")
-                            model_id_lower = model_id.lower()
-
-                            # Skip non-chat models
-                            if any(term in model_id_lower for term in excluded_terms):
-                                continue
-
-                            models.append({
-                                "id": f"deepseek:{model_id}",
-                                "name": f"{model_id} [DeepSeek]",
-                                "provider": "DeepSeek"
-                            })
-
-                        if models:
-                            return models
+                response = await self.client.get(
+                    f"{self.BASE_URL}/models",
+                    timeout=10.0,
+                    headers={"Authorization": f"Bearer {api_key}"}
+                )
+
+                if response.status_code == 200:
+                    data = response.json()
+                    models = []
+
+                    for model in data.get("data", []):
+                        model_id = model.get("id", "")
+                        model_id_lower = model_id.lower()
+
+                        # Skip non-chat models
+                        if any(term in model_id_lower for term in excluded_terms):
+                            continue
+
+                        models.append({
+                            "id": f"deepseek:{model_id}",
+                            "name": f"{model_id} [DeepSeek]",
+                            "provider": "DeepSeek"
+                        })
+
+                    if models:
+                        return models
             except Exception:
                 pass  # Fall through to hardcoded fallback
 
@@ -99,15 +124,15 @@ class DeepSeekProvider(LLMProvider):
 
     async def validate_key(self, api_key: str) -> Dict[str, Any]:
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.BASE_URL}/models",
-                    headers={"Authorization": f"Bearer {api_key}"}
-                )
-                
-                if response.status_code == 200:
-                    return {"success": True, "message": "API key is valid"}
-                else:
-                    return {"success": False, "message": "Invalid API key"}
+            response = await self.client.get(
+                f"{self.BASE_URL}/models",
+                timeout=10.0,
+                headers={"Authorization": f"Bearer {api_key}"}
+            )
+            
+            if response.status_code == 200:
+                return {"success": True, "message": "API key is valid"}
+            else:
+                return {"success": False, "message": "Invalid API key"}
         except Exception as e:
             return {"success": False, "message": str(e)}
@@ -1,8 +1,8 @@
 """Mistral provider implementation."""
 
-import httpx
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator
 from .base import LLMProvider
+from .streaming import stream_chat_completions
 from ..settings import get_settings
 
 class MistralProvider(LLMProvider):
@@ -22,77 +22,102 @@ class MistralProvider(LLMProvider):
         model = model_id.removeprefix("mistral:")
         
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.post(
-                    f"{self.BASE_URL}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": model,
-                        "messages": messages,
-                        "temperature": temperature
-                    }
-                )
+            response = await self.client.post(
+                f"{self.BASE_URL}/chat/completions",
+                timeout=timeout,
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": model,
+                    "messages": messages,
+                    "temperature": temperature
+                }
+            )
+            
+            if response.status_code != 200:
+                return {
+                    "error": True, 
+                    "error_message": f"Mistral API error: {response.status_code} - {response.text}"
+                }
                 
-                if response.status_code != 200:
-                    return {
-                        "error": True, 
-                        "error_message": f"Mistral API error: {response.status_code} - {response.text}"
-                    }
-                    
-                data = response.json()
-                content = data["choices"][0]["message"]["content"]
-                return {"content": content, "error": False}
+            data = response.json()
+            content = data["choices"][0]["message"]["content"]
+            return {"content": content, "error": False}
                 
         except Exception as e:
             return {"error": True, "error_message": str(e)}
 
+    async def query_stream(self, model_id: str, messages: List[Dict[str, str]], timeout: float = 120.0, temperature: float = 0.7) -> AsyncIterator[Dict[str, Any]]:
+        api_key = self._get_api_key()
+        if not api_key:
+            yield {"error": True, "error_message": "Mistral API key not configured"}
+            return
+
+        model = model_id.removeprefix("mistral:")
+
+        async for chunk in stream_chat_completions(
+            self.client,
+            f"{self.BASE_URL}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            payload={
+                "model": model,
+                "messages": messages,
+                "temperature": temperature
+            },
+            timeout=timeout,
+            label="Mistral"
+        ):
+            yield chunk
+
     async def get_models(self) -> List[Dict[str, Any]]:
         api_key = self._get_api_key()
         if not api_key:
             return []
             
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.BASE_URL}/models",
-                    headers={"Authorization": f"Bearer {api_key}"}
-                )
+            response = await self.client.get(
+                f"{self.BASE_URL}/models",
+                timeout=10.0,
+                headers={"Authorization": f"Bearer {api_key}"}
+            )
+            
+            if response.status_code != 200:
+                return []
                 
-                if response.status_code != 200:
-                    return []
-                    
-                data = response.json()
-                models = []
-                for model in data.get("data", []):
-                    mid = model.get("id", "").lower()
-                    # Filter out embeddings, voxtral, ocr, and internal/deprecated models
-                    if "embed" in mid or "voxtral" in mid or "ocr" in mid or mid.startswith("open-"):
-                         continue
+            data = response.json()
+            models = []
+            for model in data.get("data", []):
+                mid = model.get("id", "").lower()
+                # Filter out embeddings, voxtral, ocr, and internal/deprecated models
+                if "embed" in mid or "voxtral" in mid or "ocr" in mid or mid.startswith("open-"):
+                     continue
 
-                    models.append({
-                        "id": f"mistral:{model['id']}",
-                        "name": f"{model['id']} [Mistral]",
-                        "provider": "Mistral"
-                    })
-                return sorted(models, key=lambda x: x["name"])
+                models.append({
+                    "id": f"mistral:{model['id']}",
+                    "name": f"{model['id']} [Mistral]",
+                    "provider": "Mistral"
+                })
+            return sorted(models, key=lambda x: x["name"])
                 
         except Exception:
             return []
 
     async def validate_key(self, api_key: str) -> Dict[str, Any]:
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.BASE_URL}/models",
-                    headers={"Authorization": f"Bearer {api_key}"}
-                )
-                
-                if response.status_code == 200:
-                    return {"success": True, "message": "API key is valid"}
-                else:
-                    return {"success": False, "message": "Invalid API key"}
+            response = await self.client.get(
+                f"{self.BASE_URL}/models",
+                timeout=10.0,
+                headers={"Authorization": f"Bearer {api_key}"}
+            )
+            
+            if response.status_code == 200:
+                return {"success": True, "message": "API key is valid"}
+            else:
+                return {"success": False, "message": "Invalid API key"}
         except Exception as e:
             return {"success": False, "message": str(e)}
@@ -1,8 +1,8 @@
 """OpenAI provider implementation."""
 
-import httpx
-from typing import List, Dict, Any
+from typing import List, Dict, Any, AsyncIterator
 from .base import LLMProvider
+from .streaming import stream_chat_completions
 from ..settings import get_settings
 
 class OpenAIProvider(LLMProvider):
@@ -23,79 +23,104 @@ class OpenAIProvider(LLMProvider):
         model = model_id.removeprefix("openai:")
         
         try:
-            async with httpx.AsyncClient(timeout=timeout) as client:
-                response = await client.post(
-                    f"{self.BASE_URL}/chat/completions",
-                    headers={
-                        "Authorization": f"Bearer {api_key}",
-                        "Content-Type": "application/json"
-                    },
-                    json={
-                        "model": model,
-                        "messages": messages,
-                        "temperature": 1.0 if any(x in model for x in ["gpt-5.1", "o1-", "o3-"]) else temperature
-                    }
-                )
+            response = await self.client.post(
+                f"{self.BASE_URL}/chat/completions",
+                timeout=timeout,
+                headers={
+                    "Authorization": f"Bearer {api_key}",
+                    "Content-Type": "application/json"
+                },
+                json={
+                    "model": model,
+                    "messages": messages,
+                    "temperature": 1.0 if any(x in model for x in ["gpt-5.1", "o1-", "o3-"]) else temperature
+                }
+            )
+            
+            if response.status_code != 200:
+                return {
+                    "error": True, 
+                    "error_message": f"OpenAI API error: {response.status_code} - {response.text}"
+                }
                 
-                if response.status_code != 200:
-                    return {
-                        "error": True, 
-                        "error_message": f"OpenAI API error: {response.status_code} - {response.text}"
-                    }
-                    
-                data = response.json()
-                content = data["choices"][0]["message"]["content"]
-                return {"content": content, "error": False}
+            data = response.json()
+            content = data["choices"][0]["message"]["content"]
+            return {"content": content, "error": False}
                 
         except Exception as e:
             return {"error": True, "error_message": str(e)}
 
+    async def query_stream(self, model_id: str, messages: List[Dict[str, str]], timeout: float = 120.0, temperature: float = 0.7) -> AsyncIterator[Dict[str, Any]]:
+        api_key = self._get_api_key()
+        if not api_key:
+            yield {"error": True, "error_message": "OpenAI API key not configured"}
+            return
+
+        model = model_id.removeprefix("openai:")
+
+        async for chunk in stream_chat_completions(
+            self.client,
+            f"{self.BASE_URL}/chat/completions",
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json"
+            },
+            payload={
+                "model": model,
+                "messages": messages,
+                "temperature": 1.0 if any(x in model for x in ["gpt-5.1", "o1-", "o3-"]) else temperature
+            },
+            timeout=timeout,
+            label="OpenAI"
+        ):
+            yield chunk
+
     async def get_models(self) -> List[Dict[str, Any]]:
         api_key = self._get_api_key()
         if not api_key:
             return []
             
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.BASE_URL}/models",
-                    headers={"Authorization": f"Bearer {api_key}"}
-                )
+            response = await self.client.get(
+                f"{self.BASE_URL}/models",
+                timeout=10.0,
+                headers={"Authorization": f"Bearer {api_key}"}
+            )
+            
+            if response.status_code != 200:
+                return []
                 
-                if response.status_code != 200:
-                    return []
+            data = response.json()
+            models = []
+            # Filter for chat models
+            for model in data.get("data", []):
+                mid = model["id"].lower()
+                # Filter out non-chat models
+                if any(x in mid for x in ["audio", "realtime", "voice", "tts", "dall-e", "whisper", "embed", "transcribe", "sora"]):
+                    continue
                     
-                data = response.json()
-                models = []
-                # Filter for chat models
-                for model in data.get("data", []):
-                    mid = model["id"].lower()
-                    # Filter out non-chat models
-                    if any(x in mid for x in ["audio", "realtime", "voice", "tts", "dall-e", "whisper", "embed", "transcribe", "sora"]):
-                        continue
-                        
-                    if "gpt" in mid or "o1" in mid or "o3" in mid:
-                        models.append({
-                            "id": f"openai:{model['id']}",
-                            "name": f"{model['id']} [OpenAI]",
-                            "provider": "OpenAI"
-                        })
-                return sorted(models, key=lambda x: x["name"])
+                if "gpt" in mid or "o1" in mid or "o3" in mid:
+                    models.append({
+                        "id": f"openai:{model['id']}",
+                        "name": f"{model['id']} [OpenAI]",
+                        "provider": "OpenAI"
+                    })
+            return sorted(models, key=lambda x: x["name"])
                 
         except Exception:
             return []
 
     async def validate_key(self, api_key: str) -> Dict[str, Any]:
         try:
-            async with httpx.AsyncClient(timeout=10.0) as client:
-                response = await client.get(
-                    f"{self.BASE_URL}/models",
-                    headers={"Authorization": f"Bearer {api_key}"}
-                )
-                
-                if response.status_code == 200:
-                    return {"success": True, "message": "API key is valid"}
-                else:
-                    return {"success": False, "message": "Invalid API key"}
+            response = await self.client.get(
+                f"{self.BASE_URL}/models",
+                timeout=10.0,
+                headers={"Authorization": f"Bearer {api_key}"}
+            )
+            
+            if response.status_code == 200:
+                return {"success": True, "message": "API key is valid"}
+            else:
+                return {"success": False, "message": "Invalid API key"}
         except Exception as e:
             return {"success": False, "message": str(e)}
@@ -0,0 +1,119 @@
+"""Helpers for streamed (token-by-token) LLM responses.
+
+Streaming queries yield dicts:
+    {"delta": str}            - a chunk of answer text
+    {"reasoning_delta": str}  - a chunk of reasoning text (reasoning models only)
+and end with one final dict in the same shape query() returns
+('content' plus optional 'reasoning', or 'error' and 'error_message').
+"""
+
+import json
+from typing import Any, AsyncIterator, Dict, List
+
+import httpx
+
+
+async def iter_sse_data(response: httpx.Response) -> AsyncIterator[str]:
+    """Yield the payload of every 'data:' line in a server-sent event stream."""
+    async for line in response.aiter_lines():
+        if line.startswith("data:"):
+            data = line[5:].strip()
+            if data:
+                yield data
+
+
+async def read_error_body(response: httpx.Response) -> str:
+    """Read the body of a failed streaming response for the error message."""
+    try:
+        body = await response.aread()
+        return body.decode("utf-8", errors="replace")
+    except Exception:
+        return ""
+
+
+def build_final(content_parts: List[str], reasoning_parts: List[str]) -> Dict[str, Any]:
+    """Assemble the final result dict from the collected chunks."""
+    result = {"content": "".join(content_parts), "error": False}
+    if reasoning_parts:
+        result["reasoning"] = "".join(reasoning_parts)
+    return result
+
+
+async def stream_chat_completions(
+    client: httpx.AsyncClient,
+    url: str,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    timeout: float,
+    label: str
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream an OpenAI-compatible /chat/completions request.
+
+    Args:
+        client: Pooled HTTP client
+        url: Full chat completions URL
+        headers: Request headers (auth etc.)
+        payload: Request body; 'stream' is forced on
+        timeout: Request timeout in seconds
+        label: Provider name used in error messages
+
+    Yields:
+        Delta dicts, then a final result dict. Non-200 responses produce a single
+        error dict that also carries 'status_code' so callers can retry.
+    """
+    content_parts: List[str] = []
+    reasoning_parts: List[str] = []
+
+    try:
+        async with client.stream(
+            "POST",
+            url,
+            timeout=timeout,
+            headers=headers,
+            json={**payload, "stream": True}
+        ) as response:
+            if response.status_code != 200:
+                body = await read_error_body(response)
+                yield {
+                    "error": True,
+                    "status_code": response.status_code,
+                    "error_message": f"{label} API error: {response.status_code} - {body}"
+                }
+                return
+
+            async for data in iter_sse_data(response):
+                if data == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(data)
+                except json.JSONDecodeError:
+                    continue
+
+                if chunk.get("error"):
+                    error = chunk["error"]
+                    message = error.get("message", str(error)) if isinstance(error, dict) else str(error)
+                    yield {"error": True, "error_message": f"{label} API error: {message}"}
+                    return
+
+                choices = chunk.get("choices") or []
+                if not choices:
+                    continue
+                delta = choices[0].get("delta") or {}
+
+                # OpenRouter uses 'reasoning', DeepSeek uses 'reasoning_content'
+                reasoning = delta.get("reasoning") or delta.get("reasoning_content")
+                if reasoning:
+                    reasoning_parts.append(reasoning)
+                    yield {"reasoning_delta": reasoning}
+
+                text = delta.get("content")
+                if text:
+                    content_parts.append(text)
+                    yield {"delta": text}
+
+    except Exception as e:
+        yield {"error": True, "error_message": str(e)}
+        return
+
+    yield build_final(content_parts, reasoning_parts)
@@ -0,0 +1,189 @@
+"""
+Provider-aware admission control for LLM requests.
+
+Every council run in the process shares one AdmissionController, so parallel
+stages queue behind per-provider (and optionally per-model) limits instead of
+bursting into 429s:
+- max in-flight requests (semaphore)
+- requests per minute and tokens per minute (token buckets)
+"""
+
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+import logging
+
+from .config import get_rate_limit_config
+
+logger = logging.getLogger(__name__)
+
+
+def estimate_tokens(messages: List[Dict[str, Any]]) -> int:
+    """Rough prompt token estimate (~4 characters per token)."""
+    chars = sum(len(str(m.get("content") or "")) for m in messages)
+    return max(1, chars // 4)
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at `per_minute` units per minute."""
+
+    def __init__(self, per_minute: float):
+        self.capacity = float(per_minute)
+        self.rate = float(per_minute) / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        # Held while sleeping so waiters are served in arrival order
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount: float = 1.0):
+        """Wait until `amount` units are available, then take them."""
+        # A single request larger than the bucket would otherwise never fit
+        amount = min(float(amount), self.capacity)
+        async with self._lock:
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+
+class AdmissionGate:
+    """Limits for one provider or one model, plus queueing statistics."""
+
+    def __init__(self, name: str, max_in_flight: int = 0, rpm: float = 0, tpm: float = 0):
+        self.name = name
+        self.max_in_flight = max_in_flight
+        self.rpm = rpm
+        self.tpm = tpm
+        self._semaphore = asyncio.Semaphore(max_in_flight) if max_in_flight > 0 else None
+        self._requests = TokenBucket(rpm) if rpm > 0 else None
+        self._tokens = TokenBucket(tpm) if tpm > 0 else None
+
+        self.in_flight = 0
+        self.waiting = 0
+        self.admitted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    async def enter(self, tokens: int):
+        """Wait for admission. Order: concurrency slot, then rate buckets."""
+        start = time.monotonic()
+        self.waiting += 1
+        try:
+            if self._semaphore:
+                await self._semaphore.acquire()
+            try:
+                if self._requests:
+                    await self._requests.acquire(1)
+                if self._tokens:
+                    await self._tokens.acquire(tokens)
+            except BaseException:
+                if self._semaphore:
+                    self._semaphore.release()
+                raise
+        finally:
+            self.waiting -= 1
+
+        waited = time.monotonic() - start
+        self.in_flight += 1
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        if waited > 1.0:
+            logger.info(f"Admission for {self.name} waited {waited:.1f}s")
+
+    def exit(self):
+        self.in_flight -= 1
+        if self._semaphore:
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "limits": {
+                "max_in_flight": self.max_in_flight or None,
+                "rpm": self.rpm or None,
+                "tpm": self.tpm or None,
+            },
+            "in_flight": self.in_flight,
+            "queue_depth": self.waiting,
+            "admitted": self.admitted,
+            "avg_wait_seconds": round(self.total_wait / self.admitted, 3) if self.admitted else 0.0,
+            "max_wait_seconds": round(self.max_wait, 3),
+        }
+
+
+class AdmissionController:
+    """Shared admission layer for all LLM calls in the process."""
+
+    def __init__(self):
+        self.config = get_rate_limit_config()
+        self.provider_gates: Dict[str, AdmissionGate] = {}
+        self.model_gates: Dict[str, AdmissionGate] = {}
+
+    def _provider_gate(self, provider: str) -> Optional[AdmissionGate]:
+        if not self.config["enabled"]:
+            return None
+        if provider not in self.provider_gates:
+            limits = self.config["limits"].get(provider, {})
+            self.provider_gates[provider] = AdmissionGate(
+                provider,
+                max_in_flight=int(limits.get("max_in_flight", self.config["default_max_in_flight"])),
+                rpm=float(limits.get("rpm", 0)),
+                tpm=float(limits.get("tpm", 0)),
+            )
+        return self.provider_gates[provider]
+
+    def _model_gate(self, model: str) -> Optional[AdmissionGate]:
+        """Per-model gate, only for models listed explicitly in the config."""
+        if not self.config["enabled"] or model not in self.config["limits"]:
+            return None
+        if model not in self.model_gates:
+            limits = self.config["limits"][model]
+            self.model_gates[model] = AdmissionGate(
+                model,
+                max_in_flight=int(limits.get("max_in_flight", 0)),
+                rpm=float(limits.get("rpm", 0)),
+                tpm=float(limits.get("tpm", 0)),
+            )
+        return self.model_gates[model]
+
+    @asynccontextmanager
+    async def admit(self, provider: str, model: str, messages: List[Dict[str, Any]]) -> AsyncIterator[None]:
+        """
+        Hold an admission slot for the duration of one request.
+
+        Args:
+            provider: Provider name (key in council.PROVIDERS)
+            model: Full model ID as used by the council
+            messages: Request messages, used to estimate token cost
+        """
+        # Model gate first, so a model queued on its own limit does not hold a provider slot
+        gates = [g for g in (self._model_gate(model), self._provider_gate(provider)) if g]
+        tokens = estimate_tokens(messages)
+        entered = []
+        try:
+            for gate in gates:
+                await gate.enter(tokens)
+                entered.append(gate)
+            yield
+        finally:
+            for gate in reversed(entered):
+                gate.exit()
+
+    def stats(self) -> Dict[str, Any]:
+        """Queue depth, in-flight counts and wait times per provider and model."""
+        return {
+            "enabled": self.config["enabled"],
+            "providers": {name: gate.stats() for name, gate in self.provider_gates.items()},
+            "models": {name: gate.stats() for name, gate in self.model_gates.items()},
+        }
+
+
+# Global singleton instance
+admission = AdmissionController()
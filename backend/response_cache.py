@@ -0,0 +1,257 @@
+"""
+Response cache for LLM queries.
+
+Successful query results are cached by provider, model, normalized messages
+and temperature (the only generation parameter providers take; the timeout
+does not change the answer). Two tiers:
+- in-memory LRU with a TTL
+- optional gzip'd JSON files on disk, evicted least recently used first by
+  total size (a hit refreshes the file's mtime)
+
+Calls above a temperature threshold bypass the cache unless explicitly
+allowed, since their answers are meant to vary.
+"""
+
+import asyncio
+import copy
+import gzip
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional
+import logging
+
+from .config import get_response_cache_config
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, str]]:
+    """Normalize messages so trivially different requests share a cache key."""
+    normalized = []
+    for m in messages:
+        content = m.get("content")
+        if not isinstance(content, str):
+            content = json.dumps(content, sort_keys=True)
+        normalized.append({
+            "role": str(m.get("role", "user")).lower(),
+            "content": content.replace("\r\n", "\n").strip()
+        })
+    return normalized
+
+
+def make_cache_key(
+    provider: str,
+    model: str,
+    messages: List[Dict[str, Any]],
+    temperature: float
+) -> str:
+    payload = {
+        "provider": provider,
+        "model": model,
+        "messages": normalize_messages(messages),
+        "temperature": round(float(temperature), 3),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class DiskTier:
+    """
+    Gzip'd JSON entries in a directory, evicted least recently used first
+    past max_bytes. Called from several executor threads at once; the lock
+    covers the size bookkeeping and eviction.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._size = None  # Computed lazily on first write
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json.gz")
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        path = self._path(key)
+        if not os.path.exists(path):
+            return None
+        try:
+            with gzip.open(path, "rt", encoding="utf-8") as f:
+                entry = json.load(f)
+        except FileNotFoundError:
+            return None  # Evicted since the exists() check
+        except Exception as e:
+            logger.warning(f"Discarding unreadable cache entry {path}: {e}")
+            self.delete(key)
+            return None
+        try:
+            os.utime(path)  # Mark as recently used for eviction
+        except OSError:
+            pass
+        return entry
+
+    def set(self, key: str, entry: Dict[str, Any]) -> int:
+        """Write an entry; returns the number of entries evicted."""
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        data = gzip.compress(json.dumps(entry).encode("utf-8"))
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp_path, path)
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - previous
+            return self._evict()
+
+    def delete(self, key: str):
+        path = self._path(key)
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+                if self._size is not None:
+                    self._size -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            if os.path.isdir(self.directory):
+                for name in os.listdir(self.directory):
+                    if name.endswith(".json.gz"):
+                        os.remove(os.path.join(self.directory, name))
+            self._size = 0
+
+    def _scan_size(self) -> int:
+        if not os.path.isdir(self.directory):
+            return 0
+        return sum(
+            entry.stat().st_size for entry in os.scandir(self.directory)
+            if entry.name.endswith(".json.gz")
+        )
+
+    def _evict(self) -> int:
+        """Remove least recently used entries until under max_bytes (caller holds the lock)."""
+        if self._size <= self.max_bytes:
+            return 0
+        entries = sorted(
+            (e for e in os.scandir(self.directory) if e.name.endswith(".json.gz")),
+            key=lambda e: e.stat().st_mtime
+        )
+        evicted = 0
+        for entry in entries:
+            if self._size <= self.max_bytes:
+                break
+            size = entry.stat().st_size
+            try:
+                os.remove(entry.path)
+            except OSError:
+                continue
+            self._size -= size
+            evicted += 1
+        return evicted
+
+
+class ResponseCache:
+    """Two-tier (memory LRU + optional disk) cache of successful query results."""
+
+    def __init__(self):
+        self.config = get_response_cache_config()
+        self._memory: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._disk = DiskTier(self.config["disk_dir"], self.config["disk_max_bytes"]) if self.config["disk_enabled"] else None
+        self.counters = {
+            "memory_hits": 0,
+            "disk_hits": 0,
+            "misses": 0,
+            "bypassed": 0,
+            "stores": 0,
+            "evictions": 0,
+        }
+
+    def is_cacheable(self, temperature: float) -> bool:
+        """Whether a call at this temperature may use the cache."""
+        if not self.config["enabled"]:
+            return False
+        if temperature > self.config["max_temperature"] and not self.config["allow_high_temperature"]:
+            self.counters["bypassed"] += 1
+            return False
+        return True
+
+    async def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result, or None on a miss."""
+        now = time.time()
+        entry = self._memory.get(key)
+        if entry is not None:
+            if entry["expires_at"] > now:
+                self._memory.move_to_end(key)
+                self.counters["memory_hits"] += 1
+                return copy.deepcopy(entry["result"])
+            del self._memory[key]
+
+        if self._disk is not None:
+            entry = await asyncio.to_thread(self._disk.get, key)
+            if entry is not None:
+                if entry["expires_at"] > now:
+                    self._remember(key, entry)
+                    self.counters["disk_hits"] += 1
+                    return copy.deepcopy(entry["result"])
+                await asyncio.to_thread(self._disk.delete, key)
+
+        self.counters["misses"] += 1
+        return None
+
+    async def set(self, key: str, result: Dict[str, Any]):
+        """Store a successful result in both tiers."""
+        if not result or result.get("error"):
+            return
+        entry = {
+            "expires_at": time.time() + self.config["ttl"],
+            "result": {k: v for k, v in result.items() if k != "cached"},
+        }
+        self._remember(key, entry)
+        self.counters["stores"] += 1
+        if self._disk is not None:
+            try:
+                self.counters["evictions"] += await asyncio.to_thread(self._disk.set, key, entry)
+            except Exception as e:
+                logger.warning(f"Could not write response cache entry to disk: {e}")
+
+    def _remember(self, key: str, entry: Dict[str, Any]):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.config["max_entries"]:
+            self._memory.popitem(last=False)
+            self.counters["evictions"] += 1
+
+    async def clear(self):
+        self._memory.clear()
+        if self._disk is not None:
+            await asyncio.to_thread(self._disk.clear)
+
+    def stats(self) -> Dict[str, Any]:
+        hits = self.counters["memory_hits"] + self.counters["disk_hits"]
+        lookups = hits + self.counters["misses"]
+        return {
+            "enabled": self.config["enabled"],
+            "disk_enabled": self._disk is not None,
+            "memory_entries": len(self._memory),
+            "hit_rate": round(hits / lookups, 3) if lookups else 0.0,
+            **self.counters,
+        }
+
+
+# Global singleton instance
+response_cache = ResponseCache()
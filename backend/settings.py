@@ -2,9 +2,10 @@
 
 import json
 import os
+import threading
 from pathlib import Path
 from typing import Optional, List, Dict
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict
 from .search import SearchProvider
 
 # Settings file path
@@ -67,7 +68,9 @@ from .prompts import (
 )
 
 class Settings(BaseModel):
-    """Application settings."""
+    """Application settings (immutable; use update_settings to change them)."""
+    model_config = ConfigDict(frozen=True)
+
     search_provider: SearchProvider = SearchProvider.DUCKDUCKGO
     search_keyword_extraction: str = "direct"  # "direct" or "yake"
 
@@ -121,8 +124,26 @@ class Settings(BaseModel):
     # Execution Mode
     execution_mode: str = "full"  # Default execution mode: 'chat_only', 'chat_ranking', 'full'
 
+    # Uploaded documents in Stage 1 prompts
+    document_context_mode: str = "retrieval"  # "retrieval" (chunks relevant to the question) or "full" (whole texts)
+    document_top_k: int = 8  # Maximum chunks per question in retrieval mode
+    document_token_budget: int = 4000  # Maximum estimated tokens of document context in retrieval mode
 
-def get_settings() -> Settings:
+
+# Process-wide cache of the parsed settings file, keyed on its mtime
+_settings_cache: Optional[Settings] = None
+_settings_cache_mtime: Optional[int] = None
+_settings_lock = threading.Lock()
+
+
+def _settings_file_mtime() -> Optional[int]:
+    try:
+        return SETTINGS_FILE.stat().st_mtime_ns
+    except OSError:
+        return None
+
+
+def _load_settings_file() -> Settings:
     """Load settings from file, or return defaults."""
     if SETTINGS_FILE.exists():
         try:
@@ -134,13 +155,35 @@ def get_settings() -> Settings:
     return Settings()
 
 
+def get_settings() -> Settings:
+    """
+    Return the current settings.
+
+    The parsed file is cached and only re-read when its mtime changes. The
+    returned object is immutable and shared, so it is safe to hold on to as
+    a per-request snapshot.
+    """
+    global _settings_cache, _settings_cache_mtime
+    mtime = _settings_file_mtime()
+    with _settings_lock:
+        if _settings_cache is None or mtime != _settings_cache_mtime:
+            _settings_cache = _load_settings_file()
+            _settings_cache_mtime = mtime
+        return _settings_cache
+
+
 def save_settings(settings: Settings) -> None:
     """Save settings to file."""
+    global _settings_cache, _settings_cache_mtime
     # Ensure data directory exists
     SETTINGS_FILE.parent.mkdir(parents=True, exist_ok=True)
 
-    with open(SETTINGS_FILE, "w") as f:
-        json.dump(settings.model_dump(), f, indent=2)
+    with _settings_lock:
+        with open(SETTINGS_FILE, "w") as f:
+            json.dump(settings.model_dump(), f, indent=2)
+        # Refresh the cache directly; coarse mtime resolution could hide the change
+        _settings_cache = settings
+        _settings_cache_mtime = _settings_file_mtime()
 
 
 def update_settings(**kwargs) -> Settings:
@@ -3,46 +3,195 @@ Storage package for LLM Council.
 Handles switching between JSON file storage and Database storage.
 """
 
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from ..config import get_database_config
 from .database import init_database
 
 # Import implementations
 from . import json_storage
+from . import journal_storage
 from . import sql_storage
+from .messages import user_message, assistant_message, error_message
+from .write_behind import write_behind, PendingTurn
+from .payloads import summarize
+from .search_index import search_index
+from .conversation_cache import conversation_cache
 
 def _get_backend():
     """Get the active storage backend based on config."""
     config = get_database_config()
-    if config["type"] in ["postgresql", "mysql"]:
+    if config["type"] in ["postgresql", "mysql", "sqlite"]:
         return sql_storage
+    if config["type"] == "jsonl":
+        return journal_storage
     return json_storage
 
 # Facade functions that delegate to the active backend
 
+def _overlay(record: Dict[str, Any], turn: Optional[PendingTurn]) -> Dict[str, Any]:
+    """Apply a turn's buffered writes to a metadata record."""
+    if turn is None:
+        return record
+    record = dict(record)
+    record["message_count"] = record.get("message_count", 0) + len(turn.messages)
+    if turn.title is not None:
+        record["title"] = turn.title
+    return record
+
+def _index(conversation_id: str, messages: List[Dict[str, Any]] = (), title: Optional[str] = None):
+    """Update the search index; a failure here never fails the write."""
+    try:
+        if messages:
+            search_index.add_messages(conversation_id, messages)
+        if title is not None:
+            search_index.set_title(conversation_id, title)
+    except Exception as e:
+        print(f"Could not update search index for {conversation_id}: {e}")
+
 def create_conversation(conversation_id: str) -> Dict[str, Any]:
-    return _get_backend().create_conversation(conversation_id)
+    conversation = _get_backend().create_conversation(conversation_id)
+    conversation_cache.invalidate(conversation_id)
+    return conversation
+
+def _read_conversation(conversation_id: str, view: str) -> Optional[Dict[str, Any]]:
+    """Committed state of a conversation, from the hot-conversation cache if possible."""
+    conversation = conversation_cache.get(conversation_id, view)
+    if conversation is None:
+        generation = conversation_cache.generation(conversation_id)
+        conversation = _get_backend().get_conversation(conversation_id, view)
+        if conversation is not None:
+            conversation_cache.put(conversation, view, generation)
+    return conversation
+
+def get_conversation(conversation_id: str, view: str = "full") -> Optional[Dict[str, Any]]:
+    conversation = _read_conversation(conversation_id, view)
+    turn = write_behind.pending(conversation_id)
+    if conversation is not None and turn is not None:
+        pending = [summarize(m) for m in turn.messages] if view == "summary" else turn.messages
+        conversation["messages"] = conversation["messages"] + pending
+        if turn.title is not None:
+            conversation["title"] = turn.title
+    return conversation
 
-def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
-    return _get_backend().get_conversation(conversation_id)
+def get_messages(conversation_id: str, start: int = 0, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+    if write_behind.pending(conversation_id) is not None:
+        conversation = get_conversation(conversation_id)
+        if conversation is None:
+            return None
+        messages = conversation["messages"][start:]
+        return messages if limit is None else messages[:limit]
+    cached = conversation_cache.get(conversation_id, "full")
+    if cached is not None:
+        messages = cached["messages"][start:]
+        return messages if limit is None else messages[:limit]
+    return _get_backend().get_messages(conversation_id, start, limit)
 
 def save_conversation(conversation: Dict[str, Any]):
-    return _get_backend().save_conversation(conversation)
+    # A full save supersedes anything buffered for the conversation
+    write_behind.discard(conversation["id"])
+    _get_backend().save_conversation(conversation)
+    conversation_cache.invalidate(conversation["id"])
+    try:
+        search_index.reindex_conversation(conversation)
+    except Exception as e:
+        print(f"Could not update search index for {conversation['id']}: {e}")
 
 def list_conversations() -> List[Dict[str, Any]]:
-    return _get_backend().list_conversations()
+    return [_overlay(r, write_behind.pending(r["id"])) for r in _get_backend().list_conversations()]
+
+def list_conversations_page(limit: Optional[int] = None, cursor: Optional[str] = None, title_prefix: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    items, next_cursor = _get_backend().list_conversations_page(limit, cursor, title_prefix)
+    return [_overlay(r, write_behind.pending(r["id"])) for r in items], next_cursor
 
 def add_user_message(conversation_id: str, content: str):
-    return _get_backend().add_user_message(conversation_id, content)
+    message = user_message(content)
+    if not write_behind.add_message(conversation_id, message):
+        _get_backend().add_user_message(conversation_id, content)
+        conversation_cache.append(conversation_id, [message])
+        _index(conversation_id, [message])
 
 def add_assistant_message(conversation_id: str, stage1: List[Dict[str, Any]], stage2: Optional[List[Dict[str, Any]]] = None, stage3: Optional[Dict[str,Any]] = None, metadata: Optional[Dict[str, Any]] = None):
-    return _get_backend().add_assistant_message(conversation_id, stage1, stage2, stage3, metadata)
+    message = assistant_message(stage1, stage2, stage3, metadata)
+    if not write_behind.add_message(conversation_id, message):
+        _get_backend().add_assistant_message(conversation_id, stage1, stage2, stage3, metadata)
+        conversation_cache.append(conversation_id, [message])
+        _index(conversation_id, [message])
 
 def add_error_message(conversation_id: str, error_text: str):
-    return _get_backend().add_error_message(conversation_id, error_text)
+    message = error_message(error_text)
+    if not write_behind.add_message(conversation_id, message):
+        _get_backend().add_error_message(conversation_id, error_text)
+        conversation_cache.append(conversation_id, [message])
 
 def update_conversation_title(conversation_id: str, title: str):
-    return _get_backend().update_conversation_title(conversation_id, title)
+    if not write_behind.set_title(conversation_id, title):
+        _get_backend().update_conversation_title(conversation_id, title)
+        conversation_cache.append(conversation_id, [], title)
+        _index(conversation_id, title=title)
 
 def delete_conversation(conversation_id: str) -> bool:
-    return _get_backend().delete_conversation(conversation_id)
+    write_behind.discard(conversation_id)
+    deleted = _get_backend().delete_conversation(conversation_id)
+    conversation_cache.invalidate(conversation_id)
+    try:
+        search_index.remove_conversation(conversation_id)
+    except Exception as e:
+        print(f"Could not update search index for {conversation_id}: {e}")
+    return deleted
+
+def import_conversations(conversations: List[Dict[str, Any]], on_conflict: str = "replace") -> List[str]:
+    """
+    Bulk-import full conversations (see transfer.py); returns the IDs written.
+
+    Conversations with an open write-behind turn (a council answer still
+    streaming) are skipped rather than overwritten under it.
+    """
+    busy = [c["id"] for c in conversations if write_behind.pending(c["id"]) is not None]
+    if busy:
+        print(f"Skipping import of conversations with a turn in progress: {', '.join(busy)}")
+        conversations = [c for c in conversations if c["id"] not in busy]
+    if not conversations:
+        return []
+    imported = _get_backend().import_conversations(conversations, on_conflict)
+    for conversation_id in imported:
+        conversation_cache.invalidate(conversation_id)
+    written = set(imported)
+    try:
+        search_index.reindex_conversations([c for c in conversations if c["id"] in written])
+    except Exception as e:
+        print(f"Could not update search index for imported conversations: {e}")
+    return imported
+
+# Write-behind turns (see write_behind.py)
+
+def begin_turn(conversation_id: str):
+    """Start buffering message/title writes for a conversation."""
+    write_behind.begin(conversation_id)
+
+def end_turn(conversation_id: str):
+    """Commit the turn's buffered writes in one backend write."""
+    turn = write_behind.end(conversation_id)
+    if turn is not None and not turn.is_empty():
+        _get_backend().append_messages(conversation_id, turn.messages, turn.title)
+        conversation_cache.append(conversation_id, turn.messages, turn.title)
+        _index(conversation_id, turn.messages, turn.title)
+
+def flush_all():
+    """Commit every open turn (called on shutdown)."""
+    for conversation_id in write_behind.open_turns():
+        try:
+            end_turn(conversation_id)
+        except Exception as e:
+            print(f"Could not flush conversation {conversation_id}: {e}")
+
+def rebuild_search_index() -> int:
+    """Re-index every stored conversation (used when the index is missing)."""
+    def conversations():
+        for record in list_conversations():
+            conversation = get_conversation(record["id"])
+            if conversation is not None:
+                yield conversation
+    return search_index.rebuild(conversations())
+
+# Async API (imported last: it wraps the facade functions above)
+from . import aio
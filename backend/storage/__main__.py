@@ -0,0 +1,35 @@
+"""
+Storage maintenance commands.
+
+    python -m backend.storage migrate-layout [--to flat|sharded]
+"""
+
+import argparse
+from typing import List, Optional
+
+from ..config import DATA_DIR, get_json_layout_config
+from . import layout
+
+
+def main(argv: Optional[List[str]] = None):
+    configured = get_json_layout_config()["layout"]
+    parser = argparse.ArgumentParser(prog="python -m backend.storage", description="Storage maintenance commands.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    migrate_parser = subparsers.add_parser(
+        "migrate-layout",
+        help="Move all JSON/JSONL conversation files into one layout (stop the app first)"
+    )
+    migrate_parser.add_argument(
+        "--to", choices=["flat", "sharded"], default=configured,
+        help=f"Target layout (default: JSON_LAYOUT, currently {configured})"
+    )
+    args = parser.parse_args(argv)
+
+    files, directories = layout.migrate(args.to == "sharded")
+    print(f"Moved {files} conversation files and {directories} payload directories to the {args.to} layout in {DATA_DIR}")
+    if args.to != configured:
+        print(f"Set JSON_LAYOUT={args.to} so new files use the same layout")
+
+
+if __name__ == "__main__":
+    main()
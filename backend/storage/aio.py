@@ -0,0 +1,106 @@
+"""
+Async storage API.
+
+The storage backends are synchronous (file I/O and SQLAlchemy sessions).
+These coroutines run them on a dedicated, bounded thread pool so a large
+write never stalls the event loop and the SSE streams it is serving.
+
+Calls for the same conversation are serialized in arrival order, which
+keeps the read-modify-write backends (JSON files) free of lost updates now
+that calls no longer run one at a time on the loop.
+"""
+
+import asyncio
+import contextlib
+import functools
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from ..config import get_storage_io_config
+from .. import storage as facade
+
+_executor: Optional[ThreadPoolExecutor] = None
+_conversation_locks: "weakref.WeakValueDictionary[str, asyncio.Lock]" = weakref.WeakValueDictionary()
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=get_storage_io_config()["workers"],
+            thread_name_prefix="storage-io"
+        )
+    return _executor
+
+
+async def run(func: Callable, *args, **kwargs) -> Any:
+    """Run a synchronous storage function on the storage I/O pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), functools.partial(func, *args, **kwargs))
+
+
+def _lock_for(conversation_id: str) -> asyncio.Lock:
+    lock = _conversation_locks.get(conversation_id)
+    if lock is None:
+        lock = asyncio.Lock()
+        _conversation_locks[conversation_id] = lock
+    return lock
+
+
+async def _run_for(conversation_id: str, func: Callable, *args) -> Any:
+    async with _lock_for(conversation_id):
+        return await run(func, *args)
+
+
+def shutdown():
+    """Wait for in-flight storage calls and stop the pool."""
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=True)
+        _executor = None
+
+
+async def create_conversation(conversation_id: str) -> Dict[str, Any]:
+    return await _run_for(conversation_id, facade.create_conversation, conversation_id)
+
+async def get_conversation(conversation_id: str, view: str = "full") -> Optional[Dict[str, Any]]:
+    return await _run_for(conversation_id, facade.get_conversation, conversation_id, view)
+
+async def get_messages(conversation_id: str, start: int = 0, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+    return await _run_for(conversation_id, facade.get_messages, conversation_id, start, limit)
+
+async def save_conversation(conversation: Dict[str, Any]):
+    return await _run_for(conversation["id"], facade.save_conversation, conversation)
+
+async def list_conversations() -> List[Dict[str, Any]]:
+    return await run(facade.list_conversations)
+
+async def list_conversations_page(limit: Optional[int] = None, cursor: Optional[str] = None, title_prefix: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    return await run(facade.list_conversations_page, limit, cursor, title_prefix)
+
+async def import_conversations(conversations: List[Dict[str, Any]], on_conflict: str = "replace") -> List[str]:
+    # Hold the lock of every conversation in the batch, taken in sorted order
+    # so two overlapping imports cannot deadlock (other callers take one lock)
+    async with contextlib.AsyncExitStack() as stack:
+        for conversation_id in sorted({c["id"] for c in conversations}):
+            await stack.enter_async_context(_lock_for(conversation_id))
+        return await run(facade.import_conversations, conversations, on_conflict)
+
+async def add_user_message(conversation_id: str, content: str):
+    return await _run_for(conversation_id, facade.add_user_message, conversation_id, content)
+
+async def add_assistant_message(conversation_id: str, stage1: List[Dict[str, Any]], stage2: Optional[List[Dict[str, Any]]] = None, stage3: Optional[Dict[str,Any]] = None, metadata: Optional[Dict[str, Any]] = None):
+    return await _run_for(conversation_id, facade.add_assistant_message, conversation_id, stage1, stage2, stage3, metadata)
+
+async def add_error_message(conversation_id: str, error_text: str):
+    return await _run_for(conversation_id, facade.add_error_message, conversation_id, error_text)
+
+async def update_conversation_title(conversation_id: str, title: str):
+    return await _run_for(conversation_id, facade.update_conversation_title, conversation_id, title)
+
+async def delete_conversation(conversation_id: str) -> bool:
+    return await _run_for(conversation_id, facade.delete_conversation, conversation_id)
+
+async def end_turn(conversation_id: str):
+    return await _run_for(conversation_id, facade.end_turn, conversation_id)
@@ -0,0 +1,143 @@
+"""
+Bounded LRU of parsed conversations for the storage facade.
+
+Entries are keyed by (conversation_id, view) and hold what the backend
+returned, so repeated reads of a hot conversation (the stream's existence
+check, reloads, per-message detail requests) skip the backend read and the
+JSON parse. The budget is in bytes (approximate JSON size) rather than
+entries, since one long conversation can outweigh hundreds of short ones.
+
+The facade writes through: every write goes to the backend first and is
+then applied to the cached copies (appends, title changes) or drops them
+(saves, deletes, imports). A per-conversation generation number keeps a
+read that raced with a write from caching what it read before the write.
+
+The cache is per process. Disable it (CONVERSATION_CACHE_MB=0) when
+several worker processes or other programs write the same storage.
+"""
+
+import json
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from ..config import get_conversation_cache_config
+from .payloads import summarize
+
+VIEWS = ("full", "summary")
+
+
+def estimate_size(value: Any) -> int:
+    """Approximate weight of a cached value: the length of its JSON encoding."""
+    return len(json.dumps(value, ensure_ascii=False, default=str))
+
+
+def _copy(conversation: Dict[str, Any]) -> Dict[str, Any]:
+    """A copy callers can modify: new dict and messages list (message dicts are shared)."""
+    return {**conversation, "messages": list(conversation.get("messages", []))}
+
+
+class ConversationCache:
+    """Byte-bounded LRU of conversations by (conversation_id, view)."""
+
+    def __init__(self):
+        self.max_bytes = get_conversation_cache_config()["max_bytes"]
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[Tuple[str, str], Tuple[Dict[str, Any], int]]" = OrderedDict()
+        self._bytes = 0
+        self._generations: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _remove(self, key: Tuple[str, str]):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._bytes -= entry[1]
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and self._entries:
+            _, (_, size) = self._entries.popitem(last=False)
+            self._bytes -= size
+
+    def _bump(self, conversation_id: str):
+        self._generations[conversation_id] = self._generations.get(conversation_id, 0) + 1
+
+    def generation(self, conversation_id: str) -> int:
+        """Take before reading from the backend; pass to put()."""
+        with self._lock:
+            return self._generations.get(conversation_id, 0)
+
+    def get(self, conversation_id: str, view: str) -> Optional[Dict[str, Any]]:
+        """A copy of the cached conversation, or None."""
+        if not self.enabled:
+            return None
+        key = (conversation_id, view)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return _copy(entry[0])
+
+    def put(self, conversation: Dict[str, Any], view: str, generation: int):
+        """Cache a conversation read from the backend, unless it was written since `generation`."""
+        if not self.enabled:
+            return
+        size = estimate_size(conversation)
+        if size > self.max_bytes:
+            return
+        key = (conversation["id"], view)
+        with self._lock:
+            if self._generations.get(conversation["id"], 0) != generation:
+                return
+            self._remove(key)
+            self._entries[key] = (_copy(conversation), size)
+            self._bytes += size
+            self._evict()
+
+    def append(self, conversation_id: str, messages: List[Dict[str, Any]], title: Optional[str] = None):
+        """Apply messages appended to (and a title set on) a conversation in the backend."""
+        with self._lock:
+            self._bump(conversation_id)
+            for view in VIEWS:
+                key = (conversation_id, view)
+                entry = self._entries.get(key)
+                if entry is None:
+                    continue
+                conversation, size = entry
+                added = messages if view == "full" else [summarize(m) for m in messages]
+                conversation["messages"].extend(added)
+                if title is not None:
+                    conversation["title"] = title
+                grown = estimate_size(added) if added else 0
+                self._entries[key] = (conversation, size + grown)
+                self._bytes += grown
+            self._evict()
+
+    def invalidate(self, conversation_id: str):
+        """Drop a conversation whose stored form changed in some other way."""
+        with self._lock:
+            self._bump(conversation_id)
+            for view in VIEWS:
+                self._remove((conversation_id, view))
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Global singleton instance
+conversation_cache = ConversationCache()
@@ -1,7 +1,10 @@
-"""Database configuration with flag-based PostgreSQL/MySQL selection."""
+"""Database configuration with flag-based PostgreSQL/MySQL/SQLite selection."""
 
 import os
-from sqlalchemy import create_engine
+import threading
+from contextlib import nullcontext
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker, declarative_base
 from sqlalchemy.pool import NullPool
 from typing import Literal
@@ -26,7 +29,7 @@ def create_database_engine():
     db_type = config["type"]
     database_url = config["url"]
 
-    if db_type == "json" or not database_url:
+    if db_type in ("json", "jsonl") or not database_url:
         return None
 
     # Create engine based on database type
@@ -43,16 +46,61 @@ def create_database_engine():
             echo=False,
             pool_recycle=3600,  # Recycle connections after 1 hour
         )
+    elif db_type == "sqlite":
+        engine = create_sqlite_engine(database_url)
     else:
         raise ValueError(f"Unsupported database type: {db_type}")
 
     return engine
 
+def create_sqlite_engine(database_url: str):
+    """
+    Create an engine for the embedded SQLite backend.
+
+    WAL mode lets readers proceed while a write is in progress; writers are
+    serialized in-process by write_lock() and across processes by SQLite's
+    busy timeout. pysqlite keeps a per-connection cache of prepared
+    statements, sized by `cached_statements`.
+    """
+    db_path = make_url(database_url).database
+    if db_path and db_path != ":memory:":
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+
+    engine = create_engine(
+        database_url,
+        echo=False,
+        connect_args={
+            "check_same_thread": False,  # Sessions run on the storage I/O threads
+            "timeout": 30,
+            "cached_statements": 256,
+        },
+    )
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")  # Durable at checkpoints; safe with WAL
+        cursor.execute("PRAGMA busy_timeout=30000")
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+    return engine
+
 # Create engine and session factory
 # This is initialized at module level but depends on config
 engine = None
 SessionLocal = None
 
+# SQLite allows a single writer at a time
+_sqlite_write_lock = threading.RLock()
+
+def write_lock():
+    """Context manager serializing write transactions (only needed for SQLite)."""
+    if engine is not None and engine.dialect.name == "sqlite":
+        return _sqlite_write_lock
+    return nullcontext()
+
 def init_db_engine():
     """Initialize the global engine and session factory."""
     global engine, SessionLocal
@@ -87,7 +135,7 @@ def init_database():
     init_db_engine()
     
     if engine is None:
-        print("Using JSON file storage (DB_TYPE=json)")
+        print(f"Using JSON file storage (DB_TYPE={get_database_config()['type']})")
         return
 
     config = get_database_config()
@@ -98,5 +146,40 @@ def init_database():
 
     # Create all tables
     Base.metadata.create_all(bind=engine)
+    migrate_schema()
+
+    # Move messages out of the legacy JSON column without blocking startup
+    threading.Thread(target=_migrate_legacy_messages, daemon=True).start()
 
     print(f"{config['type'].upper()} database initialized successfully!")
+
+def migrate_schema():
+    """
+    Bring tables created by older versions up to date.
+
+    create_all() does not alter existing tables, so columns added since are
+    added here and backfilled.
+    """
+    columns = {c["name"] for c in inspect(engine).get_columns("conversations")}
+    if "message_count" not in columns:
+        print("Adding conversations.message_count column...")
+        with engine.begin() as conn:
+            conn.execute(text("ALTER TABLE conversations ADD COLUMN message_count INTEGER NOT NULL DEFAULT 0"))
+
+        from .models import Conversation
+        session = SessionLocal()
+        try:
+            for conversation in session.query(Conversation).all():
+                conversation.message_count = len(conversation.messages or [])
+            session.commit()
+        finally:
+            session.close()
+
+def _migrate_legacy_messages():
+    from .sql_storage import migrate_legacy_messages
+    try:
+        migrated = migrate_legacy_messages()
+        if migrated:
+            print(f"Migrated {migrated} conversations to the messages table")
+    except Exception as e:
+        print(f"Message migration stopped (will resume lazily): {e}")
@@ -0,0 +1,191 @@
+"""
+Conversation metadata index for the file-based storage backends.
+
+`_index.jsonl` in the data directory holds one metadata record per
+conversation (id, created_at, title, message_count), kept in an
+append-only log of upserts and deletes so each update is a single small
+write. The log is compacted when it grows well past the number of live
+conversations. If the index is missing or unreadable it is rebuilt by
+scanning the conversation files.
+
+Shared by json_storage and journal_storage, so list_conversations costs one
+read of the index instead of parsing every conversation.
+"""
+
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional
+import logging
+
+from ..config import DATA_DIR
+from . import layout
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILENAME = "_index.jsonl"
+
+
+def conversation_metadata(conversation: Dict[str, Any]) -> Dict[str, Any]:
+    """Index record for a full conversation dict."""
+    return {
+        "id": conversation["id"],
+        "created_at": conversation["created_at"],
+        "title": conversation.get("title", "New Conversation"),
+        "message_count": len(conversation.get("messages", []))
+    }
+
+
+class ConversationIndex:
+    """In-memory view of the on-disk metadata index."""
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._entries: Optional[Dict[str, Dict[str, Any]]] = None
+        self._lines = 0
+        self._stamp = None  # (mtime_ns, size) of the index file we last saw
+
+    @property
+    def path(self) -> str:
+        return os.path.join(DATA_DIR, INDEX_FILENAME)
+
+    def _file_stamp(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_mtime_ns, st.st_size)
+        except OSError:
+            return None
+
+    def _ensure_loaded(self):
+        stamp = self._file_stamp()
+        if self._entries is not None and stamp == self._stamp:
+            return
+        if stamp is None:
+            self.rebuild()
+            return
+        entries, lines = {}, 0
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for raw in f:
+                    raw = raw.strip()
+                    if not raw:
+                        continue
+                    try:
+                        record = json.loads(raw)
+                    except json.JSONDecodeError:
+                        continue
+                    lines += 1
+                    if record.get("deleted"):
+                        entries.pop(record["id"], None)
+                    else:
+                        entries[record["id"]] = record
+        except OSError as e:
+            logger.warning(f"Conversation index unreadable, rebuilding: {e}")
+            self.rebuild()
+            return
+        self._entries, self._lines, self._stamp = entries, lines, stamp
+
+    def _append(self, *records: Dict[str, Any]):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write("".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records))
+        self._lines += len(records)
+        if self._lines > max(100, 2 * len(self._entries)):
+            self._write_all()
+        else:
+            self._stamp = self._file_stamp()
+
+    def _write_all(self):
+        os.makedirs(DATA_DIR, exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in self._entries.values():
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        os.replace(tmp_path, self.path)
+        self._lines = len(self._entries)
+        self._stamp = self._file_stamp()
+
+    def rebuild(self):
+        """Rebuild the index from scratch by scanning the conversation files (both layouts)."""
+        from . import journal_storage
+
+        with self._lock:
+            entries = {}
+            for path in layout.iter_conversation_files():
+                filename = os.path.basename(path)
+                try:
+                    if filename.endswith(".json"):
+                        with open(path, "r") as f:
+                            conversation = json.load(f)
+                    elif filename.endswith(".jsonl") and filename != INDEX_FILENAME:
+                        conversation, _ = journal_storage._fold(path)
+                    else:
+                        continue
+                except Exception as e:
+                    logger.warning(f"Skipping unreadable conversation file {filename}: {e}")
+                    continue
+                if conversation:
+                    # A journal wins over a not-yet-removed legacy file
+                    if conversation["id"] in entries and filename.endswith(".json"):
+                        continue
+                    entries[conversation["id"]] = conversation_metadata(conversation)
+            self._entries = entries
+            self._write_all()
+            logger.info(f"Rebuilt conversation index ({len(entries)} conversations)")
+
+    def get(self, conversation_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            self._ensure_loaded()
+            record = self._entries.get(conversation_id)
+            return dict(record) if record else None
+
+    def upsert(self, record: Dict[str, Any]):
+        with self._lock:
+            self._ensure_loaded()
+            if self._entries.get(record["id"]) == record:
+                return
+            self._entries[record["id"]] = dict(record)
+            self._append(record)
+
+    def upsert_many(self, records: List[Dict[str, Any]]):
+        """Upsert several records with a single append."""
+        with self._lock:
+            self._ensure_loaded()
+            changed = [dict(r) for r in records if self._entries.get(r["id"]) != r]
+            if not changed:
+                return
+            for record in changed:
+                self._entries[record["id"]] = record
+            self._append(*changed)
+
+    def update(self, conversation_id: str, **fields):
+        """Update fields of an existing record ('message_count_delta' increments the count)."""
+        with self._lock:
+            self._ensure_loaded()
+            record = self._entries.get(conversation_id)
+            if record is None:
+                return
+            record = dict(record)
+            delta = fields.pop("message_count_delta", 0)
+            record["message_count"] = record.get("message_count", 0) + delta
+            record.update(fields)
+            self._entries[conversation_id] = record
+            self._append(record)
+
+    def remove(self, conversation_id: str):
+        with self._lock:
+            self._ensure_loaded()
+            if self._entries.pop(conversation_id, None) is not None:
+                self._append({"id": conversation_id, "deleted": True})
+
+    def list(self) -> List[Dict[str, Any]]:
+        """All records, newest first."""
+        with self._lock:
+            self._ensure_loaded()
+            records = [dict(r) for r in self._entries.values()]
+        records.sort(key=lambda x: (x["created_at"], x["id"]), reverse=True)
+        return records
+
+
+# Global singleton instance
+conversation_index = ConversationIndex()
@@ -0,0 +1,465 @@
+"""
+Append-only journal (JSON Lines) storage for conversations.
+
+Each conversation is a `{id}.jsonl` file of operations:
+    {"op": "create", "id": ..., "created_at": ..., "title": ...}
+    {"op": "message", "message": {...}}
+    {"op": "title", "title": ...}
+    {"op": "snapshot", "conversation": {...}}   (full replacement; older journals)
+
+Appending a message or title is a single O(1) write. Reads fold the journal
+into the usual conversation dict and never write anything: readers such as
+the search index rebuild or an export run outside the per-conversation locks
+of storage.aio, and a rewrite there could drop a concurrent append.
+
+Compaction (one create line plus one line per message) happens on the write
+path instead. Full saves write a compacted journal. Each fold records the
+journal's size and the size of its live lines (create and messages; title
+changes, superseded snapshots and torn lines are dead) and appends keep that
+record current, so after an append a journal larger than
+JOURNAL_COMPACT_RATIO times its live size is rewritten without replaying it
+just to decide. Legacy `{id}.json` files are read as they are and migrated
+by the first write.
+
+Select with DB_TYPE=jsonl.
+"""
+
+import json
+import os
+import tempfile
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Tuple
+from ..config import get_journal_config
+from .json_storage import ensure_data_dir, write_files, imported_conversation
+from .index import conversation_index, conversation_metadata
+from .pagination import paginate_records
+from .messages import user_message, assistant_message, error_message
+from .payloads import payload_files, payload_ref, summarize
+from . import layout
+
+
+def get_journal_path(conversation_id: str) -> str:
+    """Get the journal file path for a conversation (in the configured layout, see layout.py)."""
+    return layout.conversation_path(conversation_id, ".jsonl")
+
+
+# Journal path -> (size in bytes, bytes of live lines), as of its last fold or append
+_journal_sizes: Dict[str, Tuple[int, int]] = {}
+MAX_TRACKED_JOURNALS = 10000
+
+
+def _track(path: str, size: int, live: int):
+    if path not in _journal_sizes and len(_journal_sizes) >= MAX_TRACKED_JOURNALS:
+        _journal_sizes.clear()
+    _journal_sizes[path] = (size, live)
+
+
+def _locate(conversation_id: str) -> Optional[str]:
+    """
+    Path of an existing journal (migrating a legacy .json file), or None.
+    Only for write paths (callers hold the conversation's storage.aio lock).
+    """
+    path = layout.locate(conversation_id, ".jsonl")
+    if path is None and _migrate_legacy(conversation_id):
+        path = get_journal_path(conversation_id)
+    return path
+
+
+def _append(conversation_id: str, *ops: Dict[str, Any]):
+    """Append operations to a conversation journal, then compact it if it is mostly dead lines."""
+    path = get_journal_path(conversation_id)
+    lines = [(json.dumps(op, ensure_ascii=False) + "\n").encode("utf-8") for op in ops]
+    data = b"".join(lines)
+    # Start on a fresh line if a previous append was torn mid-line
+    with open(path, "rb") as f:
+        f.seek(0, os.SEEK_END)
+        size = f.tell()
+        if size > 0:
+            f.seek(-1, os.SEEK_END)
+            if f.read(1) != b"\n":
+                data = b"\n" + data
+    with open(path, "ab") as f:
+        f.write(data)
+        f.flush()
+        if get_journal_config()["fsync"]:
+            os.fsync(f.fileno())
+
+    known = _journal_sizes.get(path)
+    if known is None or known[0] != size:
+        return  # Not folded by this process since it last changed; the next read records it
+    live = known[1] + sum(len(line) for op, line in zip(ops, lines) if op["op"] == "message")
+    _track(path, size + len(data), live)
+    if size + len(data) > get_journal_config()["compact_ratio"] * live:
+        conversation, _ = _fold(path)
+        if conversation is not None:
+            _write_compacted(conversation)
+
+
+def _write_compacted(conversation: Dict[str, Any]):
+    """Rewrite a journal in canonical form (atomic replace)."""
+    path = get_journal_path(conversation["id"])
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{conversation['id']}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for op in _canonical_ops(conversation):
+                f.write((json.dumps(op, ensure_ascii=False) + "\n").encode("utf-8"))
+            f.flush()
+            os.fsync(f.fileno())
+            size = f.tell()
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    _track(path, size, size)
+
+
+def _canonical_ops(conversation: Dict[str, Any]) -> List[Dict[str, Any]]:
+    ops = [{
+        "op": "create",
+        "id": conversation["id"],
+        "created_at": conversation["created_at"],
+        "title": conversation.get("title", "New Conversation")
+    }]
+    ops.extend({"op": "message", "message": m} for m in conversation.get("messages", []))
+    return ops
+
+
+def _fold(path: str) -> Tuple[Optional[Dict[str, Any]], int]:
+    """
+    Replay a journal, recording its size and live size for the compaction check.
+
+    Returns:
+        (conversation dict or None, bytes of live lines)
+    """
+    conversation = None
+    size = live = 0
+    with open(path, "rb") as f:
+        for raw in f:
+            size += len(raw)
+            line = raw.strip()
+            if not line:
+                continue
+            try:
+                op = json.loads(line)
+            except ValueError:
+                # A torn final line from an interrupted append; ignore it
+                continue
+            kind = op.get("op")
+            if kind == "create":
+                conversation = {
+                    "id": op["id"],
+                    "created_at": op["created_at"],
+                    "title": op.get("title", "New Conversation"),
+                    "messages": []
+                }
+                live = len(raw)
+            elif kind == "snapshot":
+                conversation = dict(op["conversation"])
+                conversation["messages"] = list(conversation.get("messages", []))
+                live = len(raw)
+            elif conversation is None:
+                continue
+            elif kind == "message":
+                conversation["messages"].append(op["message"])
+                live += len(raw)
+            elif kind == "title":
+                conversation["title"] = op["title"]
+
+    if conversation is None:
+        return None, 0
+    _track(path, size, live)
+    return conversation, live
+
+
+def _migrate_legacy(conversation_id: str) -> bool:
+    """Convert a legacy {id}.json file into a journal. Returns True if migrated."""
+    legacy_path = layout.locate(conversation_id, ".json")
+    if legacy_path is None:
+        return False
+    with open(legacy_path, "r") as f:
+        conversation = json.load(f)
+    _write_compacted(conversation)
+    os.remove(legacy_path)
+    conversation_index.upsert(conversation_metadata(conversation))
+    return True
+
+
+def create_conversation(conversation_id: str) -> Dict[str, Any]:
+    """
+    Create a new conversation.
+
+    Args:
+        conversation_id: Unique identifier for the conversation
+
+    Returns:
+        New conversation dict
+    """
+    ensure_data_dir()
+
+    conversation = {
+        "id": conversation_id,
+        "created_at": datetime.utcnow().isoformat(),
+        "title": "New Conversation",
+        "messages": []
+    }
+    _write_compacted(conversation)
+    conversation_index.upsert(conversation_metadata(conversation))
+    return conversation
+
+
+def _load_stored(conversation_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Fold a journal as stored (large stage payloads left as stubs), or read a
+    legacy .json file as it is. Never writes: files are migrated by writes.
+    """
+    # A write may move or migrate the file between finding and opening it
+    for _ in range(2):
+        try:
+            path = layout.find(conversation_id, ".jsonl")
+            if path is not None:
+                conversation, _ = _fold(path)
+                return conversation
+            path = layout.find(conversation_id, ".json")
+            if path is None:
+                return None
+            with open(path, "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            continue
+    return None
+
+
+def get_conversation(conversation_id: str, view: str = "full") -> Optional[Dict[str, Any]]:
+    """
+    Load a conversation by folding its journal.
+
+    Args:
+        conversation_id: Unique identifier for the conversation
+        view: "full" for complete messages, "summary" to leave out stage
+              details (side records are not read)
+
+    Returns:
+        Conversation dict or None if not found
+    """
+    conversation = _load_stored(conversation_id)
+    if conversation is None:
+        return None
+
+    if view == "summary":
+        conversation["messages"] = [summarize(m) for m in conversation["messages"]]
+    else:
+        conversation["messages"] = [payload_files.unpack(conversation_id, m) for m in conversation["messages"]]
+    return conversation
+
+
+def save_conversation(conversation: Dict[str, Any]):
+    """
+    Save a conversation to storage (rewrites the journal compacted).
+
+    Args:
+        conversation: Conversation dict to save
+    """
+    ensure_data_dir()
+    conversation_id = conversation["id"]
+    conversation = dict(conversation)
+    conversation["messages"] = [payload_files.pack(conversation_id, m) for m in conversation.get("messages", [])]
+    # Moves a journal left in the other layout into place, so it cannot go stale
+    _locate(conversation_id)
+    _write_compacted(conversation)
+    conversation_index.upsert(conversation_metadata(conversation))
+    payload_files.retain(conversation_id, filter(None, map(payload_ref, conversation["messages"])))
+
+
+def get_messages(conversation_id: str, start: int = 0, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Read a range of messages by position.
+
+    Args:
+        conversation_id: Conversation identifier
+        start: Index of the first message
+        limit: Maximum number of messages (None for all remaining)
+
+    Returns:
+        List of message dicts, or None if the conversation does not exist
+    """
+    conversation = _load_stored(conversation_id)
+    if conversation is None:
+        return None
+    messages = conversation["messages"][start:]
+    if limit is not None:
+        messages = messages[:limit]
+    return [payload_files.unpack(conversation_id, m) for m in messages]
+
+
+def list_conversations() -> List[Dict[str, Any]]:
+    """
+    List all conversations (metadata only), newest first.
+
+    Served from the metadata index; legacy .json files are listed from it
+    too and migrated when first written.
+
+    Returns:
+        List of conversation metadata dicts
+    """
+    ensure_data_dir()
+    return conversation_index.list()
+
+
+def list_conversations_page(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    title_prefix: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    List one page of conversations (metadata only), newest first.
+
+    Args:
+        limit: Maximum number of conversations (None for all)
+        cursor: Opaque cursor returned with the previous page
+        title_prefix: Case-insensitive title prefix filter
+
+    Returns:
+        (list of conversation metadata dicts, cursor for the next page or None)
+    """
+    ensure_data_dir()
+    return paginate_records(conversation_index.list(), limit, cursor, title_prefix)
+
+
+def _require(conversation_id: str):
+    if _locate(conversation_id) is None:
+        raise ValueError(f"Conversation {conversation_id} not found")
+
+
+def add_user_message(conversation_id: str, content: str):
+    """
+    Add a user message to a conversation.
+
+    Args:
+        conversation_id: Conversation identifier
+        content: User message content
+    """
+    _require(conversation_id)
+    _append(conversation_id, {"op": "message", "message": user_message(content)})
+    conversation_index.update(conversation_id, message_count_delta=1)
+
+
+def add_assistant_message(
+    conversation_id: str,
+    stage1: List[Dict[str, Any]],
+    stage2: Optional[List[Dict[str, Any]]] = None,
+    stage3: Optional[Dict[str,Any]] = None,
+    metadata: Optional[Dict[str, Any]] = None
+):
+    """
+    Add an assistant message to a conversation.
+
+    Args:
+        conversation_id: Conversation identifier
+        stage1: List of individual model responses (always present)
+        stage2: List of model rankings (None if execution_mode was 'chat_only')
+        stage3: Final synthesized response (None if execution_mode was not 'full')
+        metadata: Optional metadata including execution_mode, label_to_model, etc.
+    """
+    _require(conversation_id)
+    message = payload_files.pack(conversation_id, assistant_message(stage1, stage2, stage3, metadata))
+    _append(conversation_id, {"op": "message", "message": message})
+    conversation_index.update(conversation_id, message_count_delta=1)
+
+
+def add_error_message(conversation_id: str, error_text: str):
+    """
+    Add an error message to a conversation to record a failed turn.
+
+    Args:
+        conversation_id: Conversation identifier
+        error_text: The error description
+    """
+    _require(conversation_id)
+    _append(conversation_id, {"op": "message", "message": error_message(error_text)})
+    conversation_index.update(conversation_id, message_count_delta=1)
+
+
+def append_messages(conversation_id: str, messages: List[Dict[str, Any]], title: Optional[str] = None):
+    """
+    Append several messages (and optionally a title change) in one write.
+
+    Args:
+        conversation_id: Conversation identifier
+        messages: Message dicts to append, in order
+        title: New title, or None to keep the current one
+    """
+    _require(conversation_id)
+    ops = [{"op": "message", "message": payload_files.pack(conversation_id, m)} for m in messages]
+    if title is not None:
+        ops.append({"op": "title", "title": title})
+    if not ops:
+        return
+    _append(conversation_id, *ops)
+    fields = {"message_count_delta": len(messages)}
+    if title is not None:
+        fields["title"] = title
+    conversation_index.update(conversation_id, **fields)
+
+
+def update_conversation_title(conversation_id: str, title: str):
+    """
+    Update the title of a conversation.
+
+    Args:
+        conversation_id: Conversation identifier
+        title: New title for the conversation
+    """
+    _require(conversation_id)
+    _append(conversation_id, {"op": "title", "title": title})
+    conversation_index.update(conversation_id, title=title)
+
+
+def delete_conversation(conversation_id: str) -> bool:
+    """
+    Delete a conversation.
+
+    Args:
+        conversation_id: Conversation identifier
+
+    Returns:
+        True if deleted, False if not found
+    """
+    deleted = layout.remove(conversation_id, ".jsonl")
+    deleted = layout.remove(conversation_id, ".json") or deleted
+    payload_files.delete_conversation(conversation_id)
+    conversation_index.remove(conversation_id)
+    return deleted
+
+
+def import_conversations(conversations: List[Dict[str, Any]], on_conflict: str = "replace") -> List[str]:
+    """
+    Import full conversations, keeping their IDs and created_at.
+
+    Each is written as a compacted journal; the batch is written with
+    write_files() and indexed with one append.
+
+    Args:
+        conversations: Conversation dicts (id, created_at, title, messages)
+        on_conflict: "replace" existing conversations with the same ID, or "skip" them
+
+    Returns:
+        IDs of the conversations written
+    """
+    ensure_data_dir()
+    if on_conflict == "skip":
+        conversations = [c for c in conversations if conversation_index.get(c["id"]) is None]
+    stored = [imported_conversation(c["id"], c) for c in conversations]
+    for conversation in stored:
+        layout.locate(conversation["id"], ".jsonl")
+    write_files([
+        (get_journal_path(c["id"]), "".join(json.dumps(op, ensure_ascii=False) + "\n" for op in _canonical_ops(c)))
+        for c in stored
+    ])
+    for conversation in stored:
+        layout.remove(conversation["id"], ".json")
+        payload_files.retain(conversation["id"], filter(None, map(payload_ref, conversation["messages"])))
+    conversation_index.upsert_many([conversation_metadata(c) for c in stored])
+    return [c["id"] for c in stored]
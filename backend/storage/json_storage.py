@@ -3,9 +3,14 @@
 import json
 import os
 from datetime import datetime
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
 from pathlib import Path
 from ..config import DATA_DIR
+from .index import conversation_index, conversation_metadata
+from .pagination import paginate_records
+from .messages import user_message, assistant_message, error_message
+from .payloads import payload_files, payload_ref, summarize
+from . import layout
 
 
 def ensure_data_dir():
@@ -14,8 +19,55 @@ def ensure_data_dir():
 
 
 def get_conversation_path(conversation_id: str) -> str:
-    """Get the file path for a conversation."""
-    return os.path.join(DATA_DIR, f"{conversation_id}.json")
+    """Get the file path for a conversation (in the configured layout, see layout.py)."""
+    return layout.conversation_path(conversation_id, ".json")
+
+
+def _write_conversation(conversation: Dict[str, Any]):
+    """Write a conversation file crash-safely (fsync'd temp file + atomic rename)."""
+    # Moves a file left in the other layout into place, so it cannot go stale
+    layout.locate(conversation['id'], ".json")
+    path = get_conversation_path(conversation['id'])
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(conversation, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def write_files(files: List[Tuple[str, str]]):
+    """
+    Write several files crash-safely in one pass (used by bulk imports).
+
+    All temp files are written before any is fsync'd, so their writeback
+    overlaps instead of each write waiting for the disk in turn.
+
+    Args:
+        files: (path, text) pairs
+    """
+    for path, text in files:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+            f.write(text)
+    for path, _ in files:
+        fd = os.open(f"{path}.tmp", os.O_RDWR)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+        os.replace(f"{path}.tmp", path)
+
+
+def imported_conversation(conversation_id: str, conversation: Dict[str, Any]) -> Dict[str, Any]:
+    """An imported conversation as stored: known fields only, large payloads packed."""
+    return {
+        "id": conversation_id,
+        "created_at": conversation.get("created_at") or datetime.utcnow().isoformat(),
+        "title": conversation.get("title", "New Conversation"),
+        "messages": [payload_files.pack(conversation_id, m) for m in conversation.get("messages", [])]
+    }
 
 
 def create_conversation(conversation_id: str) -> Dict[str, Any]:
@@ -38,30 +90,51 @@ def create_conversation(conversation_id: str) -> Dict[str, Any]:
     }
 
     # Save to file
-    path = get_conversation_path(conversation_id)
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
+    _write_conversation(conversation)
+    conversation_index.upsert(conversation_metadata(conversation))
 
     return conversation
 
 
-def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
+def _load_stored(conversation_id: str) -> Optional[Dict[str, Any]]:
+    """Load a conversation as stored (large stage payloads left as stubs)."""
+    path = layout.locate(conversation_id, ".json")
+
+    if path is None:
+        return None
+
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+def _store(conversation: Dict[str, Any]):
+    """Write a conversation whose messages are already packed."""
+    ensure_data_dir()
+    _write_conversation(conversation)
+    conversation_index.upsert(conversation_metadata(conversation))
+
+
+def get_conversation(conversation_id: str, view: str = "full") -> Optional[Dict[str, Any]]:
     """
     Load a conversation from storage.
 
     Args:
         conversation_id: Unique identifier for the conversation
+        view: "full" for complete messages, "summary" to leave out stage
+              details (side records are not read)
 
     Returns:
         Conversation dict or None if not found
     """
-    path = get_conversation_path(conversation_id)
-
-    if not os.path.exists(path):
+    conversation = _load_stored(conversation_id)
+    if conversation is None:
         return None
 
-    with open(path, 'r') as f:
-        return json.load(f)
+    if view == "summary":
+        conversation["messages"] = [summarize(m) for m in conversation["messages"]]
+    else:
+        conversation["messages"] = [payload_files.unpack(conversation_id, m) for m in conversation["messages"]]
+    return conversation
 
 
 def save_conversation(conversation: Dict[str, Any]):
@@ -71,40 +144,65 @@ def save_conversation(conversation: Dict[str, Any]):
     Args:
         conversation: Conversation dict to save
     """
-    ensure_data_dir()
+    conversation_id = conversation['id']
+    conversation = dict(conversation)
+    conversation["messages"] = [payload_files.pack(conversation_id, m) for m in conversation.get("messages", [])]
+    _store(conversation)
+    payload_files.retain(conversation_id, filter(None, map(payload_ref, conversation["messages"])))
 
-    path = get_conversation_path(conversation['id'])
-    with open(path, 'w') as f:
-        json.dump(conversation, f, indent=2)
+
+def get_messages(conversation_id: str, start: int = 0, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Read a range of messages by position.
+
+    Args:
+        conversation_id: Conversation identifier
+        start: Index of the first message
+        limit: Maximum number of messages (None for all remaining)
+
+    Returns:
+        List of message dicts, or None if the conversation does not exist
+    """
+    conversation = _load_stored(conversation_id)
+    if conversation is None:
+        return None
+    messages = conversation["messages"][start:]
+    if limit is not None:
+        messages = messages[:limit]
+    return [payload_files.unpack(conversation_id, m) for m in messages]
 
 
 def list_conversations() -> List[Dict[str, Any]]:
     """
-    List all conversations (metadata only).
+    List all conversations (metadata only), newest first.
+
+    Served from the metadata index, so no conversation file is opened.
 
     Returns:
         List of conversation metadata dicts
     """
     ensure_data_dir()
+    return conversation_index.list()
 
-    conversations = []
-    for filename in os.listdir(DATA_DIR):
-        if filename.endswith('.json'):
-            path = os.path.join(DATA_DIR, filename)
-            with open(path, 'r') as f:
-                data = json.load(f)
-                # Return metadata only
-                conversations.append({
-                    "id": data["id"],
-                    "created_at": data["created_at"],
-                    "title": data.get("title", "New Conversation"),
-                    "message_count": len(data["messages"])
-                })
 
-    # Sort by creation time, newest first
-    conversations.sort(key=lambda x: x["created_at"], reverse=True)
+def list_conversations_page(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    title_prefix: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    List one page of conversations (metadata only), newest first.
 
-    return conversations
+    Args:
+        limit: Maximum number of conversations (None for all)
+        cursor: Opaque cursor returned with the previous page
+        title_prefix: Case-insensitive title prefix filter
+
+    Returns:
+        (list of conversation metadata dicts, cursor for the next page or None)
+    """
+    ensure_data_dir()
+    return paginate_records(conversation_index.list(), limit, cursor, title_prefix)
 
 
 def add_user_message(conversation_id: str, content: str):
@@ -115,16 +213,13 @@ def add_user_message(conversation_id: str, content: str):
         conversation_id: Conversation identifier
         content: User message content
     """
-    conversation = get_conversation(conversation_id)
+    conversation = _load_stored(conversation_id)
     if conversation is None:
         raise ValueError(f"Conversation {conversation_id} not found")
 
-    conversation["messages"].append({
-        "role": "user",
-        "content": content
-    })
+    conversation["messages"].append(user_message(content))
 
-    save_conversation(conversation)
+    _store(conversation)
 
 
 def add_assistant_message(
@@ -146,27 +241,13 @@ def add_assistant_message(
         stage3: Final synthesized response (None if execution_mode was not 'full')
         metadata: Optional metadata including execution_mode, label_to_model, etc.
     """
-    conversation = get_conversation(conversation_id)
+    conversation = _load_stored(conversation_id)
     if conversation is None:
         raise ValueError(f"Conversation {conversation_id} not found")
 
-    message = {
-        "role": "assistant",
-        "stage1": stage1,
-    }
-    
-    # Only include stage2 and stage3 if they were executed
-    if stage2 is not None:
-        message["stage2"] = stage2
-    if stage3 is not None:
-        message["stage3"] = stage3
-
-    if metadata:
-        message["metadata"] = metadata
+    conversation["messages"].append(payload_files.pack(conversation_id, assistant_message(stage1, stage2, stage3, metadata)))
 
-    conversation["messages"].append(message)
-
-    save_conversation(conversation)
+    _store(conversation)
 
 
 def add_error_message(conversation_id: str, error_text: str):
@@ -177,21 +258,31 @@ def add_error_message(conversation_id: str, error_text: str):
         conversation_id: Conversation identifier
         error_text: The error description
     """
-    conversation = get_conversation(conversation_id)
+    conversation = _load_stored(conversation_id)
     if conversation is None:
         raise ValueError(f"Conversation {conversation_id} not found")
 
-    message = {
-        "role": "assistant",
-        "content": None,
-        "error": error_text,
-        "stage1": [],
-        "stage2": [],
-        "stage3": None
-    }
+    conversation["messages"].append(error_message(error_text))
+    _store(conversation)
 
-    conversation["messages"].append(message)
-    save_conversation(conversation)
+
+def append_messages(conversation_id: str, messages: List[Dict[str, Any]], title: Optional[str] = None):
+    """
+    Append several messages (and optionally set the title) in one write.
+
+    Args:
+        conversation_id: Conversation identifier
+        messages: Message dicts to append, in order
+        title: New title, or None to keep the current one
+    """
+    conversation = _load_stored(conversation_id)
+    if conversation is None:
+        raise ValueError(f"Conversation {conversation_id} not found")
+
+    conversation["messages"].extend(payload_files.pack(conversation_id, m) for m in messages)
+    if title is not None:
+        conversation["title"] = title
+    _store(conversation)
 
 
 def update_conversation_title(conversation_id: str, title: str):
@@ -202,12 +293,12 @@ def update_conversation_title(conversation_id: str, title: str):
         conversation_id: Conversation identifier
         title: New title for the conversation
     """
-    conversation = get_conversation(conversation_id)
+    conversation = _load_stored(conversation_id)
     if conversation is None:
         raise ValueError(f"Conversation {conversation_id} not found")
 
     conversation["title"] = title
-    save_conversation(conversation)
+    _store(conversation)
 
 
 def delete_conversation(conversation_id: str) -> bool:
@@ -220,10 +311,35 @@ def delete_conversation(conversation_id: str) -> bool:
     Returns:
         True if deleted, False if not found
     """
-    path = get_conversation_path(conversation_id)
-
-    if not os.path.exists(path):
+    if not layout.remove(conversation_id, ".json"):
         return False
 
-    os.remove(path)
+    payload_files.delete_conversation(conversation_id)
+    conversation_index.remove(conversation_id)
     return True
+
+
+def import_conversations(conversations: List[Dict[str, Any]], on_conflict: str = "replace") -> List[str]:
+    """
+    Import full conversations, keeping their IDs and created_at.
+
+    The batch is written with write_files() and indexed with one append.
+
+    Args:
+        conversations: Conversation dicts (id, created_at, title, messages)
+        on_conflict: "replace" existing conversations with the same ID, or "skip" them
+
+    Returns:
+        IDs of the conversations written
+    """
+    ensure_data_dir()
+    if on_conflict == "skip":
+        conversations = [c for c in conversations if conversation_index.get(c["id"]) is None]
+    stored = [imported_conversation(c["id"], c) for c in conversations]
+    for conversation in stored:
+        layout.locate(conversation["id"], ".json")
+    write_files([(get_conversation_path(c["id"]), json.dumps(c, indent=2)) for c in stored])
+    for conversation in stored:
+        payload_files.retain(conversation["id"], filter(None, map(payload_ref, conversation["messages"])))
+    conversation_index.upsert_many([conversation_metadata(c) for c in stored])
+    return [c["id"] for c in stored]
@@ -0,0 +1,195 @@
+"""
+File layout of the JSON storage backends (DB_TYPE=json and jsonl).
+
+    flat:    {DATA_DIR}/{id}.json
+    sharded: {DATA_DIR}/{shard}/{id}.json    shard = first 2 hex digits of md5(id)
+
+Journals ({id}.jsonl) and payload side record directories
+(payloads/{id}/, payloads/{shard}/{id}/) follow the same scheme. With 256
+shards a directory holds ~400 entries per 100k conversations instead of
+all of them.
+
+Files are found in either layout, so JSON_LAYOUT can be switched at any
+time: a conversation file left in the other layout is moved into place
+when it is first accessed (payload files are read where they are). To move
+everything at once, stop the app and run:
+
+    python -m backend.storage migrate-layout
+"""
+
+import hashlib
+import os
+import re
+import shutil
+from typing import Iterator, List, Optional, Tuple
+
+from ..config import DATA_DIR, get_json_layout_config
+
+SHARD_PATTERN = re.compile(r"^[0-9a-f]{2}$")
+CONVERSATION_EXTENSIONS = (".json", ".jsonl")
+
+
+def shard(conversation_id: str) -> str:
+    return hashlib.md5(conversation_id.encode("utf-8")).hexdigest()[:2]
+
+
+def is_sharded() -> bool:
+    return get_json_layout_config()["layout"] == "sharded"
+
+
+def conversation_path(conversation_id: str, extension: str, sharded: Optional[bool] = None) -> str:
+    """Path of a conversation file in the configured (or the given) layout."""
+    if sharded is None:
+        sharded = is_sharded()
+    name = f"{conversation_id}{extension}"
+    if sharded:
+        return os.path.join(DATA_DIR, shard(conversation_id), name)
+    return os.path.join(DATA_DIR, name)
+
+
+def candidate_paths(conversation_id: str, extension: str) -> List[str]:
+    """The file's path in the configured layout, then in the other one."""
+    sharded = is_sharded()
+    return [
+        conversation_path(conversation_id, extension, sharded),
+        conversation_path(conversation_id, extension, not sharded)
+    ]
+
+
+def locate(conversation_id: str, extension: str) -> Optional[str]:
+    """
+    Find a conversation file, moving it into the configured layout if it is
+    in the other one.
+
+    Returns:
+        Its path, or None if the conversation has no such file
+    """
+    path, other = candidate_paths(conversation_id, extension)
+    if os.path.exists(path):
+        return path
+    if os.path.exists(other):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(other, path)
+        return path
+    return None
+
+
+def find(conversation_id: str, extension: str) -> Optional[str]:
+    """Find a conversation file in either layout without moving it (for readers)."""
+    for path in candidate_paths(conversation_id, extension):
+        if os.path.exists(path):
+            return path
+    return None
+
+
+def remove(conversation_id: str, extension: str) -> bool:
+    """Delete a conversation file in both layouts. Returns True if one existed."""
+    removed = False
+    for path in candidate_paths(conversation_id, extension):
+        if os.path.exists(path):
+            os.remove(path)
+            removed = True
+    return removed
+
+
+def payload_dirs(conversation_id: str) -> List[str]:
+    """A conversation's payload directory in the configured layout, then in the other one."""
+    flat = os.path.join(DATA_DIR, "payloads", conversation_id)
+    sharded = os.path.join(DATA_DIR, "payloads", shard(conversation_id), conversation_id)
+    return [sharded, flat] if is_sharded() else [flat, sharded]
+
+
+def iter_conversation_files() -> Iterator[str]:
+    """Paths of all .json/.jsonl files at the top level and in shard directories."""
+    if not os.path.isdir(DATA_DIR):
+        return
+    with os.scandir(DATA_DIR) as entries:
+        for entry in entries:
+            if entry.is_dir() and SHARD_PATTERN.match(entry.name):
+                with os.scandir(entry.path) as shard_entries:
+                    for shard_entry in shard_entries:
+                        if shard_entry.name.endswith(CONVERSATION_EXTENSIONS):
+                            yield shard_entry.path
+            elif entry.name.endswith(CONVERSATION_EXTENSIONS):
+                yield entry.path
+
+
+def _iter_payload_dirs() -> Iterator[Tuple[str, str]]:
+    """(conversation_id, path) of every payload directory in both layouts."""
+    root = os.path.join(DATA_DIR, "payloads")
+    if not os.path.isdir(root):
+        return
+    with os.scandir(root) as entries:
+        for entry in entries:
+            if not entry.is_dir():
+                continue
+            if SHARD_PATTERN.match(entry.name):
+                with os.scandir(entry.path) as shard_entries:
+                    for shard_entry in shard_entries:
+                        if shard_entry.is_dir():
+                            yield shard_entry.name, shard_entry.path
+            else:
+                yield entry.name, entry.path
+
+
+def _remove_empty_shards(root: str):
+    if not os.path.isdir(root):
+        return
+    for name in os.listdir(root):
+        path = os.path.join(root, name)
+        if SHARD_PATTERN.match(name) and os.path.isdir(path) and not os.listdir(path):
+            os.rmdir(path)
+
+
+def migrate(sharded: Optional[bool] = None) -> Tuple[int, int]:
+    """
+    Move every conversation file and payload directory into one layout.
+
+    Meant to run offline (app stopped). If a file exists in both layouts,
+    the copy already in the target layout wins: it was written last.
+
+    Args:
+        sharded: Target layout (default: the configured one)
+
+    Returns:
+        (conversation files moved, payload directories moved)
+    """
+    from .index import INDEX_FILENAME
+
+    if sharded is None:
+        sharded = is_sharded()
+
+    files = 0
+    for path in list(iter_conversation_files()):
+        name = os.path.basename(path)
+        if name == INDEX_FILENAME:
+            continue
+        conversation_id, extension = os.path.splitext(name)
+        target = conversation_path(conversation_id, extension, sharded)
+        if path == target:
+            continue
+        if os.path.exists(target):
+            os.remove(path)
+            continue
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        os.replace(path, target)
+        files += 1
+
+    directories = 0
+    for conversation_id, path in list(_iter_payload_dirs()):
+        flat = os.path.join(DATA_DIR, "payloads", conversation_id)
+        target = os.path.join(DATA_DIR, "payloads", shard(conversation_id), conversation_id) if sharded else flat
+        if path == target:
+            continue
+        os.makedirs(target, exist_ok=True)
+        for name in os.listdir(path):
+            if not os.path.exists(os.path.join(target, name)):
+                os.replace(os.path.join(path, name), os.path.join(target, name))
+        shutil.rmtree(path, ignore_errors=True)
+        directories += 1
+
+    if not sharded:
+        _remove_empty_shards(DATA_DIR)
+        _remove_empty_shards(os.path.join(DATA_DIR, "payloads"))
+    return files, directories
+
@@ -0,0 +1,48 @@
+"""Message dicts as stored by every storage backend."""
+
+from typing import Any, Dict, List, Optional
+
+
+def user_message(content: str) -> Dict[str, Any]:
+    """A user turn."""
+    return {
+        "role": "user",
+        "content": content
+    }
+
+
+def assistant_message(
+    stage1: List[Dict[str, Any]],
+    stage2: Optional[List[Dict[str, Any]]] = None,
+    stage3: Optional[Dict[str, Any]] = None,
+    metadata: Optional[Dict[str, Any]] = None
+) -> Dict[str, Any]:
+    """
+    A council answer.
+
+    stage2 and stage3 are only included if they were executed (partial
+    execution modes leave them as None).
+    """
+    message = {
+        "role": "assistant",
+        "stage1": stage1,
+    }
+    if stage2 is not None:
+        message["stage2"] = stage2
+    if stage3 is not None:
+        message["stage3"] = stage3
+    if metadata:
+        message["metadata"] = metadata
+    return message
+
+
+def error_message(error_text: str) -> Dict[str, Any]:
+    """An assistant turn recording a failure."""
+    return {
+        "role": "assistant",
+        "content": None,
+        "error": error_text,
+        "stage1": [],
+        "stage2": [],
+        "stage3": None
+    }
@@ -1,6 +1,7 @@
-"""SQLAlchemy models for PostgreSQL and MySQL."""
+"""SQLAlchemy models for PostgreSQL, MySQL and SQLite."""
 
-from sqlalchemy import Column, String, Text, DateTime, JSON, Index
+from sqlalchemy import Column, String, Text, DateTime, JSON, Index, Integer, ForeignKey, LargeBinary
+from sqlalchemy.dialects import mysql
 from sqlalchemy.sql import func
 from .database import Base
 
@@ -21,11 +22,13 @@ class Conversation(Base):
     updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
     title = Column(String(500), nullable=False, default="New Conversation")
 
-    # Messages stored as JSON
-    # PostgreSQL: Uses native JSONB (faster)
-    # MySQL: Uses JSON type (MySQL 5.7.8+)
+    # Legacy: messages stored as one JSON list. Messages now live in the
+    # `messages` table; this column is emptied when a conversation is migrated.
     messages = Column(JSON, nullable=False, default=list)
 
+    # Kept in sync with len(messages) so listing never has to load them
+    message_count = Column(Integer, nullable=False, default=0, server_default="0")
+
     # Indexes for performance
     __table_args__ = (
         Index("idx_created_at", "created_at"),
@@ -44,3 +47,87 @@ class Conversation(Base):
 
     def __repr__(self):
         return f"<Conversation(id={self.id}, title={self.title}, messages={len(self.messages or [])})>"
+
+
+# Message fields stored in dedicated columns; anything else goes to `extra`
+MESSAGE_COLUMNS = ("role", "content", "error", "stage1", "stage2", "stage3", "metadata")
+
+
+class Message(Base):
+    """
+    One message of a conversation, keyed by (conversation_id, seq).
+
+    Messages are append-only inserts, so adding one costs the same regardless
+    of conversation length, and ranges can be read by seq.
+    """
+
+    __tablename__ = "messages"
+
+    conversation_id = Column(
+        String(36), ForeignKey("conversations.id", ondelete="CASCADE"), primary_key=True
+    )
+    seq = Column(Integer, primary_key=True, autoincrement=False)
+
+    role = Column(String(20), nullable=False)
+    content = Column(Text, nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Stage payloads of assistant messages
+    stage1 = Column(JSON, nullable=True)
+    stage2 = Column(JSON, nullable=True)
+    stage3 = Column(JSON, nullable=True)
+    message_metadata = Column("metadata", JSON, nullable=True)  # `metadata` is reserved by SQLAlchemy
+
+    # Unknown keys, plus keys explicitly set to None (so dicts round-trip exactly)
+    extra = Column(JSON, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    @classmethod
+    def from_dict(cls, conversation_id: str, seq: int, message: dict) -> "Message":
+        """Build a row from a message dict."""
+        row = cls(conversation_id=conversation_id, seq=seq, role=message.get("role", "user"))
+        extra = {}
+        for key, value in message.items():
+            if key == "role":
+                continue
+            if key in MESSAGE_COLUMNS and value is not None:
+                setattr(row, "message_metadata" if key == "metadata" else key, value)
+            else:
+                extra[key] = value
+        row.extra = extra or None
+        return row
+
+    def to_dict(self) -> dict:
+        """Convert row back to the message dict it was built from."""
+        message = {"role": self.role}
+        for key in MESSAGE_COLUMNS[1:]:
+            value = getattr(self, "message_metadata" if key == "metadata" else key)
+            if value is not None:
+                message[key] = value
+        if self.extra:
+            message.update(self.extra)
+        return message
+
+    def __repr__(self):
+        return f"<Message(conversation_id={self.conversation_id}, seq={self.seq}, role={self.role})>"
+
+
+class MessagePayload(Base):
+    """
+    Compressed stage payload split out of a large assistant message.
+
+    The message row keeps a stub with a `payload` ref (see payloads.py);
+    full reads join it back, summary reads skip this table.
+    """
+
+    __tablename__ = "message_payloads"
+
+    ref = Column(String(36), primary_key=True)  # UUID
+    conversation_id = Column(
+        String(36), ForeignKey("conversations.id", ondelete="CASCADE"), nullable=False, index=True
+    )
+    data = Column(LargeBinary().with_variant(mysql.LONGBLOB(), "mysql"), nullable=False)  # gzip'd JSON
+
+    def __repr__(self):
+        return f"<MessagePayload(ref={self.ref}, conversation_id={self.conversation_id}, bytes={len(self.data or b'')})>"
@@ -0,0 +1,73 @@
+"""
+Cursor pagination shared by the storage backends.
+
+Conversations are listed newest first, ordered by (created_at, id)
+descending. A cursor is the opaque, URL-safe base64 encoding of the
+(created_at, id) of the last item on the previous page; the next page starts
+strictly after it, so inserts and deletes between requests never cause
+duplicates or skipped rows.
+"""
+
+import base64
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def encode_cursor(created_at: str, conversation_id: str) -> str:
+    """Encode the position of a conversation as an opaque cursor."""
+    raw = json.dumps({"created_at": created_at, "id": conversation_id}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """
+    Decode a cursor produced by encode_cursor.
+
+    Returns:
+        (created_at, id)
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        data = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        return str(data["created_at"]), str(data["id"])
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def paginate_records(
+    records: List[Dict[str, Any]],
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    title_prefix: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Apply filtering and cursor pagination to in-memory metadata records.
+
+    Args:
+        records: Conversation metadata dicts (any order)
+        limit: Maximum number of items to return (None for all)
+        cursor: Cursor from a previous page
+        title_prefix: Case-insensitive title prefix filter
+
+    Returns:
+        (page of records, cursor for the next page or None)
+    """
+    if title_prefix:
+        prefix = title_prefix.lower()
+        records = [r for r in records if (r.get("title") or "").lower().startswith(prefix)]
+
+    records = sorted(records, key=lambda r: (r["created_at"], r["id"]), reverse=True)
+
+    if cursor:
+        position = decode_cursor(cursor)
+        records = [r for r in records if (r["created_at"], r["id"]) < position]
+
+    if limit is None or len(records) <= limit:
+        return records, None
+
+    page = records[:limit]
+    last = page[-1]
+    return page, encode_cursor(last["created_at"], last["id"])
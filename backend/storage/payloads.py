@@ -0,0 +1,160 @@
+"""
+Compressed side records for large stage payloads.
+
+An assistant message's Stage 1 responses, Stage 2 rankings and metadata
+(which holds the search context) are usually most of a conversation's
+size, yet the UI only expands one turn at a time. When they are large,
+they are stored gzip-compressed outside the message, which keeps a stub:
+
+    {"role": "assistant", "stage3": {...},
+     "summary": {...},
+     "payload": {"ref": "<uuid>", "bytes": 51234, "stored_bytes": 9120}}
+
+Full reads merge the payload back in; summary reads never touch it.
+PayloadFiles stores side records for the JSON backends; the SQL backends
+keep them in the message_payloads table.
+"""
+
+import gzip
+import json
+import os
+import shutil
+import uuid
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from ..config import get_payload_config
+from . import layout
+
+PAYLOAD_KEYS = ("stage1", "stage2", "metadata")
+
+
+def compress(payload: Dict[str, Any]) -> bytes:
+    return gzip.compress(json.dumps(payload, ensure_ascii=False).encode("utf-8"), compresslevel=6)
+
+
+def decompress(blob: bytes) -> Dict[str, Any]:
+    return json.loads(gzip.decompress(blob).decode("utf-8"))
+
+
+def message_summary(message: Dict[str, Any]) -> Dict[str, Any]:
+    """What the lightweight view shows about a turn's stage details."""
+    if "summary" in message:
+        return message["summary"]
+    stage1 = message.get("stage1") or []
+    metadata = message.get("metadata") or {}
+    return {
+        "stage1_models": [r.get("model") for r in stage1 if isinstance(r, dict)],
+        "stage2_count": len(message.get("stage2") or []),
+        "has_search_context": bool(metadata.get("search_context")),
+    }
+
+
+def pack(message: Dict[str, Any]) -> Tuple[Dict[str, Any], Optional[str], Optional[bytes]]:
+    """
+    Split a message's large stage payload into a side record.
+
+    Returns:
+        (message to store, payload ref or None, compressed payload or None).
+        Small or non-assistant messages are returned unchanged.
+    """
+    config = get_payload_config()
+    if not config["enabled"] or message.get("role") != "assistant" or "payload" in message:
+        return message, None, None
+
+    payload = {k: message[k] for k in PAYLOAD_KEYS if k in message}
+    if not payload:
+        return message, None, None
+    raw_size = len(json.dumps(payload, ensure_ascii=False).encode("utf-8"))
+    if raw_size < config["min_bytes"]:
+        return message, None, None
+
+    blob = compress(payload)
+    ref = str(uuid.uuid4())
+    stub = {k: v for k, v in message.items() if k not in PAYLOAD_KEYS}
+    stub["summary"] = message_summary(message)
+    stub["payload"] = {"ref": ref, "bytes": raw_size, "stored_bytes": len(blob)}
+    return stub, ref, blob
+
+
+def unpack(stub: Dict[str, Any], blob: Optional[bytes]) -> Dict[str, Any]:
+    """Merge a side record back into its stub (returns the original message)."""
+    if "payload" not in stub:
+        return stub
+    message = {k: v for k, v in stub.items() if k not in ("payload", "summary")}
+    if blob is not None:
+        message.update(decompress(blob))
+    return message
+
+
+def payload_ref(message: Dict[str, Any]) -> Optional[str]:
+    payload = message.get("payload")
+    return payload.get("ref") if isinstance(payload, dict) else None
+
+
+def summarize(message: Dict[str, Any]) -> Dict[str, Any]:
+    """Lightweight view of a stored or full message."""
+    if message.get("role") != "assistant" or "error" in message:
+        return message
+    view = {k: v for k, v in message.items() if k not in PAYLOAD_KEYS and k != "payload"}
+    view["summary"] = message_summary(message)
+    return view
+
+
+class PayloadFiles:
+    """
+    Side records as files: {DATA_DIR}/payloads/[{shard}/]{conversation_id}/{ref}.json.gz
+
+    New records go to the directory of the configured layout (layout.py);
+    records in the other layout's directory are still read and cleaned up.
+    """
+
+    def write(self, conversation_id: str, ref: str, blob: bytes):
+        directory = layout.payload_dirs(conversation_id)[0]
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f"{ref}.json.gz")
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(blob)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+
+    def read(self, conversation_id: str, ref: str) -> Optional[bytes]:
+        for directory in layout.payload_dirs(conversation_id):
+            try:
+                with open(os.path.join(directory, f"{ref}.json.gz"), "rb") as f:
+                    return f.read()
+            except OSError:
+                continue
+        return None
+
+    def retain(self, conversation_id: str, refs: Iterable[str]):
+        """Delete side records no longer referenced by the conversation."""
+        keep = {f"{ref}.json.gz" for ref in refs}
+        for directory in layout.payload_dirs(conversation_id):
+            if not os.path.isdir(directory):
+                continue
+            for name in os.listdir(directory):
+                if name not in keep:
+                    os.remove(os.path.join(directory, name))
+
+    def delete_conversation(self, conversation_id: str):
+        for directory in layout.payload_dirs(conversation_id):
+            shutil.rmtree(directory, ignore_errors=True)
+
+    def pack(self, conversation_id: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Pack a message, writing its side record if one is split out."""
+        stub, ref, blob = pack(message)
+        if ref is not None:
+            self.write(conversation_id, ref, blob)
+        return stub
+
+    def unpack(self, conversation_id: str, message: Dict[str, Any]) -> Dict[str, Any]:
+        ref = payload_ref(message)
+        if ref is None:
+            return message
+        return unpack(message, self.read(conversation_id, ref))
+
+
+# Global singleton instance
+payload_files = PayloadFiles()
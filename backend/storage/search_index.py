@@ -0,0 +1,306 @@
+"""
+Full-text search over conversation history.
+
+An SQLite FTS5 index (data/search_index.db by default, whatever DB_TYPE
+is) holds one row per searchable text: conversation titles, user
+questions, chairman answers and Stage 1 responses. The storage facade
+updates it incrementally as messages are written, so searching never
+scans conversation files. If the index is missing it is rebuilt from
+storage in the background at startup.
+
+Results are grouped per conversation (its best-matching text), ranked by
+BM25 and paginated with limit/offset.
+"""
+
+import os
+import re
+import sqlite3
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from ..config import get_search_index_config
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    conversation_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    model TEXT
+);
+CREATE INDEX IF NOT EXISTS ix_docs_conversation ON docs (conversation_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS entries USING fts5(
+    content,
+    tokenize = 'porter unicode61',
+    prefix = '2 3'
+);
+CREATE TABLE IF NOT EXISTS titles (
+    conversation_id TEXT PRIMARY KEY,
+    title TEXT NOT NULL
+);
+"""
+
+
+def build_match_query(text: str) -> Optional[str]:
+    """
+    Turn free text into an FTS5 query: every word must match, the last one
+    as a prefix (so results update while typing). Returns None if the text
+    has no words.
+    """
+    words = re.findall(r"\w+", text.lower())
+    if not words:
+        return None
+    terms = [f'"{w}"' for w in words[:-1]] + [f'"{words[-1]}"*']
+    return " ".join(terms)
+
+
+def message_entries(message: Dict[str, Any]) -> List[Tuple[str, Optional[str], str]]:
+    """Searchable (kind, model, text) entries of a message."""
+    entries = []
+    if message.get("role") == "user":
+        if message.get("content"):
+            entries.append(("question", None, message["content"]))
+        return entries
+
+    stage3 = message.get("stage3") or {}
+    if isinstance(stage3, dict) and stage3.get("response"):
+        entries.append(("answer", stage3.get("model"), stage3["response"]))
+    for result in message.get("stage1") or []:
+        if isinstance(result, dict) and result.get("response") and not result.get("error"):
+            entries.append(("response", result.get("model"), result["response"]))
+    return entries
+
+
+class ConversationSearchIndex:
+    """Incrementally maintained FTS5 index of conversation texts."""
+
+    def __init__(self):
+        self.config = get_search_index_config()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._created = False  # True if the database file did not exist when opened
+
+    @property
+    def enabled(self) -> bool:
+        return self.config["enabled"]
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            path = self.config["path"]
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+            self._created = not os.path.exists(path)
+            conn = sqlite3.connect(path, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _insert(self, conn: sqlite3.Connection, conversation_id: str, rows: List[Tuple[str, Optional[str], str]]):
+        for kind, model, text in rows:
+            doc_id = conn.execute(
+                "INSERT INTO docs (conversation_id, kind, model) VALUES (?, ?, ?)", (conversation_id, kind, model)
+            ).lastrowid
+            conn.execute("INSERT INTO entries (rowid, content) VALUES (?, ?)", (doc_id, text))
+
+    def _delete(self, conn: sqlite3.Connection, conversation_id: str, kind: Optional[str] = None):
+        sql = "SELECT id FROM docs WHERE conversation_id = ?"
+        params = [conversation_id]
+        if kind is not None:
+            sql += " AND kind = ?"
+            params.append(kind)
+        doc_ids = [(row[0],) for row in conn.execute(sql, params)]
+        # One rowid lookup each: FTS5 does not push IN (...) down
+        conn.executemany("DELETE FROM entries WHERE rowid = ?", doc_ids)
+        conn.executemany("DELETE FROM docs WHERE id = ?", doc_ids)
+
+    def _set_title(self, conn: sqlite3.Connection, conversation_id: str, title: str):
+        self._delete(conn, conversation_id, "title")
+        self._insert(conn, conversation_id, [("title", None, title)])
+        conn.execute(
+            "INSERT INTO titles (conversation_id, title) VALUES (?, ?) "
+            "ON CONFLICT(conversation_id) DO UPDATE SET title = excluded.title",
+            (conversation_id, title)
+        )
+
+    def _index_conversation(self, conn: sqlite3.Connection, conversation: Dict[str, Any]):
+        if conversation.get("title"):
+            self._set_title(conn, conversation["id"], conversation["title"])
+        self._insert(conn, conversation["id"], [
+            entry for message in conversation.get("messages", []) for entry in message_entries(message)
+        ])
+
+    def add_messages(self, conversation_id: str, messages: List[Dict[str, Any]]):
+        """Index new messages of a conversation."""
+        if not self.enabled:
+            return
+        rows = [entry for message in messages for entry in message_entries(message)]
+        if not rows:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._insert(conn, conversation_id, rows)
+
+    def set_title(self, conversation_id: str, title: str):
+        if not self.enabled:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._set_title(conn, conversation_id, title)
+
+    def remove_conversation(self, conversation_id: str):
+        if not self.enabled:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._delete(conn, conversation_id)
+                conn.execute("DELETE FROM titles WHERE conversation_id = ?", (conversation_id,))
+
+    def reindex_conversation(self, conversation: Dict[str, Any]):
+        """Replace everything indexed for a conversation (after a full save)."""
+        if not self.enabled:
+            return
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._delete(conn, conversation["id"])
+                conn.execute("DELETE FROM titles WHERE conversation_id = ?", (conversation["id"],))
+                self._index_conversation(conn, conversation)
+
+    def search(self, query: str, limit: int = 20, offset: int = 0) -> Dict[str, Any]:
+        """
+        Search conversations.
+
+        Returns:
+            {"query", "total", "results": [{conversation_id, title, kind,
+            model, snippet, score}]}, best match first
+        """
+        match = build_match_query(query)
+        if not self.enabled or match is None:
+            return {"query": query, "total": 0, "results": []}
+
+        with self._lock:
+            conn = self._connect()
+            # Best entry per conversation; bm25() is lower-is-better
+            hits = conn.execute(
+                """
+                WITH hits AS MATERIALIZED (
+                    SELECT rowid AS doc_id, bm25(entries) AS score
+                    FROM entries WHERE entries MATCH ?
+                )
+                SELECT d.conversation_id, d.id, d.kind, d.model, min(h.score) AS best, count(*) OVER () AS total
+                FROM hits h JOIN docs d ON d.id = h.doc_id
+                GROUP BY d.conversation_id
+                ORDER BY best LIMIT ? OFFSET ?
+                """,
+                (match, limit, offset)
+            ).fetchall()
+            if not hits:
+                total = 0
+                if offset:
+                    total = conn.execute(
+                        "SELECT count(DISTINCT d.conversation_id) FROM entries e JOIN docs d ON d.id = e.rowid "
+                        "WHERE entries MATCH ?",
+                        (match,)
+                    ).fetchone()[0]
+                return {"query": query, "total": total, "results": []}
+
+            # Snippets only for the page, one rowid lookup each
+            snippets = {
+                hit[1]: conn.execute(
+                    "SELECT snippet(entries, 0, '<mark>', '</mark>', '…', 16) FROM entries "
+                    "WHERE entries MATCH ? AND rowid = ?",
+                    (match, hit[1])
+                ).fetchone()
+                for hit in hits
+            }
+            placeholders = ",".join("?" * len(hits))
+            titles = dict(conn.execute(
+                f"SELECT conversation_id, title FROM titles WHERE conversation_id IN ({placeholders})",
+                [h[0] for h in hits]
+            ).fetchall())
+
+        results = []
+        for conversation_id, doc_id, kind, model, score, _ in hits:
+            snippet = snippets.get(doc_id)
+            results.append({
+                "conversation_id": conversation_id,
+                "title": titles.get(conversation_id, "New Conversation"),
+                "kind": kind,
+                "model": model,
+                "snippet": snippet[0] if snippet else "",
+                "score": round(-score, 4),
+            })
+        return {"query": query, "total": hits[0][5], "results": results}
+
+    def needs_rebuild(self) -> bool:
+        """True if the index was just created (e.g. first run or deleted file)."""
+        if not self.enabled:
+            return False
+        with self._lock:
+            self._connect()
+            return self._created
+
+    def rebuild(self, conversations, batch_size: int = 200) -> int:
+        """
+        Rebuild the index from scratch.
+
+        Args:
+            conversations: Iterable of full conversation dicts
+            batch_size: Conversations indexed per transaction
+
+        Returns:
+            Number of conversations indexed
+        """
+        if not self.enabled:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM entries")
+                conn.execute("DELETE FROM docs")
+                conn.execute("DELETE FROM titles")
+
+        count = 0
+        batch = []
+        for conversation in conversations:
+            batch.append(conversation)
+            if len(batch) >= batch_size:
+                count += self.reindex_conversations(batch)
+                batch = []
+        count += self.reindex_conversations(batch)
+
+        with self._lock:
+            self._connect().execute("INSERT INTO entries (entries) VALUES ('optimize')")
+            self._created = False
+        logger.info(f"Rebuilt conversation search index ({count} conversations)")
+        return count
+
+    def reindex_conversations(self, conversations: List[Dict[str, Any]]) -> int:
+        """reindex_conversation() for a batch, in one transaction."""
+        if not self.enabled or not conversations:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                for conversation in conversations:
+                    self._delete(conn, conversation["id"])
+                    self._index_conversation(conn, conversation)
+        return len(conversations)
+
+    def stats(self) -> Dict[str, Any]:
+        if not self.enabled:
+            return {"enabled": False}
+        with self._lock:
+            conn = self._connect()
+            entries = conn.execute("SELECT count(*) FROM docs").fetchone()[0]
+        return {"enabled": True, "entries": entries}
+
+
+# Global singleton instance
+search_index = ConversationSearchIndex()
@@ -1,18 +1,97 @@
-"""SQL-based storage for conversations."""
+"""
+SQL-based storage for conversations (PostgreSQL, MySQL and SQLite).
 
-from typing import List, Dict, Any, Optional
-from datetime import datetime
-from sqlalchemy.orm import Session
-from .database import SessionLocal, init_db_engine
-from .models import Conversation
+Conversation metadata lives in `conversations`; messages are rows of the
+`messages` table keyed by (conversation_id, seq). Conversations written by
+older versions keep their messages in the legacy `conversations.messages`
+JSON column until they are migrated, either lazily on first access or by
+migrate_legacy_messages() running in the background at startup.
+"""
+
+from typing import List, Dict, Any, Optional, Tuple
+from datetime import datetime, timezone
+from sqlalchemy import Text, and_, cast, func, or_, insert
+from sqlalchemy.orm import Session, load_only
+from . import database
+from .models import Conversation, Message, MessagePayload
+from .pagination import encode_cursor, decode_cursor
+from .messages import user_message, assistant_message, error_message
+from .payloads import pack, unpack, payload_ref, summarize
 
 def _get_session() -> Session:
     """Helper to get a new session."""
-    if SessionLocal is None:
-        init_db_engine()
-        if SessionLocal is None:
+    if database.SessionLocal is None:
+        database.init_db_engine()
+        if database.SessionLocal is None:
              raise RuntimeError("Database not initialized")
-    return SessionLocal()
+    return database.SessionLocal()
+
+def _lock_conversation(session: Session, conversation_id: str) -> Optional[Conversation]:
+    """Load a conversation row, locking it until commit (serializes appends)."""
+    return session.query(Conversation).filter(Conversation.id == conversation_id).with_for_update().populate_existing().first()
+
+def _migrate_row(session: Session, db_conversation: Conversation) -> bool:
+    """Move legacy JSON-column messages into the messages table (caller commits)."""
+    legacy = db_conversation.messages or []
+    if not legacy:
+        return False
+    _add_messages(session, db_conversation.id, 0, legacy)
+    db_conversation.messages = []
+    db_conversation.message_count = len(legacy)
+    return True
+
+def _ensure_migrated(session: Session, db_conversation: Conversation):
+    """Lazily migrate a conversation that still uses the legacy column."""
+    if db_conversation.messages:
+        session.rollback()  # End the read transaction before taking the write lock
+        with database.write_lock():
+            locked = _lock_conversation(session, db_conversation.id)
+            if locked is not None and _migrate_row(session, locked):
+                session.commit()
+
+def _add_messages(session: Session, conversation_id: str, first_seq: int, messages: List[Dict[str, Any]]):
+    """Add message rows from seq `first_seq` on, splitting large payloads into side records."""
+    for offset, message in enumerate(messages):
+        stub, ref, blob = pack(message)
+        session.add(Message.from_dict(conversation_id, first_seq + offset, stub))
+        if ref is not None:
+            session.add(MessagePayload(ref=ref, conversation_id=conversation_id, data=blob))
+
+def _read_messages(session: Session, conversation_id: str, start: int = 0, limit: Optional[int] = None, view: str = "full") -> List[Dict[str, Any]]:
+    query = session.query(Message).filter(
+        Message.conversation_id == conversation_id,
+        Message.seq >= start
+    ).order_by(Message.seq)
+    if limit is not None:
+        query = query.limit(limit)
+    messages = [row.to_dict() for row in query]
+    if view == "summary":
+        return [summarize(m) for m in messages]
+
+    refs = [ref for ref in map(payload_ref, messages) if ref]
+    blobs = {}
+    if refs:
+        blobs = dict(session.query(MessagePayload.ref, MessagePayload.data).filter(MessagePayload.ref.in_(refs)))
+    return [unpack(m, blobs.get(payload_ref(m))) for m in messages]
+
+def append_messages(conversation_id: str, messages: List[Dict[str, Any]], title: Optional[str] = None):
+    """Insert messages at the end of a conversation (and optionally set the title) in one transaction."""
+    session = _get_session()
+    try:
+        with database.write_lock():
+            db_conversation = _lock_conversation(session, conversation_id)
+            if not db_conversation:
+                raise ValueError(f"Conversation {conversation_id} not found")
+            _migrate_row(session, db_conversation)
+
+            seq = db_conversation.message_count or 0
+            _add_messages(session, conversation_id, seq, messages)
+            db_conversation.message_count = seq + len(messages)
+            if title is not None:
+                db_conversation.title = title
+            session.commit()
+    finally:
+        session.close()
 
 def create_conversation(conversation_id: str) -> Dict[str, Any]:
     """Create a new conversation."""
@@ -20,70 +99,132 @@ def create_conversation(conversation_id: str) -> Dict[str, Any]:
     try:
         db_conversation = Conversation(
             id=conversation_id,
+            # Set here rather than by the server default so every backend
+            # stores sub-second precision (keeps cursor ordering exact)
+            created_at=datetime.now(timezone.utc),
             title="New Conversation",
-            messages=[]
+            messages=[],
+            message_count=0
         )
-        session.add(db_conversation)
-        session.commit()
+        with database.write_lock():
+            session.add(db_conversation)
+            session.commit()
         return db_conversation.to_dict()
     finally:
         session.close()
 
-def get_conversation(conversation_id: str) -> Optional[Dict[str, Any]]:
-    """Load a conversation from storage."""
+def get_conversation(conversation_id: str, view: str = "full") -> Optional[Dict[str, Any]]:
+    """Load a conversation from storage ("summary" view skips stage payload side records)."""
+    session = _get_session()
+    try:
+        db_conversation = session.query(Conversation).filter(Conversation.id == conversation_id).first()
+        if not db_conversation:
+            return None
+        _ensure_migrated(session, db_conversation)
+        conversation = db_conversation.to_dict()
+        conversation["messages"] = _read_messages(session, conversation_id, view=view)
+        return conversation
+    finally:
+        session.close()
+
+def get_messages(conversation_id: str, start: int = 0, limit: Optional[int] = None) -> Optional[List[Dict[str, Any]]]:
+    """
+    Read a range of messages by position.
+
+    Returns:
+        Messages [start, start + limit), or None if the conversation does not exist
+    """
     session = _get_session()
     try:
         db_conversation = session.query(Conversation).filter(Conversation.id == conversation_id).first()
-        return db_conversation.to_dict() if db_conversation else None
+        if not db_conversation:
+            return None
+        _ensure_migrated(session, db_conversation)
+        return _read_messages(session, conversation_id, start, limit)
     finally:
         session.close()
 
 def save_conversation(conversation: Dict[str, Any]):
-    """Save a conversation to storage."""
+    """Save a conversation to storage (replaces all of its messages)."""
     session = _get_session()
     try:
-        db_conversation = session.query(Conversation).filter(Conversation.id == conversation['id']).first()
-        if db_conversation:
-            db_conversation.title = conversation.get('title', db_conversation.title)
-            db_conversation.messages = conversation.get('messages', [])
-            # updated_at is handled automatically by onupdate
-            session.commit()
+        with database.write_lock():
+            db_conversation = _lock_conversation(session, conversation['id'])
+            if db_conversation:
+                messages = conversation.get('messages', [])
+                db_conversation.title = conversation.get('title', db_conversation.title)
+                session.query(Message).filter(Message.conversation_id == conversation['id']).delete(synchronize_session=False)
+                # Keep side records still referenced by stubs in the new list
+                keep = [ref for ref in map(payload_ref, messages) if ref]
+                session.query(MessagePayload).filter(
+                    MessagePayload.conversation_id == conversation['id'],
+                    MessagePayload.ref.notin_(keep)
+                ).delete(synchronize_session=False)
+                _add_messages(session, conversation['id'], 0, messages)
+                db_conversation.messages = []
+                db_conversation.message_count = len(messages)
+                # updated_at is handled automatically by onupdate
+                session.commit()
     finally:
         session.close()
 
+def _metadata(c: Conversation) -> Dict[str, Any]:
+    return {
+        "id": c.id,
+        "created_at": c.created_at.isoformat() if c.created_at else None,
+        "title": c.title,
+        "message_count": c.message_count or 0
+    }
+
+def _metadata_query(session: Session):
+    """Conversations newest first, loading only the list columns (never messages)."""
+    return session.query(Conversation).options(
+        load_only(Conversation.id, Conversation.created_at, Conversation.title, Conversation.message_count)
+    ).order_by(Conversation.created_at.desc(), Conversation.id.desc())
+
 def list_conversations() -> List[Dict[str, Any]]:
     """List all conversations (metadata only)."""
     session = _get_session()
     try:
-        conversations = session.query(Conversation).order_by(Conversation.created_at.desc()).all()
-        return [{
-            "id": c.id,
-            "created_at": c.created_at.isoformat() if c.created_at else None,
-            "title": c.title,
-            "message_count": len(c.messages or [])
-        } for c in conversations]
+        return [_metadata(c) for c in _metadata_query(session).all()]
     finally:
         session.close()
 
-def add_user_message(conversation_id: str, content: str):
-    """Add a user message to a conversation."""
+def list_conversations_page(
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+    title_prefix: Optional[str] = None
+) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """List one page of conversations (metadata only) using a keyset query."""
     session = _get_session()
     try:
-        db_conversation = session.query(Conversation).filter(Conversation.id == conversation_id).first()
-        if not db_conversation:
-            raise ValueError(f"Conversation {conversation_id} not found")
-        
-        # We need to create a new list to trigger SQLAlchemy change detection for JSON
-        messages = list(db_conversation.messages)
-        messages.append({
-            "role": "user",
-            "content": content
-        })
-        db_conversation.messages = messages
-        session.commit()
+        query = _metadata_query(session)
+        if title_prefix:
+            escaped = title_prefix.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+            query = query.filter(Conversation.title.ilike(f"{escaped}%", escape="\\"))
+        if cursor:
+            created_at, conversation_id = decode_cursor(cursor)
+            created_at = datetime.fromisoformat(created_at)
+            query = query.filter(or_(
+                Conversation.created_at < created_at,
+                and_(Conversation.created_at == created_at, Conversation.id < conversation_id)
+            ))
+        if limit is None:
+            return [_metadata(c) for c in query.all()], None
+
+        rows = query.limit(limit + 1).all()
+        page = [_metadata(c) for c in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(page[-1]["created_at"], page[-1]["id"])
+        return page, next_cursor
     finally:
         session.close()
 
+def add_user_message(conversation_id: str, content: str):
+    """Add a user message to a conversation."""
+    append_messages(conversation_id, [user_message(content)])
+
 def add_assistant_message(
     conversation_id: str,
     stage1: List[Dict[str, Any]],
@@ -92,65 +233,23 @@ def add_assistant_message(
     metadata: Optional[Dict[str, Any]] = None
 ):
     """Add an assistant message to a conversation."""
-    session = _get_session()
-    try:
-        db_conversation = session.query(Conversation).filter(Conversation.id == conversation_id).first()
-        if not db_conversation:
-            raise ValueError(f"Conversation {conversation_id} not found")
-
-        message = {
-            "role": "assistant",
-            "stage1": stage1,
-        }
-        
-        if stage2 is not None:
-            message["stage2"] = stage2
-        if stage3 is not None:
-            message["stage3"] = stage3
-        if metadata:
-            message["metadata"] = metadata
-
-        messages = list(db_conversation.messages)
-        messages.append(message)
-        db_conversation.messages = messages
-        session.commit()
-    finally:
-        session.close()
+    append_messages(conversation_id, [assistant_message(stage1, stage2, stage3, metadata)])
 
 def add_error_message(conversation_id: str, error_text: str):
     """Add an error message to a conversation."""
-    session = _get_session()
-    try:
-        db_conversation = session.query(Conversation).filter(Conversation.id == conversation_id).first()
-        if not db_conversation:
-            raise ValueError(f"Conversation {conversation_id} not found")
-
-        message = {
-            "role": "assistant",
-            "content": None,
-            "error": error_text,
-            "stage1": [],
-            "stage2": [],
-            "stage3": None
-        }
-
-        messages = list(db_conversation.messages)
-        messages.append(message)
-        db_conversation.messages = messages
-        session.commit()
-    finally:
-        session.close()
+    append_messages(conversation_id, [error_message(error_text)])
 
 def update_conversation_title(conversation_id: str, title: str):
     """Update the title of a conversation."""
     session = _get_session()
     try:
-        db_conversation = session.query(Conversation).filter(Conversation.id == conversation_id).first()
-        if not db_conversation:
-            raise ValueError(f"Conversation {conversation_id} not found")
-        
-        db_conversation.title = title
-        session.commit()
+        with database.write_lock():
+            db_conversation = session.query(Conversation).filter(Conversation.id == conversation_id).first()
+            if not db_conversation:
+                raise ValueError(f"Conversation {conversation_id} not found")
+
+            db_conversation.title = title
+            session.commit()
     finally:
         session.close()
 
@@ -158,12 +257,118 @@ def delete_conversation(conversation_id: str) -> bool:
     """Delete a conversation."""
     session = _get_session()
     try:
-        db_conversation = session.query(Conversation).filter(Conversation.id == conversation_id).first()
-        if not db_conversation:
-            return False
-        
-        session.delete(db_conversation)
-        session.commit()
-        return True
+        with database.write_lock():
+            db_conversation = session.query(Conversation).filter(Conversation.id == conversation_id).first()
+            if not db_conversation:
+                return False
+
+            session.query(Message).filter(Message.conversation_id == conversation_id).delete(synchronize_session=False)
+            session.query(MessagePayload).filter(MessagePayload.conversation_id == conversation_id).delete(synchronize_session=False)
+            session.delete(db_conversation)
+            session.commit()
+            return True
+    finally:
+        session.close()
+
+def _parse_created_at(value: Optional[str]) -> datetime:
+    """created_at from an imported conversation (ISO 8601; naive means UTC)."""
+    if not value:
+        return datetime.now(timezone.utc)
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+def _message_values(conversation_id: str, seq: int, message: Dict[str, Any]) -> Dict[str, Any]:
+    row = Message.from_dict(conversation_id, seq, message)
+    return {
+        key: getattr(row, key)
+        for key in ("conversation_id", "seq", "role", "content", "error", "stage1", "stage2", "stage3", "message_metadata", "extra")
+    }
+
+def import_conversations(conversations: List[Dict[str, Any]], on_conflict: str = "replace") -> List[str]:
+    """
+    Import full conversations, keeping their IDs and created_at.
+
+    The whole batch is one transaction of bulk (executemany) inserts into
+    conversations, messages and message_payloads.
+
+    Args:
+        conversations: Conversation dicts (id, created_at, title, messages)
+        on_conflict: "replace" existing conversations with the same ID, or "skip" them
+
+    Returns:
+        IDs of the conversations written
+    """
+    if not conversations:
+        return []
+    session = _get_session()
+    try:
+        with database.write_lock():
+            ids = [c["id"] for c in conversations]
+            existing = {row.id for row in session.query(Conversation.id).filter(Conversation.id.in_(ids))}
+            if on_conflict == "skip":
+                conversations = [c for c in conversations if c["id"] not in existing]
+            elif existing:
+                session.query(MessagePayload).filter(MessagePayload.conversation_id.in_(existing)).delete(synchronize_session=False)
+                session.query(Message).filter(Message.conversation_id.in_(existing)).delete(synchronize_session=False)
+                session.query(Conversation).filter(Conversation.id.in_(existing)).delete(synchronize_session=False)
+
+            conversation_rows, message_rows, payload_rows = [], [], []
+            for conversation in conversations:
+                messages = conversation.get("messages", [])
+                conversation_rows.append({
+                    "id": conversation["id"],
+                    "created_at": _parse_created_at(conversation.get("created_at")),
+                    "title": conversation.get("title", "New Conversation"),
+                    "messages": [],
+                    "message_count": len(messages)
+                })
+                for seq, message in enumerate(messages):
+                    stub, ref, blob = pack(message)
+                    message_rows.append(_message_values(conversation["id"], seq, stub))
+                    if ref is not None:
+                        payload_rows.append({"ref": ref, "conversation_id": conversation["id"], "data": blob})
+
+            # Parents first: foreign keys are enforced (SQLite included)
+            for model, rows in ((Conversation, conversation_rows), (Message, message_rows), (MessagePayload, payload_rows)):
+                if rows:
+                    session.execute(insert(model), rows)
+            session.commit()
+            return [c["id"] for c in conversations]
     finally:
         session.close()
+
+def migrate_legacy_messages(batch_size: int = 100) -> int:
+    """
+    Migrate every conversation still using the legacy messages column.
+
+    Safe to run while the app is serving: each conversation is migrated in
+    its own transaction under a row lock, the same path lazy migration uses.
+    Only rows whose legacy column still holds messages are visited, so on a
+    migrated database this is a read-only scan that takes no locks.
+
+    Returns:
+        Number of conversations migrated
+    """
+    migrated = 0
+    last_id = ""
+    # Migrated rows hold "[]" (or NULL); anything longer still has messages
+    has_legacy = func.length(cast(Conversation.messages, Text)) > 2
+    while True:
+        session = _get_session()
+        try:
+            ids = [row.id for row in session.query(Conversation.id)
+                   .filter(Conversation.id > last_id, has_legacy)
+                   .order_by(Conversation.id)
+                   .limit(batch_size)]
+            session.commit()
+            if not ids:
+                return migrated
+            for conversation_id in ids:
+                with database.write_lock():
+                    db_conversation = _lock_conversation(session, conversation_id)
+                    if db_conversation is not None and _migrate_row(session, db_conversation):
+                        migrated += 1
+                    session.commit()
+            last_id = ids[-1]
+        finally:
+            session.close()
@@ -0,0 +1,85 @@
+"""
+Per-conversation write-behind buffer for council turns.
+
+Between begin_turn() and end_turn() the storage facade buffers the turn's
+message and title writes instead of sending each one to the backend. At
+end_turn() they are committed with a single backend.append_messages() call:
+one durable write (one fsync'd atomic rename, one journal append, or one SQL
+transaction) instead of up to three.
+
+Reads through the facade overlay the pending writes, so callers see their
+own writes before the flush. A crash before the flush loses the whole turn,
+never part of it; open turns are flushed on shutdown.
+"""
+
+import threading
+from typing import Any, Dict, List, Optional
+
+
+class PendingTurn:
+    """Writes buffered for one conversation."""
+
+    def __init__(self):
+        self.messages: List[Dict[str, Any]] = []
+        self.title: Optional[str] = None
+
+    def is_empty(self) -> bool:
+        return not self.messages and self.title is None
+
+
+class WriteBehindBuffer:
+    """Open turns by conversation ID."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._turns: Dict[str, PendingTurn] = {}
+
+    def begin(self, conversation_id: str):
+        with self._lock:
+            self._turns.setdefault(conversation_id, PendingTurn())
+
+    def add_message(self, conversation_id: str, message: Dict[str, Any]) -> bool:
+        """Buffer a message. Returns False if no turn is open (write through instead)."""
+        with self._lock:
+            turn = self._turns.get(conversation_id)
+            if turn is None:
+                return False
+            turn.messages.append(message)
+            return True
+
+    def set_title(self, conversation_id: str, title: str) -> bool:
+        """Buffer a title change. Returns False if no turn is open."""
+        with self._lock:
+            turn = self._turns.get(conversation_id)
+            if turn is None:
+                return False
+            turn.title = title
+            return True
+
+    def pending(self, conversation_id: str) -> Optional[PendingTurn]:
+        """Snapshot of the buffered writes, or None if no turn is open."""
+        with self._lock:
+            turn = self._turns.get(conversation_id)
+            if turn is None:
+                return None
+            snapshot = PendingTurn()
+            snapshot.messages = list(turn.messages)
+            snapshot.title = turn.title
+            return snapshot
+
+    def end(self, conversation_id: str) -> Optional[PendingTurn]:
+        """Close a turn and return its writes for flushing."""
+        with self._lock:
+            return self._turns.pop(conversation_id, None)
+
+    def discard(self, conversation_id: str):
+        with self._lock:
+            self._turns.pop(conversation_id, None)
+
+    def open_turns(self) -> List[str]:
+        with self._lock:
+            return list(self._turns)
+
+
+# Global singleton instance
+write_behind = WriteBehindBuffer()
@@ -0,0 +1,496 @@
+"""
+Bulk export and import of conversations as NDJSON archives.
+
+An archive holds one JSON object per line:
+
+    {"type": "header", "format": "llm-council-conversations", "version": 1, "exported_at": "..."}
+    {"type": "conversation", "id": "...", "created_at": "...", "title": "...", "message_count": 2}
+    {"type": "message", "conversation_id": "...", "message": {...}}
+    ...
+
+A conversation's messages follow its conversation line. Export reads one
+page of conversations at a time and import holds one batch, so memory use
+does not grow with the archive. Every DB_TYPE can export and import, which
+is how data moves between JSON and SQL storage. Archives ending in .gz are
+gzip-compressed.
+
+Imported batches go through the backend's import_conversations(): bulk
+inserts in one transaction for SQL; for the JSON backends, the batch's
+files are written together and indexed with a single append.
+
+Command line (progress on stderr; a checkpoint next to the archive lets an
+interrupted run continue with --resume):
+
+    python -m backend.transfer export conversations.ndjson.gz
+    python -m backend.transfer import conversations.ndjson.gz --on-conflict skip
+"""
+
+import argparse
+import gzip
+import json
+import os
+import re
+import sys
+import zlib
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+import logging
+
+from . import storage
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_FORMAT = "llm-council-conversations"
+ARCHIVE_VERSION = 1
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_BATCH_BYTES = 16 * 1024 * 1024
+MAX_LINE_BYTES = DEFAULT_BATCH_BYTES
+
+# Conversation IDs become file names in the JSON backends
+CONVERSATION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,36}$")
+
+
+def _line(record: Dict[str, Any]) -> bytes:
+    return (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def header_line() -> bytes:
+    return _line({
+        "type": "header",
+        "format": ARCHIVE_FORMAT,
+        "version": ARCHIVE_VERSION,
+        "exported_at": datetime.now(timezone.utc).isoformat()
+    })
+
+
+def conversation_lines(conversation: Dict[str, Any]) -> bytes:
+    """Archive lines of one full conversation."""
+    messages = conversation.get("messages", [])
+    lines = [_line({
+        "type": "conversation",
+        "id": conversation["id"],
+        "created_at": conversation.get("created_at"),
+        "title": conversation.get("title", "New Conversation"),
+        "message_count": len(messages)
+    })]
+    lines.extend(_line({"type": "message", "conversation_id": conversation["id"], "message": m}) for m in messages)
+    return b"".join(lines)
+
+
+class ExportPage:
+    """One page of conversations; chunks() loads and yields them one at a time."""
+
+    def __init__(self, records: List[Dict[str, Any]], next_cursor: Optional[str]):
+        self.records = records
+        self.next_cursor = next_cursor
+        self.conversations = 0
+        self.messages = 0
+
+    def chunks(self) -> Iterator[bytes]:
+        for record in self.records:
+            conversation = storage.get_conversation(record["id"])
+            if conversation is None:
+                continue  # Deleted since the page was listed
+            self.conversations += 1
+            self.messages += len(conversation.get("messages", []))
+            yield conversation_lines(conversation)
+
+
+def export_pages(cursor: Optional[str] = None, batch_size: int = DEFAULT_BATCH_SIZE) -> Iterator[ExportPage]:
+    """
+    Pages of conversations to export, newest first.
+
+    Args:
+        cursor: Pagination cursor to start after (to resume an export)
+        batch_size: Conversations per page
+
+    Yields:
+        ExportPage objects; next_cursor is None on the last page
+    """
+    while True:
+        records, next_cursor = storage.list_conversations_page(batch_size, cursor)
+        yield ExportPage(records, next_cursor)
+        if next_cursor is None:
+            return
+        cursor = next_cursor
+
+
+async def iter_export(batch_size: int = DEFAULT_BATCH_SIZE) -> AsyncIterator[bytes]:
+    """
+    The whole archive as a stream of chunks (one per conversation).
+
+    Pages and conversations are read through storage.aio, so the export
+    takes each conversation's lock like any other request and never
+    blocks the event loop.
+    """
+    yield header_line()
+    cursor = None
+    while True:
+        records, cursor = await storage.aio.list_conversations_page(batch_size, cursor)
+        for record in records:
+            conversation = await storage.aio.get_conversation(record["id"])
+            if conversation is not None:  # Else deleted since the page was listed
+                yield await storage.aio.run(conversation_lines, conversation)
+        if cursor is None:
+            return
+
+
+class ArchiveReader:
+    """
+    Assembles archive lines into batches of complete conversations.
+
+    feed() returns a batch once it holds batch_size conversations or
+    batch_bytes of archive data; finish() returns the rest. A batch is
+    only ever returned when a conversation line starts the next one, so
+    a reader can start at any conversation line (used to resume).
+    """
+
+    def __init__(self, batch_size: int = DEFAULT_BATCH_SIZE, batch_bytes: int = DEFAULT_BATCH_BYTES):
+        self.batch_size = batch_size
+        self.batch_bytes = batch_bytes
+        self._batch: List[Dict[str, Any]] = []
+        self._bytes = 0
+        self._current: Optional[Dict[str, Any]] = None
+
+    def _take(self) -> List[Dict[str, Any]]:
+        batch, self._batch, self._bytes = self._batch, [], 0
+        return batch
+
+    def feed(self, line: bytes) -> Optional[List[Dict[str, Any]]]:
+        """
+        Add one archive line.
+
+        Raises:
+            ValueError: If the line is not valid archive data
+        """
+        line = line.strip()
+        if not line:
+            return None
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid archive line: {e}")
+        kind = record.get("type") if isinstance(record, dict) else None
+
+        if kind == "header":
+            version = record.get("version", 0)
+            if (record.get("format") != ARCHIVE_FORMAT or not isinstance(version, int)
+                    or isinstance(version, bool) or version > ARCHIVE_VERSION):
+                raise ValueError("Not a supported conversation archive")
+            return None
+
+        if kind == "message":
+            if self._current is None or record.get("conversation_id") != self._current["id"]:
+                raise ValueError("Message line outside of its conversation")
+            message = record.get("message")
+            if not isinstance(message, dict):
+                raise ValueError(f"Invalid message in conversation {self._current['id']}")
+            self._current["messages"].append(message)
+            self._bytes += len(line)
+            return None
+
+        if kind != "conversation":
+            raise ValueError(f"Unknown archive record type: {kind}")
+        conversation_id = record.get("id")
+        if not isinstance(conversation_id, str) or not CONVERSATION_ID_PATTERN.match(conversation_id):
+            raise ValueError(f"Invalid conversation ID: {conversation_id!r}")
+
+        ready = None
+        if self._current is not None:
+            self._batch.append(self._current)
+            if len(self._batch) >= self.batch_size or self._bytes >= self.batch_bytes:
+                ready = self._take()
+        self._current = {
+            "id": conversation_id,
+            "created_at": record.get("created_at"),
+            "title": record.get("title", "New Conversation"),
+            "messages": []
+        }
+        self._bytes += len(line)
+        return ready
+
+    def finish(self) -> List[Dict[str, Any]]:
+        """The last batch (possibly empty)."""
+        if self._current is not None:
+            self._batch.append(self._current)
+            self._current = None
+        return self._take()
+
+
+def _count(totals: Dict[str, int], batch: List[Dict[str, Any]], imported: List[str]):
+    written = set(imported)
+    totals["conversations"] += len(batch)
+    totals["imported"] += len(written)
+    totals["messages"] += sum(len(c["messages"]) for c in batch if c["id"] in written)
+
+
+class _Gunzip:
+    """Incremental (multi-member) gzip decoder that inflates a bounded amount per step."""
+
+    def __init__(self, max_output: int):
+        self.max_output = max_output
+        self._member()
+
+    def _member(self):
+        self._decompressor = zlib.decompressobj(zlib.MAX_WBITS | 16)
+        self._started = False
+
+    def feed(self, data: bytes) -> Iterator[bytes]:
+        try:
+            while data:
+                self._started = True
+                output = self._decompressor.decompress(data, self.max_output)
+                data = self._decompressor.unconsumed_tail
+                if self._decompressor.eof:
+                    data = self._decompressor.unused_data
+                    self._member()
+                yield output
+        except zlib.error:
+            raise ValueError("Invalid gzip data")
+
+    def finish(self):
+        if self._started:
+            raise ValueError("Truncated gzip data")
+
+
+async def _iter_lines(chunks: AsyncIterator[bytes], gzipped: bool = False, max_line: int = MAX_LINE_BYTES) -> AsyncIterator[bytes]:
+    """
+    Split a byte stream into lines, decompressing (multi-member) gzip on the fly.
+
+    Raises:
+        ValueError: On invalid or truncated gzip data, or a line longer than max_line
+    """
+    gunzip = _Gunzip(max_line) if gzipped else None
+    pending = b""
+    async for chunk in chunks:
+        for data in (gunzip.feed(chunk) if gunzip else (chunk,)):
+            pending += data
+            *lines, pending = pending.split(b"\n")
+            if len(pending) > max_line or any(len(line) > max_line for line in lines):
+                raise ValueError(f"Archive line longer than {max_line} bytes")
+            for line in lines:
+                yield line
+    if gunzip:
+        gunzip.finish()
+    if pending:
+        yield pending
+
+
+async def import_stream(
+    chunks: AsyncIterator[bytes],
+    on_conflict: str = "replace",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    gzipped: bool = False
+) -> Dict[str, int]:
+    """
+    Import an archive arriving as a byte stream (e.g. a request body).
+
+    Batches are committed as they complete, so an archive of any size is
+    held one batch at a time.
+
+    Returns:
+        {"conversations": read, "imported": written, "skipped": ..., "messages": written}
+
+    Raises:
+        ValueError: On invalid archive data (batches before it stay imported)
+    """
+    reader = ArchiveReader(batch_size)
+    totals = {"conversations": 0, "imported": 0, "messages": 0}
+
+    async def commit(batch: List[Dict[str, Any]]):
+        if batch:
+            _count(totals, batch, await storage.aio.import_conversations(batch, on_conflict))
+            logger.info(f"Imported {totals['imported']} conversations ({totals['messages']} messages)")
+
+    try:
+        async for line in _iter_lines(chunks, gzipped):
+            await commit(reader.feed(line))
+        await commit(reader.finish())
+    except ValueError as e:
+        raise ValueError(f"{e} ({totals['imported']} conversations were imported before the error)")
+    totals["skipped"] = totals["conversations"] - totals["imported"]
+    return totals
+
+
+# Checkpoints ({archive}.checkpoint) for resumable file transfers
+
+def _checkpoint_path(path: str) -> str:
+    return f"{path}.checkpoint"
+
+
+def _read_checkpoint(path: str, operation: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(_checkpoint_path(path), "r") as f:
+            checkpoint = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    return checkpoint if checkpoint.get("operation") == operation else None
+
+
+def _write_checkpoint(path: str, checkpoint: Dict[str, Any]):
+    tmp_path = f"{_checkpoint_path(path)}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(checkpoint, f)
+    os.replace(tmp_path, _checkpoint_path(path))
+
+
+def _remove_checkpoint(path: str):
+    try:
+        os.remove(_checkpoint_path(path))
+    except OSError:
+        pass
+
+
+Progress = Callable[[Dict[str, int], Optional[float]], None]
+
+
+def export_archive(
+    path: str,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    resume: bool = False,
+    progress: Optional[Progress] = None
+) -> Dict[str, int]:
+    """
+    Export every conversation to an archive file.
+
+    Each page is written (as its own gzip member for .gz archives), fsync'd
+    and checkpointed with the cursor of the next page. Resuming truncates
+    whatever was written after the last checkpoint and continues from it.
+
+    Returns:
+        {"conversations", "messages", "bytes"}
+    """
+    checkpoint = _read_checkpoint(path, "export") if resume else None
+    totals = {"conversations": 0, "messages": 0}
+    cursor = None
+    if checkpoint is not None:
+        totals, cursor = checkpoint["totals"], checkpoint["cursor"]
+        if cursor is None:
+            return {**totals, "bytes": checkpoint["bytes"]}
+        with open(path, "r+b") as f:
+            f.truncate(checkpoint["bytes"])
+
+    compressed = path.endswith(".gz")
+
+    def write_member(raw, chunks: Iterator[bytes]):
+        out = gzip.GzipFile(fileobj=raw, mode="wb") if compressed else raw
+        for chunk in chunks:
+            out.write(chunk)
+        if compressed:
+            out.close()  # Ends the member; leaves raw open
+        raw.flush()
+        os.fsync(raw.fileno())
+
+    with open(path, "ab" if checkpoint else "wb") as raw:
+        if checkpoint is None:
+            write_member(raw, iter([header_line()]))
+        for page in export_pages(cursor, batch_size):
+            write_member(raw, page.chunks())
+            totals["conversations"] += page.conversations
+            totals["messages"] += page.messages
+            _write_checkpoint(path, {"operation": "export", "cursor": page.next_cursor, "bytes": raw.tell(), "totals": totals})
+            if progress:
+                progress(totals, None)
+        size = raw.tell()
+
+    _remove_checkpoint(path)
+    return {**totals, "bytes": size}
+
+
+def import_archive(
+    path: str,
+    on_conflict: str = "replace",
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    resume: bool = False,
+    progress: Optional[Progress] = None
+) -> Dict[str, int]:
+    """
+    Import an archive file.
+
+    After each committed batch the checkpoint records the archive offset of
+    the next conversation; resuming seeks there.
+
+    Returns:
+        {"conversations": read, "imported": written, "skipped": ..., "messages": written}
+
+    Raises:
+        ValueError: On invalid archive data
+    """
+    checkpoint = _read_checkpoint(path, "import") if resume else None
+    totals = {"conversations": 0, "imported": 0, "messages": 0}
+    offset = 0
+    if checkpoint is not None:
+        totals, offset = checkpoint["totals"], checkpoint["offset"]
+
+    total_bytes = os.path.getsize(path) or 1
+    reader = ArchiveReader(batch_size)
+
+    with open(path, "rb") as raw:
+        stream = gzip.GzipFile(fileobj=raw, mode="rb") if path.endswith(".gz") else raw
+        stream.seek(offset)
+        position = offset
+        for line in stream:
+            line_start, position = position, position + len(line)
+            batch = reader.feed(line)
+            if batch:
+                _count(totals, batch, storage.import_conversations(batch, on_conflict))
+                _write_checkpoint(path, {"operation": "import", "offset": line_start, "totals": totals})
+                if progress:
+                    progress(totals, raw.tell() / total_bytes)
+        batch = reader.finish()
+        if batch:
+            _count(totals, batch, storage.import_conversations(batch, on_conflict))
+        if progress:
+            progress(totals, 1.0)
+
+    _remove_checkpoint(path)
+    totals["skipped"] = totals["conversations"] - totals["imported"]
+    return totals
+
+
+def _print_progress(verb: str) -> Progress:
+    def report(totals: Dict[str, int], fraction: Optional[float]):
+        done = f" ({fraction:.0%})" if fraction is not None else ""
+        print(f"{verb} {totals['conversations']} conversations, {totals['messages']} messages{done}", file=sys.stderr)
+    return report
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.transfer",
+        description="Export or import conversations as NDJSON archives (.gz for gzip) using the configured storage."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    export_parser = subparsers.add_parser("export", help="Write every conversation to an archive")
+    export_parser.add_argument("path")
+
+    import_parser = subparsers.add_parser("import", help="Load conversations from an archive")
+    import_parser.add_argument("path")
+    import_parser.add_argument(
+        "--on-conflict", choices=["replace", "skip"], default="replace",
+        help="What to do with conversations that already exist (default: replace)"
+    )
+
+    for sub in (export_parser, import_parser):
+        sub.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Conversations per batch")
+        sub.add_argument("--resume", action="store_true", help="Continue from the checkpoint of an interrupted run")
+
+    args = parser.parse_args(argv)
+    storage.init_database()
+
+    if args.command == "export":
+        result = export_archive(args.path, args.batch_size, args.resume, _print_progress("Exported"))
+        print(f"Exported {result['conversations']} conversations ({result['messages']} messages, {result['bytes']} bytes) to {args.path}")
+    else:
+        try:
+            result = import_archive(args.path, args.on_conflict, args.batch_size, args.resume, _print_progress("Read"))
+        except (ValueError, OSError, EOFError, zlib.error) as e:
+            # OSError/EOFError/zlib.error: a corrupt or truncated .gz file
+            sys.exit(f"Import failed: {e}")
+        print(f"Imported {result['imported']} conversations ({result['messages']} messages), skipped {result['skipped']}")
+    storage.flush_all()
+
+
+if __name__ == "__main__":
+    main()
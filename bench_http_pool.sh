@@ -0,0 +1,141 @@
+#!/bin/bash
+# Benchmark: pooled vs unpooled provider HTTP clients.
+#
+# Starts a local HTTPS mock of an OpenAI-compatible /chat/completions
+# endpoint (self-signed certificate made with openssl) and sends the same
+# queries through CustomOpenAIProvider twice: with the provider's pooled
+# keep-alive client, and with a fresh httpx.AsyncClient per call (as every
+# query did before pooling). Reports latency and how many TCP+TLS
+# connections the server accepted.
+#
+#   REQUESTS=200 CONCURRENCY=8 ./bench_http_pool.sh
+
+cd "$(dirname "$0")"
+CERT_DIR="$(mktemp -d)"
+trap 'rm -rf "$CERT_DIR"' EXIT
+openssl req -x509 -newkey rsa:2048 -nodes -days 1 -subj "/CN=localhost" \
+    -addext "subjectAltName=DNS:localhost,IP:127.0.0.1" \
+    -keyout "$CERT_DIR/key.pem" -out "$CERT_DIR/cert.pem" 2>/dev/null || exit 1
+
+CERT_DIR="$CERT_DIR" SSL_CERT_FILE="$CERT_DIR/cert.pem" PYTHONPATH="$PWD" \
+REQUESTS="${REQUESTS:-200}" CONCURRENCY="${CONCURRENCY:-8}" python3 - <<'PY' || exit 1
+import asyncio
+import json
+import multiprocessing
+import os
+import ssl
+import statistics
+import tempfile
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import httpx
+
+os.chdir(tempfile.mkdtemp())
+
+from backend.providers.custom_openai import CustomOpenAIProvider
+
+REQUESTS = int(os.environ["REQUESTS"])
+CONCURRENCY = int(os.environ["CONCURRENCY"])
+BODY = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode()
+
+connections = multiprocessing.Value("i", 0)
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keep-alive
+    disable_nagle_algorithm = True
+    wbufsize = 64 * 1024  # Headers and body in one send
+
+    def setup(self):
+        with connections.get_lock():
+            connections.value += 1
+        super().setup()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(BODY)))
+        self.end_headers()
+        self.wfile.write(BODY)
+
+    def log_message(self, *args):
+        pass
+
+
+class MockServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 128
+
+
+def serve(ready):
+    server = MockServer(("127.0.0.1", 0), MockHandler)
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    cert_dir = os.environ["CERT_DIR"]
+    context.load_cert_chain(os.path.join(cert_dir, "cert.pem"), os.path.join(cert_dir, "key.pem"))
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    ready.send(server.server_address[1])
+    server.serve_forever()
+
+
+# The mock runs in its own process so it does not compete for the client's GIL
+ready, port = multiprocessing.Pipe()
+server = multiprocessing.Process(target=serve, args=(port,), daemon=True)
+server.start()
+URL = f"https://localhost:{ready.recv()}/v1"
+
+
+class MockProvider(CustomOpenAIProvider):
+    def _get_config(self):
+        return "Mock", URL, "test-key"
+
+
+class UnpooledMockProvider(MockProvider):
+    async def query(self, *args, **kwargs):
+        # A fresh client per call, closed afterwards
+        self._client = httpx.AsyncClient()
+        try:
+            return await super().query(*args, **kwargs)
+        finally:
+            await self.shutdown()
+
+
+async def run(provider, concurrency):
+    connections.value = 0
+    latencies = []
+    messages = [{"role": "user", "content": "ping"}]
+
+    async def one():
+        start = time.perf_counter()
+        result = await provider.query("custom:mock", messages, timeout=30)
+        latencies.append(time.perf_counter() - start)
+        assert not result.get("error"), result
+
+    start = time.perf_counter()
+    for _ in range(REQUESTS // concurrency):
+        await asyncio.gather(*(one() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    await provider.shutdown()
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies) * 1000,
+        "p95": latencies[int(len(latencies) * 0.95) - 1] * 1000,
+        "rate": len(latencies) / elapsed,
+        "connections": connections.value,
+    }
+
+
+async def main():
+    print(f"{REQUESTS} requests to a local HTTPS mock endpoint")
+    for concurrency in (1, CONCURRENCY):
+        print(f"  concurrency {concurrency}:")
+        for name, provider in (("unpooled", UnpooledMockProvider()), ("pooled", MockProvider())):
+            r = await run(provider, concurrency)
+            print(f"    {name:9} p50 {r['p50']:6.2f} ms  p95 {r['p95']:6.2f} ms  "
+                  f"{r['rate']:7.0f} req/s  {r['connections']:4} connections")
+
+
+asyncio.run(main())
+server.terminate()
+PY
@@ -0,0 +1,67 @@
+#!/bin/bash
+# Benchmark: flat vs sharded JSON storage layout at 100k conversations.
+#
+# For each JSON_LAYOUT, creates CONVERSATIONS conversations with the json
+# backend in a temporary data directory (one process per layout), then
+# times random gets, a list page, a walk over every conversation file and
+# a metadata index rebuild, and reports the largest directory.
+#
+#   CONVERSATIONS=100000 GETS=2000 ./bench_json_layout.sh
+
+cd "$(dirname "$0")"
+WORK_DIR="$(mktemp -d)"
+trap 'rm -rf "$WORK_DIR"' EXIT
+for layout in flat sharded; do
+    mkdir "$WORK_DIR/$layout"
+    WORK_DIR="$WORK_DIR/$layout" JSON_LAYOUT="$layout" DB_TYPE=json PYTHONPATH="$PWD" \
+    CONVERSATIONS="${CONVERSATIONS:-100000}" GETS="${GETS:-2000}" python3 - <<'PY' || exit 1
+import os
+import random
+import statistics
+import time
+import uuid
+
+os.chdir(os.environ["WORK_DIR"])
+
+from backend.config import DATA_DIR
+from backend.storage import json_storage, layout
+from backend.storage.index import conversation_index
+
+CONVERSATIONS = int(os.environ["CONVERSATIONS"])
+GETS = int(os.environ["GETS"])
+
+ids = [str(uuid.uuid4()) for _ in range(CONVERSATIONS)]
+start = time.perf_counter()
+for conversation_id in ids:
+    json_storage.create_conversation(conversation_id)
+create_rate = CONVERSATIONS / (time.perf_counter() - start)
+
+samples = []
+for conversation_id in random.sample(ids, min(GETS, CONVERSATIONS)):
+    start = time.perf_counter()
+    assert json_storage.get_conversation(conversation_id) is not None
+    samples.append(time.perf_counter() - start)
+samples.sort()
+
+start = time.perf_counter()
+page, _ = json_storage.list_conversations_page(50)
+list_ms = (time.perf_counter() - start) * 1000
+
+start = time.perf_counter()
+files = sum(1 for _ in layout.iter_conversation_files())
+walk_s = time.perf_counter() - start
+
+start = time.perf_counter()
+conversation_index.rebuild()
+rebuild_s = time.perf_counter() - start
+
+largest = max(len(os.listdir(root)) for root, _, _ in os.walk(DATA_DIR))
+print(f"{os.environ['JSON_LAYOUT']:>7}: {CONVERSATIONS} conversations")
+print(f"  create          {create_rate:8.0f} /s")
+print(f"  get             p50 {statistics.median(samples) * 1e6:5.0f} us   p95 {samples[int(len(samples) * 0.95) - 1] * 1e6:5.0f} us")
+print(f"  list page (50)  {list_ms:8.1f} ms")
+print(f"  walk all files  {walk_s:8.2f} s ({files} files)")
+print(f"  index rebuild   {rebuild_s:8.2f} s")
+print(f"  largest directory: {largest} entries")
+PY
+done
@@ -0,0 +1,102 @@
+#!/bin/bash
+# Benchmark: conversation search index at 10k conversations.
+#
+# Builds a temporary index of CONVERSATIONS synthetic conversations (TURNS
+# turns each: a question, a chairman answer and three Stage 1 responses,
+# with Zipf-distributed words so some terms are rare and some are
+# everywhere). Times the rebuild, indexing one new turn, and searches that
+# match few, many and all conversations, including a prefix (typing) query.
+#
+#   CONVERSATIONS=10000 TURNS=1 ./bench_search.sh
+
+cd "$(dirname "$0")"
+WORK_DIR="$(mktemp -d)"
+trap 'rm -rf "$WORK_DIR"' EXIT
+WORK_DIR="$WORK_DIR" PYTHONPATH="$PWD" CONVERSATIONS="${CONVERSATIONS:-10000}" TURNS="${TURNS:-1}" python3 - <<'PY' || exit 1
+import itertools
+import os
+import random
+import statistics
+import time
+
+os.chdir(os.environ["WORK_DIR"])
+
+from backend.storage.search_index import ConversationSearchIndex
+
+CONVERSATIONS = int(os.environ["CONVERSATIONS"])
+TURNS = int(os.environ["TURNS"])
+
+rng = random.Random(42)
+syllables = ["ka", "lo", "mi", "ne", "ru", "sa", "te", "vo", "zi", "po", "qua", "dre"]
+VOCABULARY = sorted({"".join(rng.choices(syllables, k=rng.randint(2, 4))) for _ in range(30000)})
+rng.shuffle(VOCABULARY)
+CUM_WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, len(VOCABULARY) + 1)))
+
+
+def text(words):
+    return " ".join(rng.choices(VOCABULARY, cum_weights=CUM_WEIGHTS, k=words))
+
+
+def turn():
+    return [
+        {"role": "user", "content": text(25)},
+        {
+            "role": "assistant",
+            "stage1": [{"model": f"member-{i}", "response": text(150)} for i in range(3)],
+            "stage3": {"model": "chairman", "response": text(200)},
+        },
+    ]
+
+
+generating = 0.0
+
+
+def conversations():
+    global generating
+    for i in range(CONVERSATIONS):
+        start = time.perf_counter()
+        conversation = {
+            "id": f"c{i:06d}",
+            "title": text(4),
+            "messages": [m for _ in range(TURNS) for m in turn()],
+        }
+        generating += time.perf_counter() - start
+        yield conversation
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+    return statistics.median(samples) * 1000, samples[int(len(samples) * 0.95) - 1] * 1000
+
+
+index = ConversationSearchIndex()
+start = time.perf_counter()
+count = index.rebuild(conversations())
+print(f"{count} conversations, {index.stats()}")
+print(f"  rebuild: {time.perf_counter() - start - generating:.1f} s (without generating the text)")
+
+samples = []
+for i in range(200):
+    messages = turn()
+    start = time.perf_counter()
+    index.add_messages(f"c{rng.randrange(CONVERSATIONS):06d}", messages)
+    samples.append(time.perf_counter() - start)
+print("  index one turn: p50 %.1f ms, p95 %.1f ms" % percentiles(samples))
+
+queries = {
+    "rare word": VOCABULARY[len(VOCABULARY) // 2],
+    "uncommon word": VOCABULARY[2000],
+    "common word": VOCABULARY[20],
+    "most common word": VOCABULARY[0],
+    "two words": f"{VOCABULARY[50]} {VOCABULARY[300]}",
+    "prefix while typing": VOCABULARY[300][:3],
+}
+for name, query in queries.items():
+    samples = []
+    for _ in range(30):
+        start = time.perf_counter()
+        result = index.search(query, limit=20)
+        samples.append(time.perf_counter() - start)
+    p50, p95 = percentiles(samples)
+    print(f"  {name:20} {result['total']:6} conversations   p50 {p50:6.1f} ms   p95 {p95:6.1f} ms")
+PY
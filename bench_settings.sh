@@ -0,0 +1,71 @@
+#!/bin/bash
+# Benchmark: per-turn settings overhead.
+#
+# A council turn with a 4-member council looks settings up about 40 times
+# (model lists, API keys, temperatures, prompts per member and stage).
+# Times those lookups per simulated turn three ways: re-reading and
+# validating settings.json on every call (as before the cache), through
+# the mtime-checked cache, and with the one snapshot per turn the pipeline
+# now passes down. Uses a temporary settings file, never data/settings.json.
+#
+#   TURNS=2000 LOOKUPS=40 ./bench_settings.sh
+
+cd "$(dirname "$0")"
+PYTHONPATH="$PWD" TURNS="${TURNS:-2000}" LOOKUPS="${LOOKUPS:-40}" python3 - <<'PY' || exit 1
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from backend import settings
+
+TURNS = int(os.environ["TURNS"])
+LOOKUPS = int(os.environ["LOOKUPS"])
+
+settings.SETTINGS_FILE = Path(tempfile.mkdtemp()) / "settings.json"
+settings.save_settings(settings.Settings(
+    openrouter_api_key="sk-or-test",
+    openai_api_key="sk-test",
+    council_models=["openai:gpt-4.1", "anthropic:claude-sonnet", "google:gemini-pro", "openrouter:deepseek/deepseek-chat"],
+    chairman_model="openai:gpt-4.1",
+))
+
+
+def per_turn(lookup) -> float:
+    """Median microseconds of settings access per turn."""
+    samples = []
+    for _ in range(TURNS):
+        start = time.perf_counter()
+        lookup()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1e6
+
+
+def uncached():
+    for _ in range(LOOKUPS):
+        settings._load_settings_file().council_models
+
+
+def cached():
+    for _ in range(LOOKUPS):
+        settings.get_settings().council_models
+
+
+def snapshot():
+    current = settings.get_settings()
+    for _ in range(LOOKUPS):
+        current.council_models
+
+
+print(f"settings access per turn ({LOOKUPS} lookups, median of {TURNS} turns)")
+print(f"  re-read and validate every call: {per_turn(uncached):8.1f} us")
+print(f"  mtime-checked cache:             {per_turn(cached):8.1f} us")
+print(f"  one snapshot per turn:           {per_turn(snapshot):8.1f} us")
+
+# An edit made outside the app is picked up on the next lookup
+settings.SETTINGS_FILE.write_text(settings.SETTINGS_FILE.read_text().replace("gpt-4.1", "gpt-5"))
+os.utime(settings.SETTINGS_FILE, ns=(time.time_ns(), time.time_ns() + 1_000_000))
+assert settings.get_settings().chairman_model == "openai:gpt-5", "cache did not notice the file change"
+print("  file change picked up on the next lookup")
+PY
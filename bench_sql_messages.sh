@@ -0,0 +1,79 @@
+#!/bin/bash
+# Benchmark: SQL message appends, legacy JSON column vs messages table.
+#
+# For conversations of 1k and 10k messages (assistant messages with three
+# 300-character Stage 1 responses), times the last APPENDS appends:
+# rewriting the whole conversations.messages JSON list (as before the
+# messages table) and one INSERT through sql_storage. Also times reading
+# the last 20 messages. Runs on a temporary SQLite database unless DB_TYPE
+# and DATABASE_URL point elsewhere.
+#
+#   SIZES="1000 10000" APPENDS=100 ./bench_sql_messages.sh
+
+cd "$(dirname "$0")"
+WORK_DIR="$(mktemp -d)"
+trap 'rm -rf "$WORK_DIR"' EXIT
+WORK_DIR="$WORK_DIR" PYTHONPATH="$PWD" DB_TYPE="${DB_TYPE:-sqlite}" SIZES="${SIZES:-1000 10000}" APPENDS="${APPENDS:-100}" python3 - <<'PY' || exit 1
+import os
+import time
+
+os.chdir(os.environ["WORK_DIR"])
+
+from backend.storage import database, sql_storage
+from backend.storage.messages import assistant_message
+from backend.storage.models import Conversation
+
+SIZES = [int(n) for n in os.environ["SIZES"].split()]
+APPENDS = int(os.environ["APPENDS"])
+
+STAGE1 = [{"model": f"member-{i}", "response": "x" * 300} for i in range(3)]
+
+
+def message(i):
+    return assistant_message(STAGE1, None, {"model": "chairman", "response": f"answer {i}"}, None)
+
+
+def legacy_append(conversation_id, new_message):
+    """What add_assistant_message did before: rewrite the JSON list."""
+    session = database.SessionLocal()
+    try:
+        with database.write_lock():
+            row = session.get(Conversation, conversation_id)
+            row.messages = list(row.messages) + [new_message]
+            row.message_count = len(row.messages)
+            session.commit()
+    finally:
+        session.close()
+
+
+def timed(func, *args):
+    start = time.perf_counter()
+    for i in range(APPENDS):
+        func(*args, i)
+    return (time.perf_counter() - start) / APPENDS * 1000
+
+
+# Tables only: init_database() would also start migrating the legacy rows below
+database.init_db_engine()
+database.Base.metadata.create_all(bind=database.engine)
+print(f"{os.environ['DB_TYPE']}: mean of the last {APPENDS} appends")
+for n in SIZES:
+    preload = [message(i) for i in range(n - APPENDS)]
+
+    session = database.SessionLocal()
+    session.add(Conversation(id=f"legacy-{n}", title="legacy", messages=preload, message_count=len(preload)))
+    session.commit()
+    session.close()
+    legacy = timed(lambda cid, i: legacy_append(cid, message(i)), f"legacy-{n}")
+
+    sql_storage.import_conversations([{"id": f"table-{n}", "title": "table", "messages": preload}])
+    table = timed(lambda cid, i: sql_storage.add_assistant_message(cid, STAGE1, None, {"model": "chairman", "response": f"answer {i}"}), f"table-{n}")
+
+    start = time.perf_counter()
+    tail = sql_storage.get_messages(f"table-{n}", n - 20, 20)
+    read = (time.perf_counter() - start) * 1000
+    assert len(tail) == 20
+
+    print(f"  n={n:>6}: legacy JSON column {legacy:7.1f} ms/append   "
+          f"messages table {table:5.1f} ms/append   last 20 messages {read:5.1f} ms")
+PY
@@ -5,8 +5,11 @@ import Settings from './components/Settings';
 import { api } from './api';
 import './App.css';
 
+const CONVERSATIONS_PAGE_SIZE = 50;
+
 function App() {
   const [conversations, setConversations] = useState([]);
+  const [conversationsCursor, setConversationsCursor] = useState(null);
   const [currentConversationId, setCurrentConversationId] = useState(null);
   const [currentConversation, setCurrentConversation] = useState(null);
   const [isLoading, setIsLoading] = useState(false);
@@ -184,8 +187,9 @@ function App() {
 
   const loadConversations = async (retryCount = 0) => {
     try {
-      const convs = await api.listConversations();
+      const { conversations: convs, nextCursor } = await api.listConversationsPage({ limit: CONVERSATIONS_PAGE_SIZE });
       setConversations(convs);
+      setConversationsCursor(nextCursor);
     } catch (error) {
       console.error('Failed to load conversations:', error);
       // Retry up to 3 times with increasing delays (1s, 2s, 3s)
@@ -195,15 +199,48 @@ function App() {
     }
   };
 
+  const loadMoreConversations = async () => {
+    if (!conversationsCursor) return;
+    try {
+      const { conversations: more, nextCursor } = await api.listConversationsPage({
+        limit: CONVERSATIONS_PAGE_SIZE,
+        cursor: conversationsCursor,
+      });
+      setConversations((prev) => {
+        const seen = new Set(prev.map((c) => c.id));
+        return [...prev, ...more.filter((c) => !seen.has(c.id))];
+      });
+      setConversationsCursor(nextCursor);
+    } catch (error) {
+      console.error('Failed to load more conversations:', error);
+    }
+  };
+
   const loadConversation = async (id) => {
     try {
-      const conv = await api.getConversation(id);
+      // Stage details are fetched per message on demand
+      const conv = await api.getConversation(id, 'summary');
       setCurrentConversation(conv);
     } catch (error) {
       console.error('Failed to load conversation:', error);
     }
   };
 
+  const loadMessageDetails = async (index) => {
+    const id = currentConversationId;
+    try {
+      const message = await api.getMessage(id, index);
+      setCurrentConversation((prev) => {
+        if (!prev || prev.id !== id) return prev;
+        const messages = [...prev.messages];
+        messages[index] = message;
+        return { ...prev, messages };
+      });
+    } catch (error) {
+      console.error('Failed to load message details:', error);
+    }
+  };
+
   const handleNewConversation = async () => {
     // Check if there's already an empty/unused conversation
     const existingEmpty = conversations.find(conv => !conv.title && conv.message_count === 0);
@@ -398,13 +435,33 @@ function App() {
               });
               break;
 
+            case 'stage1_delta':
+              setCurrentConversation((prev) => {
+                const messages = [...prev.messages];
+                const lastMsg = messages[messages.length - 1];
+
+                // Append streamed tokens to this model's in-progress entry
+                const stage1 = lastMsg.stage1 ? [...lastMsg.stage1] : [];
+                const idx = stage1.findIndex((r) => r.model === event.data.model);
+                if (idx === -1) {
+                  stage1.push({ model: event.data.model, response: event.data.delta, error: null, streaming: true });
+                } else {
+                  stage1[idx] = { ...stage1[idx], response: (stage1[idx].response || '') + event.data.delta };
+                }
+
+                messages[messages.length - 1] = { ...lastMsg, stage1 };
+                return { ...prev, messages };
+              });
+              break;
+
             case 'stage1_progress':
               setCurrentConversation((prev) => {
                 const messages = [...prev.messages];
                 const lastMsg = messages[messages.length - 1];
 
-                // Immutable update for stage1
-                const updatedStage1 = lastMsg.stage1 ? [...lastMsg.stage1, event.data] : [event.data];
+                // Immutable update for stage1 (final result replaces any streamed entry)
+                const existing = lastMsg.stage1 ? lastMsg.stage1.filter((r) => r.model !== event.data.model) : [];
+                const updatedStage1 = [...existing, event.data];
                 const updatedLastMsg = {
                   ...lastMsg,
                   progress: {
@@ -424,6 +481,28 @@ function App() {
               });
               break;
 
+            case 'council_cache_hit':
+              setCurrentConversation((prev) => {
+                const messages = [...prev.messages];
+                const lastMsg = messages[messages.length - 1];
+
+                // The stages that follow are replayed from a stored council run
+                messages[messages.length - 1] = { ...lastMsg, cacheHit: event.data };
+                return { ...prev, messages };
+              });
+              break;
+
+            case 'stage1_quorum':
+              setCurrentConversation((prev) => {
+                const messages = [...prev.messages];
+                const lastMsg = messages[messages.length - 1];
+
+                // Stage 1 ended early; remember which members were dropped
+                messages[messages.length - 1] = { ...lastMsg, stage1Quorum: event.data };
+                return { ...prev, messages };
+              });
+              break;
+
             case 'stage1_complete':
               setCurrentConversation((prev) => {
                 const messages = [...prev.messages];
@@ -518,6 +597,19 @@ function App() {
               });
               break;
 
+            case 'stage2_provisional':
+            case 'stage2_early_stop':
+              setCurrentConversation((prev) => {
+                const messages = [...prev.messages];
+                const lastMsg = messages[messages.length - 1];
+
+                // Provisional aggregate while rankings arrive / early-stop notice
+                const key = event.type === 'stage2_provisional' ? 'provisionalRankings' : 'stage2EarlyStop';
+                messages[messages.length - 1] = { ...lastMsg, [key]: event.data };
+                return { ...prev, messages };
+              });
+              break;
+
             case 'stage2_complete':
               setCurrentConversation((prev) => {
                 const messages = [...prev.messages];
@@ -568,7 +660,26 @@ function App() {
               });
               break;
 
+            case 'stage3_delta':
+            case 'direct_answer_delta':
+              setCurrentConversation((prev) => {
+                const messages = [...prev.messages];
+                const lastMsg = messages[messages.length - 1];
+
+                // Append streamed chairman tokens until the final result arrives
+                const current = lastMsg.stage3 || { model: event.data.model, response: '', error: false, streaming: true };
+                const updatedLastMsg = {
+                  ...lastMsg,
+                  stage3: { ...current, response: (current.response || '') + event.data.delta }
+                };
+
+                messages[messages.length - 1] = updatedLastMsg;
+                return { ...prev, messages };
+              });
+              break;
+
             case 'stage3_complete':
+            case 'direct_answer_complete':
               setCurrentConversation((prev) => {
                 const messages = [...prev.messages];
                 const lastMsg = messages[messages.length - 1];
@@ -669,6 +780,8 @@ function App() {
     <div className="app">
       <Sidebar
         conversations={conversations}
+        hasMoreConversations={!!conversationsCursor}
+        onLoadMoreConversations={loadMoreConversations}
         currentConversationId={currentConversationId}
         onSelectConversation={handleSelectConversation}
         onNewConversation={handleNewConversation}
@@ -680,6 +793,7 @@ function App() {
       <ChatInterface
         conversation={currentConversation}
         onSendMessage={handleSendMessage}
+        onLoadMessageDetails={loadMessageDetails}
         onAbort={handleAbort}
         isLoading={isLoading}
         councilConfigured={councilConfigured}
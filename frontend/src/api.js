@@ -16,6 +16,37 @@ export const api = {
     return response.json();
   },
 
+  /**
+   * List one page of conversations, newest first.
+   * Returns { conversations, nextCursor } (nextCursor is null on the last page).
+   */
+  async listConversationsPage({ limit = 50, cursor = null, q = null } = {}) {
+    const params = new URLSearchParams({ limit: String(limit) });
+    if (cursor) params.set('cursor', cursor);
+    if (q) params.set('q', q);
+    const response = await fetch(`${API_BASE}/api/conversations?${params}`);
+    if (!response.ok) {
+      throw new Error('Failed to list conversations');
+    }
+    return {
+      conversations: await response.json(),
+      nextCursor: response.headers.get('X-Next-Cursor'),
+    };
+  },
+
+  /**
+   * Full-text search across conversation history.
+   * Returns { query, total, results: [{ conversation_id, title, kind, model, snippet, score }] }.
+   */
+  async searchConversations(q, { limit = 20, offset = 0 } = {}) {
+    const params = new URLSearchParams({ q, limit: String(limit), offset: String(offset) });
+    const response = await fetch(`${API_BASE}/api/search/conversations?${params}`);
+    if (!response.ok) {
+      throw new Error('Failed to search conversations');
+    }
+    return response.json();
+  },
+
   /**
    * Create a new conversation.
    */
@@ -36,9 +67,9 @@ export const api = {
   /**
    * Get a specific conversation.
    */
-  async getConversation(conversationId) {
+  async getConversation(conversationId, view = 'full') {
     const response = await fetch(
-      `${API_BASE}/api/conversations/${conversationId}`
+      `${API_BASE}/api/conversations/${conversationId}?view=${view}`
     );
     if (!response.ok) {
       throw new Error('Failed to get conversation');
@@ -46,6 +77,19 @@ export const api = {
     return response.json();
   },
 
+  /**
+   * Get one message with all its stage details.
+   */
+  async getMessage(conversationId, index) {
+    const response = await fetch(
+      `${API_BASE}/api/conversations/${conversationId}/messages/${index}`
+    );
+    if (!response.ok) {
+      throw new Error('Failed to get message');
+    }
+    return response.json();
+  },
+
   /**
    * Delete a conversation.
    */
@@ -13,6 +13,7 @@ import './ChatInterface.css';
 export default function ChatInterface({
     conversation,
     onSendMessage,
+    onLoadMessageDetails,
     onAbort,
     isLoading,
     councilConfigured,
@@ -154,7 +155,7 @@ export default function ChatInterface({
                                                     status={msg.loading?.stage1 ? 'thinking' : 'complete'}
                                                     progress={{
                                                         currentModel: msg.progress?.stage1?.currentModel,
-                                                        completed: msg.stage1?.map(r => r.model) || []
+                                                        completed: msg.stage1?.filter(r => !r.streaming).map(r => r.model) || []
                                                     }}
                                                 />
                                             </div>
@@ -186,6 +187,19 @@ export default function ChatInterface({
                                             />
                                         )}
 
+                                        {/* Stage details left out of the summary view */}
+                                        {msg.summary && (
+                                            <button
+                                                className="load-details-btn"
+                                                onClick={() => onLoadMessageDetails(index)}
+                                            >
+                                                Show council details
+                                                {msg.summary.stage1_models?.length > 0 && ` (${msg.summary.stage1_models.length} responses`}
+                                                {msg.summary.stage1_models?.length > 0 && msg.summary.stage2_count > 0 && `, ${msg.summary.stage2_count} rankings`}
+                                                {msg.summary.stage1_models?.length > 0 && ')'}
+                                            </button>
+                                        )}
+
                                         {/* Stage 3 */}
                                         {msg.loading?.stage3 && (
                                             <div className="stage-loading">
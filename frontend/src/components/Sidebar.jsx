@@ -1,8 +1,21 @@
-import React, { useState } from 'react';
+import React, { useEffect, useState } from 'react';
+import { api } from '../api';
 import './Sidebar.css';
 
+// Render an index snippet, highlighting the <mark>…</mark> spans as text (never as HTML)
+function Snippet({ text }) {
+  const parts = text.split(/<mark>|<\/mark>/);
+  return (
+    <div className="search-snippet">
+      {parts.map((part, i) => (i % 2 === 1 ? <mark key={i}>{part}</mark> : part))}
+    </div>
+  );
+}
+
 export default function Sidebar({
   conversations,
+  hasMoreConversations,
+  onLoadMoreConversations,
   currentConversationId,
   onSelectConversation,
   onNewConversation,
@@ -12,6 +25,29 @@ export default function Sidebar({
   onAbort
 }) {
   const [confirmingDelete, setConfirmingDelete] = useState(null);
+  const [searchQuery, setSearchQuery] = useState('');
+  const [searchResults, setSearchResults] = useState(null);
+
+  useEffect(() => {
+    const query = searchQuery.trim();
+    if (!query) {
+      setSearchResults(null);
+      return;
+    }
+    let cancelled = false;
+    const timer = setTimeout(async () => {
+      try {
+        const data = await api.searchConversations(query);
+        if (!cancelled) setSearchResults(data.results);
+      } catch (error) {
+        console.error('Failed to search conversations:', error);
+      }
+    }, 250);
+    return () => {
+      cancelled = true;
+      clearTimeout(timer);
+    };
+  }, [searchQuery]);
 
   const handleAbortClick = (e) => {
     e.stopPropagation();
@@ -62,56 +98,90 @@ export default function Sidebar({
         </button>
       </div>
 
-      <div className="conversation-list">
-        {conversations.length === 0 ? (
-          <div className="sidebar-empty-state">No history</div>
-        ) : (
-          conversations.map((conv) => (
-            <div
-              key={conv.id}
-              className={`conversation-item ${conv.id === currentConversationId ? 'active' : ''}`}
-              onClick={() => onSelectConversation(conv.id)}
-            >
-              <div className="conversation-title">
-                {conv.title || 'New Conversation'}
+      <div className="sidebar-search">
+        <input
+          type="search"
+          className="sidebar-search-input"
+          placeholder="Search conversations"
+          value={searchQuery}
+          onChange={(e) => setSearchQuery(e.target.value)}
+        />
+      </div>
+
+      {searchResults !== null ? (
+        <div className="conversation-list">
+          {searchResults.length === 0 ? (
+            <div className="sidebar-empty-state">No matches</div>
+          ) : (
+            searchResults.map((result) => (
+              <div
+                key={result.conversation_id}
+                className={`conversation-item ${result.conversation_id === currentConversationId ? 'active' : ''}`}
+                onClick={() => onSelectConversation(result.conversation_id)}
+              >
+                <div className="conversation-title">{result.title}</div>
+                <Snippet text={result.snippet} />
               </div>
-              <div className="conversation-meta">
-                <span>{new Date(conv.created_at).toLocaleDateString()}</span>
-                {isLoading && conv.id === currentConversationId ? (
-                  <button className="stop-generation-btn small" onClick={handleAbortClick}>
-                    Stop
-                  </button>
-                ) : confirmingDelete === conv.id ? (
-                  <div className="delete-confirm">
-                    <button
-                      className="confirm-yes-btn"
-                      onClick={(e) => handleConfirmDelete(e, conv.id)}
-                      title="Confirm delete"
-                    >
-                      ✓
+            ))
+          )}
+        </div>
+      ) : (
+        <div className="conversation-list">
+          {conversations.length === 0 ? (
+            <div className="sidebar-empty-state">No history</div>
+          ) : (
+            conversations.map((conv) => (
+              <div
+                key={conv.id}
+                className={`conversation-item ${conv.id === currentConversationId ? 'active' : ''}`}
+                onClick={() => onSelectConversation(conv.id)}
+              >
+                <div className="conversation-title">
+                  {conv.title || 'New Conversation'}
+                </div>
+                <div className="conversation-meta">
+                  <span>{new Date(conv.created_at).toLocaleDateString()}</span>
+                  {isLoading && conv.id === currentConversationId ? (
+                    <button className="stop-generation-btn small" onClick={handleAbortClick}>
+                      Stop
                     </button>
+                  ) : confirmingDelete === conv.id ? (
+                    <div className="delete-confirm">
+                      <button
+                        className="confirm-yes-btn"
+                        onClick={(e) => handleConfirmDelete(e, conv.id)}
+                        title="Confirm delete"
+                      >
+                        ✓
+                      </button>
+                      <button
+                        className="confirm-no-btn"
+                        onClick={handleCancelDelete}
+                        title="Cancel"
+                      >
+                        ✕
+                      </button>
+                    </div>
+                  ) : (
                     <button
-                      className="confirm-no-btn"
-                      onClick={handleCancelDelete}
-                      title="Cancel"
+                      className="delete-btn"
+                      onClick={(e) => handleDeleteClick(e, conv.id)}
+                      title="Delete conversation"
                     >
-                      ✕
+                      🗑️
                     </button>
-                  </div>
-                ) : (
-                  <button
-                    className="delete-btn"
-                    onClick={(e) => handleDeleteClick(e, conv.id)}
-                    title="Delete conversation"
-                  >
-                    🗑️
-                  </button>
-                )}
+                  )}
+                </div>
               </div>
-            </div>
-          ))
-        )}
-      </div>
+            ))
+          )}
+          {hasMoreConversations && (
+            <button className="load-more-btn" onClick={onLoadMoreConversations}>
+              Load more
+            </button>
+          )}
+        </div>
+      )}
     </div>
   );
 }
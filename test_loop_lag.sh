@@ -0,0 +1,66 @@
+#!/bin/bash
+# Event-loop lag while a large conversation is saved.
+#
+# Saves a multi-megabyte conversation through storage.aio while a ticker
+# task (standing in for open SSE streams) measures how late the loop wakes
+# it up. Fails if the loop stalls for longer than MAX_LAG_MS. The same save
+# run directly on the loop is reported for comparison.
+
+cd "$(dirname "$0")"
+PYTHONPATH="$PWD" MAX_LAG_MS="${MAX_LAG_MS:-100}" python3 - <<'PY' || exit 1
+import asyncio
+import os
+import sys
+import tempfile
+import time
+import uuid
+
+os.chdir(tempfile.mkdtemp())
+os.environ.setdefault("DB_TYPE", "json")
+
+from backend import storage
+from backend.storage import aio
+from backend.storage.database import init_database
+
+TICK = 0.005
+MAX_LAG_MS = float(os.environ["MAX_LAG_MS"])
+
+
+async def ticker(stop: asyncio.Event, lags: list):
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(TICK)
+        lags.append(time.perf_counter() - start - TICK)
+
+
+async def measure(save) -> float:
+    conversation = storage.create_conversation(str(uuid.uuid4()))
+    conversation["messages"] = [
+        {"role": "user", "content": f"message {i} " + "x" * 2000} for i in range(4000)
+    ]
+    stop, lags = asyncio.Event(), []
+    tickers = [asyncio.create_task(ticker(stop, lags)) for _ in range(4)]
+    await asyncio.sleep(0.05)
+    await save(conversation)
+    await asyncio.sleep(0.05)
+    stop.set()
+    await asyncio.gather(*tickers)
+    return max(lags) * 1000
+
+
+async def main():
+    async def blocking(conversation):
+        storage.save_conversation(conversation)
+
+    print(f"DB_TYPE={os.environ['DB_TYPE']}")
+    init_database()
+    print(f"  save on the event loop: max lag {await measure(blocking):.1f} ms")
+    lag = await measure(aio.save_conversation)
+    print(f"  save via storage.aio:   max lag {lag:.1f} ms (limit {MAX_LAG_MS:.0f} ms)")
+    aio.shutdown()
+    return lag <= MAX_LAG_MS
+
+
+sys.exit(0 if asyncio.run(main()) else 1)
+PY
+echo "✅ Event loop stays responsive during large writes"